@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # API Keys
@@ -11,9 +12,108 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4o-mini"  # Recommended: gpt-4o-mini (cheaper) or gpt-3.5-turbo
     whisper_model: str = "whisper-1"  # OpenAI Whisper API model
     
+    # Admin endpoints (/admin) are disabled while this is empty
+    admin_token: str = ""
+    
     # Provider Selection (gemini for testing, openai for production)
     reflection_provider: str = "gemini"  # Options: "gemini" or "openai"
     
+    # Local model store (fill it with `python -m app.cli fetch-models`). Empty: no
+    # store, models are downloaded from the Hugging Face hub on first load
+    local_model_store: str = ""
+    # Never contact the Hugging Face hub, models must be in the store (a missing one
+    # fails startup). Unset: offline whenever a store is configured; False opts in to
+    # downloading missing models
+    offline_models: Optional[bool] = None
+    
+    # Emotion inference backend
+    emotion_backend: str = "torch"  # Options: "torch" or "onnx"
+    onnx_model_dir: str = "./models/onnx"  # Where exported ONNX models are kept
+    onnx_quantize: bool = True  # Dynamic INT8 quantization of the exported model
+    onnx_intra_op_threads: int = 0  # 0 lets ONNX Runtime pick
+    onnx_parity_tolerance: float = 0.05  # Max per-label score difference vs PyTorch
+    
+    # Emotion model replicas
+    emotion_replicas: int = 1  # Model replicas serving requests in parallel
+    emotion_threads_per_replica: int = 0  # 0 = split available cores evenly
+    emotion_pin_replicas: bool = True  # Pin each replica to its own core slice
+    
+    # Blocking work executors
+    inference_workers: int = 2  # Threads running model inference
+    llm_workers: int = 32  # Threads waiting on speech-to-text / blocking LLM calls
+    
+    # Async LLM provider clients (one keep-alive pool per provider and worker)
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_timeout_seconds: float = 30.0
+    
+    # Provider routing: hedge slow requests to the other provider, skip failing ones
+    llm_hedging_enabled: bool = True
+    llm_hedge_quantile: float = 0.95  # Hedge once a request is slower than this latency quantile
+    llm_hedge_min_delay_seconds: float = 1.0
+    llm_hedge_default_delay_seconds: float = 5.0  # Until enough latencies are recorded
+    llm_latency_window: int = 200  # Recent latencies kept per provider
+    llm_breaker_failures: int = 5  # Failures within the window that open the circuit
+    llm_breaker_window_seconds: float = 30.0
+    llm_breaker_cooldown_seconds: float = 30.0  # Open time before a trial request
+    
+    # Startup warmup: /ready answers 200 once per-round latency is stable
+    warmup_enabled: bool = True
+    warmup_seq_lengths: List[int] = [16, 64, 128, 256, 512]  # Tokens per sequence
+    warmup_batch_sizes: List[int] = [1, 4, 16]  # Sequences per forward pass
+    warmup_window: int = 3  # Rounds per median compared
+    warmup_tolerance: float = 0.1  # Max relative change between consecutive medians
+    warmup_max_rounds: int = 12
+    warmup_max_seconds: float = 120.0
+    emotion_torch_compile: bool = False  # torch.compile the model (graphs captured during warmup)
+    
+    # Multi-worker serving (gunicorn -c gunicorn.conf.py): models load once, before fork
+    web_workers: int = 1  # Worker processes
+    torch_threads_per_worker: int = 0  # 0 = split available cores evenly
+    
+    # Long entries are scored over overlapping token windows
+    emotion_window_overlap: int = 64  # Tokens shared by consecutive windows
+    emotion_max_windows: int = 16  # Upper bound on windows per text
+    emotion_window_aggregation: str = "weighted"  # Options: "max", "mean" or "weighted"
+    emotion_max_sentences: int = 50  # Max sentences in a per-sentence breakdown
+    
+    # Emotion cascade: a lexical model answers confident, short texts before the transformer
+    emotion_cascade_enabled: bool = False
+    emotion_cascade_model_path: str = "./models/lexical_goemotions.joblib"
+    emotion_cascade_confidence: float = 0.9  # Min top-label probability to skip the transformer
+    emotion_cascade_max_chars: int = 280  # Longer texts always go to the transformer
+    
+    # Emotion inference batching
+    emotion_batching_enabled: bool = True
+    emotion_batch_max_size: int = 16  # Max requests per batched forward pass
+    emotion_batch_max_wait_ms: float = 10.0  # Max time a request waits for a batch to fill (only while one runs)
+    emotion_batch_concurrency: int = 1  # Batches allowed in flight at once
+    
+    # Concurrent identical analysis / reflection requests share one computation
+    request_coalescing_enabled: bool = True
+    
+    # Emotion analysis cache
+    emotion_cache_enabled: bool = True
+    emotion_cache_max_entries: int = 2048  # In-memory LRU size
+    emotion_cache_max_disk_entries: int = 50000  # Oldest scores pruned beyond this
+    emotion_cache_ttl_seconds: float = 0.0  # 0 = keep (SCORING_VERSION invalidates stale scores)
+    cache_db_path: str = "./mindmate_cache.db"  # Persistent cache tier ("" to disable)
+    
+    # Reflection cache: LLM replies keyed by (provider, model, prompt, sampling settings)
+    reflection_cache_enabled: bool = True
+    reflection_cache_ttl_seconds: float = 86400.0  # Replies expire after a day
+    reflection_cache_max_entries: int = 512  # In-memory LRU size
+    reflection_cache_max_disk_entries: int = 10000  # Oldest replies pruned beyond this
+    
+    # Deferred reflections: /journal/create saves the entry and answers 202 right away,
+    # a job queue stored in the database writes the reflection afterwards
+    journal_defer_reflection: bool = False  # Used when a request does not choose
+    reflection_queue_workers: int = 4  # Jobs generated concurrently per process
+    reflection_job_max_attempts: int = 3
+    reflection_job_retry_seconds: float = 5.0  # First retry delay, doubled per failure
+    reflection_job_lease_seconds: float = 120.0  # A running job not finished by then is retried
+    reflection_queue_poll_seconds: float = 2.0  # Idle workers check for due jobs this often
+    
     # Database
     database_url: str = "sqlite:///./mindmate.db"
     
@@ -1,9 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .config import get_settings
 from .database import engine, Base
 from .routes import journal, mood, analysis
 from .routes import settings as settings_router
+from .routes import admin
+import asyncio
 import logging
 
 # Configure logging
@@ -38,6 +40,7 @@ app.include_router(journal.router)
 app.include_router(mood.router)
 app.include_router(analysis.router)
 app.include_router(settings_router.router)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -55,24 +58,63 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving (see /ready for traffic readiness)"""
     return {
         "status": "healthy",
         "version": "2.0.0",
         "model": "GoEmotions"
     }
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness: the emotion model is loaded and warmed up
+    
+    Answers 503 until warmup has run representative sequence lengths and
+    batch sizes and per-round latency has stabilized (or its round/time
+    budget ran out), so load balancers only route traffic to warm workers.
+    """
+    from .services.warmup import startup_warmup
+    
+    if not startup_warmup.ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if startup_warmup.ready else "not_ready",
+        "warmup": startup_warmup.stats()
+    }
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 MindMate API v2.0 starting up...")
-    logger.info("📊 Loading GoEmotions model...")
     
-    # Warm up models
-    try:
-        from .services.emotion_analyzer_v2 import emotion_analyzer_v2
-        test_result = emotion_analyzer_v2.analyze("This is a test")
-        logger.info(f"✅ Model loaded: {test_result.get('model', 'unknown')}")
-    except Exception as e:
-        logger.warning(f"⚠️ Model warmup failed (will load on first request): {e}")
+    # Models and provider SDKs load in a background thread so the port binds
+    # right away; a request that needs a component first waits for it
+    from .services.emotion_analyzer_v2 import EmotionAnalyzerV2, emotion_analyzer_v2
+    from .services.reflection_generator import reflection_generator
+    from .services.reflection_generator_v2 import reflection_generator_v2
+    from .services.speech_to_text import speech_to_text_service
+    from .services.lazy import load_all_in_background
+    from .services.warmup import startup_warmup
+    from .services import model_store
+    
+    # Offline, a model missing from the store is a startup error (not a degraded analyzer)
+    model_store.require_models([EmotionAnalyzerV2.MODEL_NAME])
+    
+    def warm_up():
+        # /ready stays 503 until this finishes
+        startup_warmup.run(emotion_analyzer_v2.load(), enabled=settings.warmup_enabled)
+    
+    load_all_in_background(
+        [emotion_analyzer_v2, reflection_generator, reflection_generator_v2, speech_to_text_service],
+        after=warm_up
+    )
+    
+    # Queue workers poll the database, so they only run when reflections are
+    # deferred by default or the previous run left jobs unfinished; otherwise
+    # the first deferred request starts them
+    from .services.reflection_queue import reflection_queue
+    if settings.journal_defer_reflection or await asyncio.to_thread(reflection_queue.has_unfinished_jobs):
+        reflection_queue.start()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey
 from datetime import datetime
 from .database import Base
 
@@ -12,4 +12,19 @@ class JournalEntry(Base):
     emotion_scores = Column(String, nullable=True)  # JSON string
     reflection = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    is_voice = Column(Boolean, default=False)
\ No newline at end of file
+    is_voice = Column(Boolean, default=False)
+
+class ReflectionJob(Base):
+    """Deferred reflection for a journal entry (see services/reflection_queue.py)"""
+    __tablename__ = "reflection_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("journal_entries.id"), unique=True, nullable=False)
+    status = Column(String, default="pending", index=True)  # pending, running, done, fallback, failed
+    attempts = Column(Integer, default=0)
+    result = Column(Text, nullable=True)  # JSON: suggestions, tone, focus, cached, fallback
+    error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow)  # Retry backoff
+    lease_until = Column(DateTime, nullable=True)  # A running job past its lease is picked up again
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,62 @@
+"""
+Multi-worker serving with the models shared copy-on-write
+
+`gunicorn -c gunicorn.conf.py app.main:app` imports the app once in the
+master process, loads every model there (`load_before_fork()`) and then
+forks the workers. Forked workers share the master's memory pages until
+they write to them, so N workers hold one copy of the weights instead of
+N. Each worker calls `after_fork()` to replace the state that must not
+cross a fork (threads, SQLite and database connections).
+"""
+
+import gc
+import logging
+import os
+import sys
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def load_before_fork():
+    """Load every lazily created service in the master, then freeze the heap"""
+    from .services import model_store
+    from .services.emotion_analyzer_v2 import EmotionAnalyzerV2
+    from .services.lazy import load_all
+
+    model_store.require_models([EmotionAnalyzerV2.MODEL_NAME])
+
+    # Fast tokenizers warn and disable themselves when parallelism was used before a fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    elapsed = load_all()
+    logger.info(f"✅ Models loaded before fork in {elapsed:.2f}s")
+
+    # Objects that exist now are never scanned by the cyclic GC again, so
+    # collections in the workers do not write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+    logger.info(f"🧊 Froze {gc.get_freeze_count()} objects for copy-on-write sharing")
+
+
+def after_fork():
+    """Per-worker setup after fork(): threads, caches and connections"""
+    from .database import engine
+    from .services.cache import emotion_cache, reflection_cache
+    from .services.emotion_analyzer_v2 import emotion_analyzer_v2
+
+    if "torch" in sys.modules:
+        import torch
+        from .services.replica_pool import torch_thread_budget
+
+        torch.set_num_threads(torch_thread_budget())
+
+    emotion_cache.reopen()
+    reflection_cache.reopen()
+    engine.dispose(close=False)  # Pooled connections belong to the master
+
+    if emotion_analyzer_v2.is_loaded:
+        emotion_analyzer_v2.after_fork()
+    logger.info(f"👷 Worker {os.getpid()} ready")
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from ..config import get_settings
+from ..services.model_swap import model_swapper
+from pydantic import BaseModel
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Allow the request only with the configured X-Admin-Token"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+class ModelSwapRequest(BaseModel):
+    model_name: str  # Hub model id or local model directory
+    shadow_rate: float = 0.0  # Share of live texts also scored by the candidate
+    shadow_samples: int = 0  # Shadow-scored texts to collect before the swap
+    auto_promote: bool = True  # Swap in as soon as the candidate is ready
+    min_agreement: float = 0.0  # Minimum primary-label agreement for auto-promotion
+
+    model_config = {"protected_namespaces": ()}
+
+
+@router.get("/model")
+async def get_model_status():
+    """
+    Active emotion model, candidate status and shadow comparison stats
+    
+    Note: with several workers (gunicorn.conf.py) each worker has its own
+    active model; these endpoints act on the worker that serves the call.
+    """
+    return model_swapper.stats()
+
+
+@router.post("/model", status_code=202)
+async def swap_model(request: ModelSwapRequest):
+    """
+    Load a new emotion model in the background and swap it in
+    
+    Args:
+        request: Candidate model and shadow scoring options
+        
+    Returns:
+        Swap status; poll GET /admin/model to follow it
+    """
+    try:
+        return model_swapper.start(
+            request.model_name,
+            shadow_rate=request.shadow_rate,
+            shadow_samples=request.shadow_samples,
+            auto_promote=request.auto_promote,
+            min_agreement=request.min_agreement
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting model swap: {e}")
+        raise HTTPException(status_code=500, detail="Failed to start model swap")
+
+
+@router.post("/model/promote")
+async def promote_model():
+    """Swap the loaded candidate in now, whatever its shadow stats"""
+    try:
+        return model_swapper.promote()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("/model/candidate")
+async def cancel_candidate():
+    """Drop the candidate model (the active model is unchanged)"""
+    return model_swapper.cancel()
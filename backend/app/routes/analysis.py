@@ -1,23 +1,36 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from ..schemas import (
     EmotionAnalysis, ReflectionRequest, ReflectionResponse,
-    EmotionAnalysisV2, EmotionScore, ValenceScore
+    EmotionAnalysisV2
 )
 from ..services.emotion_analyzer import emotion_analyzer
 from ..services.reflection_generator import reflection_generator
+from ..services.micro_batcher import emotion_batcher
+from ..services.cache import emotion_cache, reflection_cache
+from ..services.executor import inference_executor, llm_executor
+from ..services.llm_providers import provider_loop
 from ..services.emotion_analyzer_v2 import emotion_analyzer_v2
 from ..services.reflection_generator_v2 import reflection_generator_v2
 from ..services.speech_to_text import speech_to_text_service
+from ..services.lazy import LazyService
+from ..services.reflection_queue import reflection_queue
+from ..utils.sse import sse_event, SSE_HEADERS
 from pydantic import BaseModel
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analysis", tags=["AI Analysis"])
 
+# "hit" when the reflection was served from the reflection cache
+CACHE_HEADER = "X-Reflection-Cache"
+
 
 class TextRequest(BaseModel):
     text: str
+    sentences: bool = False  # Per-sentence breakdown (/emotion-v2 only)
 
 
 @router.post("/emotion", response_model=EmotionAnalysis)
@@ -38,7 +51,8 @@ async def analyze_emotion(request: TextRequest):
         )
     
     try:
-        result = emotion_analyzer.analyze(request.text)
+        # Derived from the GoEmotions forward pass (Ekman mapping)
+        result = emotion_analyzer.from_v2(await emotion_batcher.analyze(request.text))
         
         return EmotionAnalysis(
             emotion=result["emotion"],
@@ -54,7 +68,7 @@ async def analyze_emotion(request: TextRequest):
 
 
 @router.post("/reflect", response_model=ReflectionResponse)
-async def generate_reflection(request: ReflectionRequest):
+async def generate_reflection(request: ReflectionRequest, response: Response):
     """
     Generate AI reflection based on journal content and detected emotion
     
@@ -71,14 +85,16 @@ async def generate_reflection(request: ReflectionRequest):
         )
     
     try:
-        result = reflection_generator.generate(
+        result = await reflection_generator.agenerate(
             request.content,
             request.emotion
         )
         
+        response.headers[CACHE_HEADER] = "hit" if result.get("cached") else "miss"
         return ReflectionResponse(
             reflection=result["reflection"],
-            suggestions=result["suggestions"]
+            suggestions=result["suggestions"],
+            cached=result.get("cached", False)
         )
     except Exception as e:
         logger.error(f"Error generating reflection: {e}")
@@ -144,7 +160,7 @@ async def convert_speech_to_text(audio: UploadFile = File(...)):
 
 
 @router.post("/analyze-full")
-async def full_analysis(request: TextRequest):
+async def full_analysis(request: TextRequest, response: Response):
     """
     Perform complete analysis: emotion detection + reflection generation
     
@@ -162,13 +178,14 @@ async def full_analysis(request: TextRequest):
     
     try:
         # Analyze emotion
-        emotion_result = emotion_analyzer.analyze(request.text)
+        emotion_result = emotion_analyzer.from_v2(await emotion_batcher.analyze(request.text))
         
         # Generate reflection
-        reflection_result = reflection_generator.generate(
+        reflection_result = await reflection_generator.agenerate(
             request.text,
             emotion_result["emotion"]
         )
+        response.headers[CACHE_HEADER] = "hit" if reflection_result.get("cached") else "miss"
         
         return {
             "emotion": {
@@ -178,7 +195,8 @@ async def full_analysis(request: TextRequest):
             },
             "reflection": {
                 "message": reflection_result["reflection"],
-                "suggestions": reflection_result["suggestions"]
+                "suggestions": reflection_result["suggestions"],
+                "cached": reflection_result.get("cached", False)
             },
             "success": True
         }
@@ -191,12 +209,57 @@ async def full_analysis(request: TextRequest):
         )
 
 
+@router.get("/metrics")
+async def get_analysis_metrics():
+    """
+    Runtime metrics for the emotion analysis pipeline
+    
+    Returns:
+        Micro-batcher, emotion/reflection cache, cascade, executor and replica statistics,
+        request coalescing counters, deferred reflection jobs, plus the load state of
+        each lazily loaded component
+    """
+    # Reading the analyzer's attributes would load the model
+    loaded = emotion_analyzer_v2.is_loaded
+    # Job counts come from a database query: keep it off the event loop
+    queue_stats = await asyncio.get_running_loop().run_in_executor(None, reflection_queue.stats)
+    backend = emotion_analyzer_v2.backend if loaded else None
+    cascade = emotion_analyzer_v2.cascade if loaded else None
+    
+    return {
+        "emotion_backend": backend.stats() if hasattr(backend, "stats") else {
+            "replicas": 1 if backend else 0
+        },
+        "emotion_batcher": emotion_batcher.stats(),
+        "emotion_cache": emotion_cache.stats(),
+        "reflection_cache": reflection_cache.stats(),
+        "emotion_cascade": cascade.stats() if cascade else {"enabled": False},
+        "executors": {
+            "inference": inference_executor.stats(),
+            "llm": llm_executor.stats(),
+            "llm_io": provider_loop.stats()
+        },
+        "coalescing": {
+            "emotion": emotion_batcher.in_flight.stats(),
+            "reflection": (
+                reflection_generator.in_flight.stats() if reflection_generator.is_loaded else None
+            ),
+            "reflection_v2": (
+                reflection_generator_v2.in_flight.stats() if reflection_generator_v2.is_loaded else None
+            )
+        },
+        "reflection_queue": queue_stats,
+        "components": LazyService.stats()
+    }
+
+
 # V2 Endpoints using GoEmotions
 @router.post("/emotion-v2", response_model=EmotionAnalysisV2)
 async def analyze_emotion_v2(request: TextRequest):
     """
     Analyze emotion using GoEmotions (27 labels)
     Includes confusion, mixed emotions, and conflict detection
+    Set `sentences` for a per-sentence emotion timeline
     """
     if not request.text or len(request.text.strip()) < 5:
         raise HTTPException(
@@ -205,37 +268,8 @@ async def analyze_emotion_v2(request: TextRequest):
         )
     
     try:
-        result = emotion_analyzer_v2.analyze(request.text)
-        
-        # Convert significant_emotions to EmotionScore objects
-        significant_emotions = [
-            EmotionScore(label=e['label'], confidence=e['confidence'])
-            for e in result.get('significant_emotions', [])
-        ]
-        
-        # Convert valence to ValenceScore object
-        valence_data = result.get('valence', {})
-        valence = ValenceScore(
-            positive=valence_data.get('positive', 0.0),
-            negative=valence_data.get('negative', 0.0),
-            neutral=valence_data.get('neutral', 0.0),
-            overall=valence_data.get('overall', 'neutral')
-        )
-        
-        return EmotionAnalysisV2(
-            emotion=result['emotion'],
-            confidence=result['confidence'],
-            all_scores=result['all_scores'],
-            significant_emotions=significant_emotions,
-            is_mixed=result['is_mixed'],
-            mixed_type=result['mixed_type'],
-            has_conflict=result['has_conflict'],
-            has_confusion=result['has_confusion'],
-            complexity=result['complexity'],
-            valence=valence,
-            emotional_state=result['emotional_state'],
-            model=result['model']
-        )
+        result = await emotion_batcher.analyze(request.text, sentences=request.sentences)
+        return result.to_response()
     except Exception as e:
         logger.error(f"Error analyzing emotion: {e}")
         raise HTTPException(
@@ -245,7 +279,7 @@ async def analyze_emotion_v2(request: TextRequest):
 
 
 @router.post("/reflect-v2")
-async def generate_reflection_v2(request: TextRequest):
+async def generate_reflection_v2(request: TextRequest, response: Response):
     """
     Generate reflection using enhanced emotional analysis
     """
@@ -257,16 +291,17 @@ async def generate_reflection_v2(request: TextRequest):
     
     try:
         # First analyze emotion
-        emotion_result = emotion_analyzer_v2.analyze(request.text)
+        emotion_result = await emotion_batcher.analyze(request.text)
         
         # Then generate reflection
-        reflection_result = reflection_generator_v2.generate(
+        reflection_result = await reflection_generator_v2.agenerate(
             request.text,
             emotion_result
         )
+        response.headers[CACHE_HEADER] = "hit" if reflection_result.get("cached") else "miss"
         
         return {
-            "emotion_analysis": emotion_result,
+            "emotion_analysis": emotion_result.to_dict(),
             "reflection": reflection_result,
             "success": True
         }
@@ -278,8 +313,40 @@ async def generate_reflection_v2(request: TextRequest):
         )
 
 
+@router.post("/reflect-v2/stream")
+async def stream_reflection_v2(request: TextRequest):
+    """
+    Generate a reflection, streamed as server-sent events
+    
+    Events: `emotion` (the analysis, sent first), `token` (reflection text
+    as the provider generates it), then `reflection` (parsed reflection,
+    suggestions, tone and focus)
+    """
+    if not request.text or len(request.text.strip()) < 10:
+        raise HTTPException(
+            status_code=400,
+            detail="Content must be at least 10 characters long"
+        )
+    
+    try:
+        emotion_result = await emotion_batcher.analyze(request.text)
+    except Exception as e:
+        logger.error(f"Error analyzing emotion: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate reflection"
+        )
+    
+    async def events():
+        yield sse_event("emotion", emotion_result.to_dict())
+        async for event, data in reflection_generator_v2.astream(request.text, emotion_result):
+            yield sse_event(event, data)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/full-analysis-v2")
-async def full_analysis_v2(request: TextRequest):
+async def full_analysis_v2(request: TextRequest, response: Response):
     """
     Complete emotional analysis with GoEmotions
     """
@@ -291,13 +358,14 @@ async def full_analysis_v2(request: TextRequest):
     
     try:
         # Emotion analysis
-        emotion_result = emotion_analyzer_v2.analyze(request.text)
+        emotion_result = await emotion_batcher.analyze(request.text)
         
         # Generate reflection
-        reflection_result = reflection_generator_v2.generate(
+        reflection_result = await reflection_generator_v2.agenerate(
             request.text,
             emotion_result
         )
+        response.headers[CACHE_HEADER] = "hit" if reflection_result.get("cached") else "miss"
         
         return {
             "text": request.text,
@@ -310,13 +378,15 @@ async def full_analysis_v2(request: TextRequest):
                 "complexity": emotion_result["complexity"],
                 "valence": emotion_result["valence"],
                 "has_confusion": emotion_result["has_confusion"],
-                "has_conflict": emotion_result["has_conflict"]
+                "has_conflict": emotion_result["has_conflict"],
+                "windows": emotion_result["windows"]
             },
             "reflection": {
                 "message": reflection_result["reflection"],
                 "suggestions": reflection_result["suggestions"],
                 "tone": reflection_result.get("tone"),
-                "focus": reflection_result.get("focus")
+                "focus": reflection_result.get("focus"),
+                "cached": reflection_result.get("cached", False)
             },
             "model": emotion_result["model"],
             "success": True
@@ -1,62 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..config import get_settings
+from ..database import SessionLocal, get_db
 from ..models import JournalEntry
-from ..schemas import JournalCreate, JournalResponse, JournalResponseV2
-from ..services.emotion_analyzer_v2 import emotion_analyzer_v2  # NEW
+from ..schemas import JournalCreate, JournalResponse, JournalResponseV2, ReflectionStatus
+from ..services.micro_batcher import emotion_batcher
 from ..services.reflection_generator_v2 import reflection_generator_v2  # NEW
+from ..services.reflection_queue import reflection_queue
+from ..utils.sse import sse_event, SSE_HEADERS
 import json
-from typing import List
+import logging
+from typing import List, Optional
 
 router = APIRouter(prefix="/journal", tags=["Journal"])
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 @router.post("/create", response_model=JournalResponseV2)
 async def create_journal_entry(
     entry: JournalCreate,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Create a new journal entry with GoEmotions analysis"""
+    """
+    Create a new journal entry with GoEmotions analysis
+    
+    With deferred reflections (`defer_reflection`, or the server default)
+    the entry is saved right after emotion analysis and returned with 202
+    and `reflection_status: "pending"`; poll /journal/{id}/reflection for
+    the reflection.
+    """
     
     # Analyze emotion with GoEmotions (27 labels)
-    emotion_result = emotion_analyzer_v2.analyze(entry.content)
+    emotion_result = await emotion_batcher.analyze(entry.content, sentences=entry.sentences)
+    
+    defer = entry.defer_reflection
+    if defer is None:
+        defer = settings.journal_defer_reflection
+    if defer:
+        response.status_code = 202
+        return _save_entry(db, entry, emotion_result, None)
     
     # Generate reflection with enhanced context
-    reflection_result = reflection_generator_v2.generate(
+    reflection_result = await reflection_generator_v2.agenerate(
         entry.content,
         emotion_result
     )
     
+    response.headers["X-Reflection-Cache"] = "hit" if reflection_result.get("cached") else "miss"
+    return _save_entry(db, entry, emotion_result, reflection_result)
+
+@router.post("/create/stream")
+async def create_journal_entry_stream(entry: JournalCreate):
+    """
+    Create a journal entry, streaming the reflection as server-sent events
+    
+    Events: `emotion` (emotion metadata, sent first), `token` (reflection
+    text as the provider generates it), `reflection` (parsed reflection,
+    suggestions, tone and focus), then `entry` (the saved entry, same as
+    /journal/create returns).
+    """
+    emotion_result = await emotion_batcher.analyze(entry.content, sentences=entry.sentences)
+    
+    async def events():
+        yield sse_event("emotion", emotion_result.to_storage_dict())
+        
+        reflection_result = None
+        async for event, data in reflection_generator_v2.astream(entry.content, emotion_result):
+            if event == "reflection":
+                reflection_result = data
+            yield sse_event(event, data)
+        
+        # The request's session is not guaranteed to outlive the response
+        db = SessionLocal()
+        try:
+            saved = _save_entry(db, entry, emotion_result, reflection_result)
+        finally:
+            db.close()
+        yield sse_event("entry", saved.model_dump())
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _save_entry(
+    db: Session,
+    entry: JournalCreate,
+    emotion_result,
+    reflection_result: Optional[dict]
+) -> JournalResponseV2:
+    """
+    Store an analyzed entry and build its response
+    
+    Without a reflection_result the entry is saved together with a
+    pending reflection job, in one transaction.
+    """
+    # Emotion metadata: stored as JSON and returned as-is
+    emotion_metadata = emotion_result.to_storage_dict()
+    
     # Save to database
     db_entry = JournalEntry(
         content=entry.content,
         emotion=emotion_result['emotion'],
-        emotion_scores=json.dumps({
-            'all_scores': emotion_result['all_scores'],
-            'significant_emotions': emotion_result['significant_emotions'],
-            'is_mixed': emotion_result['is_mixed'],
-            'mixed_type': emotion_result['mixed_type'],
-            'has_conflict': emotion_result['has_conflict'],
-            'has_confusion': emotion_result['has_confusion'],
-            'complexity': emotion_result['complexity'],
-            'valence': emotion_result['valence'],
-            'emotional_state': emotion_result['emotional_state'],
-            'model': emotion_result['model']
-        }),
-        reflection=reflection_result['reflection'],
+        emotion_scores=json.dumps(emotion_metadata),
+        reflection=reflection_result['reflection'] if reflection_result else None,
         is_voice=entry.is_voice
     )
     
     db.add(db_entry)
+    if reflection_result is None:
+        db.flush()  # Assigns the entry id
+        reflection_queue.enqueue(db, db_entry.id)
     db.commit()
     db.refresh(db_entry)
     
-    # Parse emotion_scores for metadata
-    emotion_metadata = {}
-    if db_entry.emotion_scores:
-        try:
-            emotion_metadata = json.loads(db_entry.emotion_scores)
-        except (json.JSONDecodeError, TypeError):
-            emotion_metadata = {}
+    if reflection_result is None:
+        reflection_queue.notify()
+        return JournalResponseV2(
+            id=db_entry.id,
+            content=db_entry.content,
+            emotion=db_entry.emotion,
+            emotion_metadata=emotion_metadata,
+            reflection=None,
+            reflection_metadata=None,
+            reflection_status="pending",
+            created_at=db_entry.created_at,
+            is_voice=db_entry.is_voice
+        )
     
     # Return with full metadata
     return JournalResponseV2(
@@ -68,8 +137,10 @@ async def create_journal_entry(
         reflection_metadata={
             'suggestions': reflection_result.get('suggestions', []),
             'tone': reflection_result.get('tone', 'supportive'),
-            'focus': reflection_result.get('focus', 'support')
+            'focus': reflection_result.get('focus', 'support'),
+            'cached': reflection_result.get('cached', False)
         },
+        reflection_status="done",
         created_at=db_entry.created_at,
         is_voice=db_entry.is_voice
     )
@@ -111,6 +182,27 @@ async def get_journal_history(
     
     return result
 
+@router.get("/{entry_id}/reflection", response_model=ReflectionStatus)
+async def get_journal_reflection(
+    entry_id: int,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to hold the request until the reflection is ready")
+):
+    """
+    Reflection status of an entry (for deferred reflections)
+    
+    With `wait`, answers as soon as the reflection is done or failed, or
+    with the current status once `wait` seconds have passed (long poll).
+    """
+    try:
+        state = await reflection_queue.wait_for(entry_id, timeout=wait)
+    except Exception as e:
+        logger.error(f"Error reading reflection status: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read reflection status")
+    
+    if state is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return ReflectionStatus(**state)
+
 @router.get("/{entry_id}", response_model=JournalResponseV2)
 async def get_journal_entry(
     entry_id: int,
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from ..services.reflection_generator import reflection_generator, set_provider, get_provider
+from ..services.reflection_generator_v2 import reflection_generator_v2
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,18 @@ class ProviderResponse(BaseModel):
     current_provider: str
     available_providers: List[str]
     message: str
+    provider_stats: Dict[str, dict] = {}  # Routing, latency and circuit state per generator
+
+
+def _provider_stats() -> Dict[str, dict]:
+    """Router stats of each reflection generator that has providers"""
+    stats = {}
+    if reflection_generator.router:
+        stats["reflection"] = reflection_generator.router.stats()
+    # Only report the v2 generator once something has loaded it
+    if reflection_generator_v2.is_loaded and reflection_generator_v2.provider:
+        stats["reflection_v2"] = reflection_generator_v2.provider.stats()
+    return stats
 
 
 @router.get("/provider", response_model=ProviderResponse)
@@ -24,17 +37,13 @@ async def get_reflection_provider():
     """Get the current reflection provider"""
     try:
         current = get_provider()
-        available = []
-        
-        if reflection_generator.gemini_model:
-            available.append("gemini")
-        if reflection_generator.openai_client:
-            available.append("openai")
+        available = list(reflection_generator.providers)
         
         return ProviderResponse(
             current_provider=current,
             available_providers=available,
-            message=f"Current provider: {current}"
+            message=f"Current provider: {current}",
+            provider_stats=_provider_stats()
         )
     except Exception as e:
         logger.error(f"Error getting provider: {e}")
@@ -46,19 +55,15 @@ async def set_reflection_provider(request: ProviderRequest):
     """Switch the reflection provider"""
     try:
         new_provider = set_provider(request.provider)
-        available = []
-        
-        if reflection_generator.gemini_model:
-            available.append("gemini")
-        if reflection_generator.openai_client:
-            available.append("openai")
+        available = list(reflection_generator.providers)
         
         mode = "Testing" if new_provider == "gemini" else "Production"
         
         return ProviderResponse(
             current_provider=new_provider,
             available_providers=available,
-            message=f"Switched to {new_provider.upper()} ({mode} Mode)"
+            message=f"Switched to {new_provider.upper()} ({mode} Mode)",
+            provider_stats=_provider_stats()
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -5,6 +5,8 @@ from typing import Optional, Dict, List, Any
 class JournalCreate(BaseModel):
     content: str = Field(..., min_length=10, max_length=5000)
     is_voice: bool = False
+    sentences: bool = False  # Include a per-sentence emotion breakdown
+    defer_reflection: Optional[bool] = None  # Answer before the reflection exists (default: server setting)
 
 class EmotionAnalysis(BaseModel):
     emotion: str
@@ -18,6 +20,7 @@ class ReflectionRequest(BaseModel):
 class ReflectionResponse(BaseModel):
     reflection: str
     suggestions: List[str]
+    cached: bool = False  # Served from the reflection cache
 
 class JournalResponse(BaseModel):
     id: int
@@ -53,6 +56,21 @@ class ValenceScore(BaseModel):
     neutral: float
     overall: str
 
+class ConflictCue(BaseModel):
+    cue: str
+    start: int
+    end: int
+
+class SentenceEmotion(BaseModel):
+    index: int
+    text: str
+    start: int
+    end: int
+    emotion: str
+    confidence: float
+    significant_emotions: List[EmotionScore]
+    valence: str
+
 class EmotionAnalysisV2(BaseModel):
     emotion: str
     confidence: float
@@ -61,10 +79,13 @@ class EmotionAnalysisV2(BaseModel):
     is_mixed: bool
     mixed_type: str
     has_conflict: bool
+    conflict_cues: List[ConflictCue] = []
     has_confusion: bool
     complexity: str
     valence: ValenceScore
     emotional_state: str
+    windows: int = 1
+    sentences: Optional[List[SentenceEmotion]] = None
     model: str
 
 class ReflectionMetadata(BaseModel):
@@ -79,8 +100,17 @@ class JournalResponseV2(BaseModel):
     emotion_metadata: Optional[dict] = None
     reflection: Optional[str] = None
     reflection_metadata: Optional[dict] = None
+    reflection_status: Optional[str] = None  # "pending" while a deferred reflection is generated
     created_at: datetime
     is_voice: bool
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ReflectionStatus(BaseModel):
+    entry_id: int
+    status: str  # pending, running, done, fallback (template reflection), failed, none
+    reflection: Optional[str] = None
+    reflection_metadata: Optional[dict] = None
+    attempts: int = 0
+    error: Optional[str] = None
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for cache keys (NFC, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_key(*parts: Any) -> str:
+    """SHA-256 over the given parts, used as a content-addressed cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache
+
+    A bounded in-process LRU sits in front of a SQLite table, so entries
+    survive restarts and are shared by every worker using the same file.
+    Values must be JSON-serializable.
+
+    With `ttl_seconds`, entries expire that long after they were written
+    (in both tiers). With `max_disk_entries`, the oldest rows of the
+    namespace are pruned from disk once it grows past that size.
+
+    The SQLite file is opened on first use, not on construction, so
+    importing the module singletons touches no file.
+    """
+
+    PRUNE_EVERY = 64  # Disk writes between expiry / size pruning passes
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        db_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        self.namespace = namespace
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds or None
+        self.max_disk_entries = max_disk_entries or None
+
+        # key -> (value, written_at)
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_opened = False  # Whether the disk tier was opened (or failed to)
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.writes = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """The persistent tier, opened on first use (call with the lock held)"""
+        if not self._db_opened:
+            self._db_opened = True
+            if self.db_path:
+                self._open_db()
+        return self._db
+
+    def _open_db(self):
+        """Open (and create) the persistent tier"""
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ {self.namespace} cache disk tier unavailable: {e}")
+            self._db = None
+
+    def reopen(self):
+        """
+        Open a fresh SQLite connection, e.g. in a forked worker
+
+        A connection must not be used on both sides of a fork, so the
+        inherited one is abandoned rather than closed.
+        """
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_opened = False
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up `key` in memory, then on disk (promoting disk hits)"""
+        with self._lock:
+            expired = False
+            if key in self._memory:
+                value, written_at = self._memory[key]
+                if not self._expired(written_at):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+                expired = True
+
+            entry = self._disk_get(key)
+            if entry is not None and self._expired(entry[1]):
+                entry = None
+                expired = True
+            if entry is None:
+                self.misses += 1
+                self.expirations += expired
+                return None
+
+            self.disk_hits += 1
+            self._memory_set(key, *entry)
+            return entry[0]
+
+    def set(self, key: str, value: Any):
+        """Store `key` in both tiers"""
+        with self._lock:
+            written_at = time.time()
+            self._memory_set(key, value, written_at)
+            self._disk_set(key, value, written_at)
+            self.writes += 1
+            if self.writes % self.PRUNE_EVERY == 0:
+                self._disk_prune()
+
+    def clear(self):
+        """Drop every entry in this namespace"""
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db:
+                try:
+                    db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to clear {self.namespace} cache: {e}")
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "persistent": self._db is not None if self._db_opened else bool(self.db_path),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "ttl_seconds": self.ttl_seconds,
+            "expirations": self.expirations,
+            "writes": self.writes
+        }
+
+    def _expired(self, written_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - written_at > self.ttl_seconds
+
+    def _memory_set(self, key: str, value: Any, written_at: float):
+        self._memory[key] = (value, written_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        db = self._connection()
+        if not db:
+            return None
+        try:
+            row = db.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"{self.namespace} cache read failed: {e}")
+            return None
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _disk_set(self, key: str, value: Any, written_at: float):
+        db = self._connection()
+        if not db:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), written_at)
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"{self.namespace} cache write failed: {e}")
+
+    def _disk_prune(self):
+        """Delete expired rows, then the oldest ones beyond `max_disk_entries`"""
+        db = self._connection()
+        if not db or not (self.ttl_seconds or self.max_disk_entries):
+            return
+        try:
+            if self.ttl_seconds:
+                db.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                    (self.namespace, time.time() - self.ttl_seconds)
+                )
+            if self.max_disk_entries:
+                db.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM cache_entries WHERE namespace = ? "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_disk_entries)
+                )
+            db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"{self.namespace} cache pruning failed: {e}")
+
+
+# Singleton instances
+emotion_cache = TieredCache(
+    "emotion",
+    max_entries=settings.emotion_cache_max_entries,
+    db_path=settings.cache_db_path or None,
+    ttl_seconds=settings.emotion_cache_ttl_seconds,
+    max_disk_entries=settings.emotion_cache_max_disk_entries
+)
+reflection_cache = TieredCache(
+    "reflection",
+    max_entries=settings.reflection_cache_max_entries,
+    db_path=settings.cache_db_path or None,
+    ttl_seconds=settings.reflection_cache_ttl_seconds,
+    max_disk_entries=settings.reflection_cache_max_disk_entries
+)
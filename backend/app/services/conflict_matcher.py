@@ -0,0 +1,99 @@
+import re
+from typing import Dict, Iterable, List
+
+# Linguistic cues for emotional conflict
+CONFLICT_PHRASES = [
+    'but', 'however', 'though', 'although', 'yet', 'still',
+    'should be', 'supposed to', 'expected to', 'want to be',
+    "don't know", "can't tell", 'mixed', 'confused', 'conflicted',
+    'torn', 'part of me', 'on one hand', 'on the other hand',
+    'at the same time', 'despite', 'even though', 'while'
+]
+
+
+class ConflictMatcher:
+    """
+    Finds conflict cue phrases ("but", "part of me", ...) in one pass
+
+    The phrases are compiled into a single regex shaped like a character
+    trie (shared prefixes are factored out), with word boundaries on both
+    ends: "but" does not match "button" and "while" does not match
+    "worthwhile". The longest phrase at a position wins, so "even though"
+    is reported instead of "though". Straight and curly apostrophes are
+    interchangeable and words may be separated by any whitespace.
+
+    Texts are lowercased once and scanned case-sensitively, which is much
+    faster than an IGNORECASE scan; texts whose length changes when
+    lowercased fall back to IGNORECASE so offsets stay exact.
+    """
+
+    def __init__(self, phrases: Iterable[str] = CONFLICT_PHRASES):
+        self.phrases = list(dict.fromkeys(self._canonical(p) for p in phrases))
+
+        trie: Dict[str, dict] = {}
+        for phrase in self.phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}  # End of phrase
+
+        source = rf"\b{self._trie_pattern(trie)}\b"
+        self.pattern = re.compile(source)
+        self._pattern_ignorecase = re.compile(source, re.IGNORECASE)
+
+    def find(self, text: str) -> List[dict]:
+        """
+        Every conflict cue in `text`
+
+        Returns:
+            List of {"cue", "start", "end"} dicts in text order; "cue" is
+            the configured phrase, offsets index into `text`
+        """
+        return [
+            {"cue": self._canonical(m.group()), "start": m.start(), "end": m.end()}
+            for m in self._finditer(text)
+        ]
+
+    def find_batch(self, texts: Iterable[str]) -> List[List[dict]]:
+        """`find()` for each text, in input order"""
+        return [self.find(text) for text in texts]
+
+    def contains(self, text: str) -> bool:
+        """Whether `text` has at least one conflict cue"""
+        return next(self._finditer(text), None) is not None
+
+    def _finditer(self, text: str):
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return self.pattern.finditer(lowered)
+        return self._pattern_ignorecase.finditer(text)
+
+    @staticmethod
+    def _canonical(phrase: str) -> str:
+        """Lowercase, single spaces, straight apostrophes"""
+        return " ".join(phrase.lower().replace("’", "'").split())
+
+    @classmethod
+    def _trie_pattern(cls, node: Dict[str, dict]) -> str:
+        """Regex for a trie node; the shortest phrase is optional so longer ones win"""
+        ends_here = "" in node
+        branches = [
+            cls._char_pattern(char) + cls._trie_pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if ends_here:
+            return f"(?:{body})?"
+        return body
+
+    @staticmethod
+    def _char_pattern(char: str) -> str:
+        if char == " ":
+            return r"\s+"
+        if char == "'":
+            return "['’]"
+        return re.escape(char)
@@ -1,53 +1,114 @@
-from transformers import pipeline
 import logging
+from typing import Dict, List
+
+import numpy as np
+
+from .emotion_analyzer_v2 import emotion_analyzer_v2
 
 logger = logging.getLogger(__name__)
 
+# GoEmotions label -> Ekman label, following the grouping published with the
+# GoEmotions dataset (data/ekman_mapping.json). The Ekman labels are the ones
+# the v1 API has always returned (j-hartmann/emotion-english-distilroberta-base).
+EKMAN_MAPPING: Dict[str, List[str]] = {
+    "anger": ["anger", "annoyance", "disapproval"],
+    "disgust": ["disgust"],
+    "fear": ["fear", "nervousness"],
+    "joy": [
+        "joy", "amusement", "approval", "excitement", "gratitude", "love",
+        "optimism", "relief", "pride", "admiration", "desire", "caring"
+    ],
+    "neutral": ["neutral"],
+    "sadness": ["sadness", "disappointment", "embarrassment", "grief", "remorse"],
+    "surprise": ["surprise", "realization", "confusion", "curiosity"]
+}
+
 class EmotionAnalyzer:
-    def __init__(self):
-        try:
-            self.classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                top_k=None
-            )
-            logger.info("✅ Emotion analyzer loaded successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to load emotion analyzer: {e}")
-            self.classifier = None
+    """
+    V1 (Ekman) emotion analysis derived from the GoEmotions model
+    
+    Each Ekman label scores the highest of its GoEmotions labels and the
+    seven scores are normalized to sum to 1, like the softmax output of
+    the model v1 used to load. Reusing the v2 forward pass (and its cache
+    and micro-batcher) means no second model is held in memory.
+    """
+    
+    EKMAN_LABELS = list(EKMAN_MAPPING)
+    
+    def __init__(self, analyzer=emotion_analyzer_v2):
+        self.analyzer = analyzer
+        self._groups = None
+        self._groups_for = None
     
     def analyze(self, text: str) -> dict:
         """Analyze emotion from text"""
-        if not self.classifier:
-            return {
-                "emotion": "neutral",
-                "confidence": 0.0,
-                "all_scores": {}
-            }
-        
         try:
-            results = self.classifier(text[:512])[0]  # Limit text length
-            
-            # Sort by score
-            sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)
-            
-            primary_emotion = sorted_results[0]['label']
-            primary_score = sorted_results[0]['score']
-            
-            all_scores = {r['label']: round(r['score'], 3) for r in sorted_results}
-            
-            return {
-                "emotion": primary_emotion,
-                "confidence": round(primary_score, 3),
-                "all_scores": all_scores
-            }
+            return self.from_v2(self.analyzer.analyze(text))
         except Exception as e:
             logger.error(f"Error analyzing emotion: {e}")
-            return {
-                "emotion": "neutral",
-                "confidence": 0.0,
-                "all_scores": {}
-            }
+            return self._fallback_response()
+    
+    def from_v2(self, result) -> dict:
+        """
+        Convert a v2 (GoEmotions) analysis result to the v1 response
+        
+        Args:
+            result: EmotionResult from the v2 analyzer
+            
+        Returns:
+            Dict with the Ekman emotion, its confidence and all seven scores
+        """
+        if not len(result.scores):
+            return self._fallback_response()
+        
+        scores = self.ekman_scores(result.labels, result.scores)
+        order = np.argsort(-scores, kind="stable")
+        all_scores = {self.EKMAN_LABELS[i]: round(float(scores[i]), 3) for i in order}
+        
+        return {
+            "emotion": self.EKMAN_LABELS[order[0]],
+            "confidence": all_scores[self.EKMAN_LABELS[order[0]]],
+            "all_scores": all_scores
+        }
+    
+    def ekman_scores(self, labels: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """
+        Collapse GoEmotions scores to normalized Ekman scores
+        
+        Args:
+            labels: GoEmotions labels, in score order
+            scores: (num_labels,) or (n, num_labels) GoEmotions scores
+            
+        Returns:
+            Scores in EKMAN_LABELS order, summing to 1 along the last axis
+        """
+        groups = self._label_groups(labels)
+        ekman = np.stack(
+            [scores[..., group].max(axis=-1) if len(group) else np.zeros(scores.shape[:-1])
+             for group in groups],
+            axis=-1
+        ).astype(np.float64)
+        
+        total = ekman.sum(axis=-1, keepdims=True)
+        return np.divide(ekman, total, out=np.zeros_like(ekman), where=total > 0)
+    
+    def _label_groups(self, labels: np.ndarray) -> List[np.ndarray]:
+        """Indices of each Ekman label's GoEmotions labels (cached per label set)"""
+        if self._groups_for is not labels:
+            index = {label: i for i, label in enumerate(labels.tolist())}
+            self._groups = [
+                np.array([index[l] for l in members if l in index], dtype=np.int64)
+                for members in EKMAN_MAPPING.values()
+            ]
+            self._groups_for = labels
+        return self._groups
+    
+    def _fallback_response(self) -> dict:
+        return {
+            "emotion": "neutral",
+            "confidence": 0.0,
+            "all_scores": {}
+        }
 
 # Singleton instance
-emotion_analyzer = EmotionAnalyzer()
\ No newline at end of file
+emotion_analyzer = EmotionAnalyzer()
@@ -1,9 +1,18 @@
-from transformers import pipeline
 import logging
+import re
+import time
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from ..config import get_settings
+from .cache import emotion_cache, content_key, normalize_text
+from .conflict_matcher import CONFLICT_PHRASES, ConflictMatcher
+from .emotion_cascade import EmotionCascade, LexicalEmotionClassifier
+from .emotion_result import EmotionResult
+from .lazy import LazyService
+from . import model_store
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class EmotionAnalyzerV2:
@@ -36,50 +45,252 @@ class EmotionAnalyzerV2:
         'confusion', 'curiosity', 'desire', 'realization', 'surprise'
     ]
     
-    # Conflict indicators
-    CONFLICT_PHRASES = [
-        'but', 'however', 'though', 'although', 'yet', 'still',
-        'should be', 'supposed to', 'expected to', 'want to be',
-        "don't know", "can't tell", 'mixed', 'confused', 'conflicted',
-        'torn', 'part of me', 'on one hand', 'on the other hand',
-        'at the same time', 'despite', 'even though', 'while'
-    ]
+    # Conflict indicators, compiled once; finds every cue (with its position) in a single pass
+    CONFLICT_PHRASES = CONFLICT_PHRASES
+    CONFLICT_MATCHER = ConflictMatcher(CONFLICT_PHRASES)
+    
+    # Batched inference
+    MAX_TOKENS = 512  # Model's max sequence length (per window)
+    BATCH_SIZE = 16  # Max texts per padded forward pass
+    
+    # Sentence segmentation: text up to terminal punctuation (plus closing
+    # quotes/brackets) or the end of the line
+    SENTENCE_PATTERN = re.compile(r'[^.!?\n]+(?:[.!?]+[\'")\]]*|$)', re.MULTILINE)
     
-    def __init__(self):
-        self.model_name = "SamLowe/roberta-base-go_emotions"
-        self.classifier = None
+    # Bump when the text -> scores computation changes, so cached scores are not reused
+    SCORING_VERSION = 2
+    
+    MODEL_NAME = "SamLowe/roberta-base-go_emotions"
+    FALLBACK_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+    
+    def __init__(self, model_name: Optional[str] = None, fallback: bool = True):
+        """
+        Args:
+            model_name: Hub model id or local model directory (default: MODEL_NAME)
+            fallback: Load FALLBACK_MODEL_NAME if the model cannot be loaded,
+                instead of raising
+        """
+        self.model_name = model_name or self.MODEL_NAME
+        self.fallback = fallback
+        self.tokenizer = None
+        self.model = None
+        self.backend = None
+        self.labels = None  # np.ndarray of label names in logit order
+        self.cache = emotion_cache if settings.emotion_cache_enabled else None
+        self.cascade = None  # Optional lexical first tier
+        self._store_revision = None  # Hub revision recorded in the model store
         self._load_model()
+        self._load_cascade()
     
     def _load_model(self):
         """Load GoEmotions model"""
         try:
             logger.info(f"Loading {self.model_name}...")
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model_name,
-                top_k=None,  # Return all emotion scores
-                device=-1  # CPU (use 0 for GPU)
-            )
+            self._load_weights(self.model_name)
             logger.info("✅ GoEmotions model loaded successfully (27 emotion labels)")
+            self._load_backend()
         except Exception as e:
             logger.error(f"❌ Failed to load GoEmotions model: {e}")
+            if not self.fallback:
+                raise
             logger.info("Falling back to basic model...")
             self._load_fallback_model()
     
+    def _load_cascade(self):
+        """Load the lexical pre-classifier when the cascade is enabled"""
+        if not settings.emotion_cascade_enabled or not self.model:
+            return
+        
+        try:
+            classifier = LexicalEmotionClassifier.load(settings.emotion_cascade_model_path)
+            self.cascade = EmotionCascade(
+                classifier,
+                self.labels.tolist(),
+                confidence=settings.emotion_cascade_confidence,
+                max_chars=settings.emotion_cascade_max_chars
+            )
+            logger.info(
+                f"✅ Emotion cascade enabled (lexical tier answers at "
+                f"confidence >= {settings.emotion_cascade_confidence})"
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Emotion cascade disabled, lexical model unavailable: {e}")
+    
     def _load_fallback_model(self):
         """Fallback to simpler model if GoEmotions fails"""
         try:
-            self.classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                top_k=None
-            )
+            from .inference_backends import TorchBackend
+            
+            self._load_weights(self.FALLBACK_MODEL_NAME)
+            self.backend = TorchBackend(self.model)
             logger.info("✅ Loaded fallback emotion model")
         except Exception as e:
             logger.error(f"❌ All models failed to load: {e}")
-            self.classifier = None
+            self.model = None
+    
+    def _load_weights(self, model_name: str):
+        """
+        Load tokenizer and classification model (CPU, eval mode)
+        
+        Models in the local store load without the network, with their
+        safetensors weights memory-mapped. The hub is only used for a
+        missing model when offline mode is turned off (OFFLINE_MODELS=False).
+        
+        Raises:
+            FileNotFoundError: The model is not in the store and offline mode is on
+        """
+        source = model_store.local_model_path(model_name)
+        if model_store.offline_mode():
+            model_store.enforce_offline()
+            if source is None:
+                raise model_store.missing_model_error(model_name)
+        elif source is None:
+            logger.warning(f"⚠️ {model_name} is not in the model store, loading from the Hugging Face hub")
+        
+        # Deferred: importing transformers (and torch) takes seconds
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        
+        if source is None:
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=True)
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                source, local_files_only=True, use_safetensors=True
+            ).eval()
+            mapped, total = model_store.share_weights(self.model, source)
+            self._store_revision = (model_store.read_manifest(source) or {}).get("revision")
+            logger.info(f"🗺️ {mapped}/{total} weight tensors memory-mapped from {source}")
+        
+        id2label = self.model.config.id2label
+        self.labels = np.array([id2label[i] for i in range(len(id2label))])
+        self._multi_label = (
+            self.model.config.problem_type == "multi_label_classification"
+            or self.model.config.num_labels == 1
+        )
+        
+        # Label-index masks for vectorized post-processing
+        self._positive_mask = np.isin(self.labels, self.POSITIVE_EMOTIONS)
+        self._negative_mask = np.isin(self.labels, self.NEGATIVE_EMOTIONS)
+        self._valence_masks = np.stack([
+            self._positive_mask,
+            self._negative_mask,
+            np.isin(self.labels, self.NEUTRAL_EMOTIONS)
+        ], axis=1).astype(np.float64)
+        self._confusion_mask = self.labels == 'confusion'
+        
+        self._special_prefix, self._special_suffix = self._special_affixes()
+    
+    def _special_affixes(self) -> Tuple[List[int], List[int]]:
+        """Special token ids the tokenizer puts before and after a single sequence"""
+        probe = "emotion"
+        content = self.tokenizer(probe, add_special_tokens=False)['input_ids']
+        full = self.tokenizer(probe)['input_ids']
+        
+        for start in range(len(full) - len(content) + 1):
+            if full[start:start + len(content)] == content:
+                return full[:start], full[start + len(content):]
+        return [], []
+    
+    def _load_backend(self):
+        """
+        Select the inference backend (PyTorch or ONNX Runtime) and replicate it
+        
+        ONNX replicas each get their own intra-op thread count. PyTorch's
+        is global to the process, so torch replicas share one count:
+        EMOTION_THREADS_PER_REPLICA, else the process's thread budget
+        divided by the number of replicas.
+        """
+        from .inference_backends import TorchBackend, OnnxBackend
+        from .replica_pool import ReplicaPool, torch_thread_budget
+        
+        self.backend = TorchBackend(self.model, compiled=settings.emotion_torch_compile)
+        
+        def factory(index: int, threads: int):
+            # Torch replicas share the (read-only) weights of self.model
+            return TorchBackend(self.model, compiled=settings.emotion_torch_compile)
+        
+        if settings.emotion_backend.lower() == "onnx":
+            onnx_backend = self._load_onnx_backend()
+            if onnx_backend:
+                self.backend = onnx_backend
+                
+                def factory(index: int, threads: int):
+                    return OnnxBackend(
+                        onnx_backend.model_path,
+                        intra_op_threads=threads,
+                        quantized=settings.onnx_quantize
+                    )
+        
+        if settings.emotion_replicas > 1:
+            try:
+                self.backend = ReplicaPool(
+                    factory,
+                    settings.emotion_replicas,
+                    threads_per_replica=settings.emotion_threads_per_replica,
+                    pin=settings.emotion_pin_replicas
+                )
+                if self.backend.name == "torch":
+                    import torch
+                    
+                    threads = settings.emotion_threads_per_replica or max(
+                        1, torch_thread_budget() // settings.emotion_replicas
+                    )
+                    torch.set_num_threads(threads)
+                    self.backend.threads_per_replica = threads
+            except Exception as e:
+                logger.warning(f"⚠️ Replica pool unavailable, using a single {self.backend.name} backend: {e}")
+    
+    def after_fork(self):
+        """
+        Make the analyzer usable in a worker forked from the loading process
+        
+        Plain PyTorch backends only hold the (shared, read-only) model and
+        keep working; replica pools and ONNX Runtime sessions own threads
+        that do not survive fork(), so they are rebuilt on top of the
+        inherited weights.
+        """
+        from .inference_backends import TorchBackend
+        
+        if self.model is not None and not isinstance(self.backend, TorchBackend):
+            self._load_backend()
+    
+    def _load_onnx_backend(self):
+        """Export, load and parity-check the ONNX model (None if unusable)"""
+        from .inference_backends import TorchBackend, OnnxBackend, export_onnx, check_parity
+        
+        try:
+            model_path = export_onnx(
+                self.model,
+                self.tokenizer,
+                settings.onnx_model_dir,
+                self._model_revision(),
+                quantize=settings.onnx_quantize
+            )
+            onnx_backend = OnnxBackend(
+                model_path,
+                intra_op_threads=settings.onnx_intra_op_threads,
+                quantized=settings.onnx_quantize
+            )
+            
+            # Only switch if the exported model agrees with PyTorch
+            max_diff = check_parity(
+                TorchBackend(self.model), onnx_backend, self.tokenizer, self._activation
+            )
+            if max_diff > settings.onnx_parity_tolerance:
+                logger.warning(
+                    f"⚠️ ONNX scores differ from PyTorch by {max_diff:.4f} "
+                    f"(tolerance {settings.onnx_parity_tolerance}), staying on PyTorch"
+                )
+                return None
+            
+            logger.info(f"✅ Using ONNX Runtime backend ({onnx_backend.name}, max diff {max_diff:.4f})")
+            return onnx_backend
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX backend unavailable, using PyTorch: {e}")
+            return None
     
-    def analyze(self, text: str, threshold: float = 0.10) -> dict:
+    def analyze(self, text: str, threshold: float = 0.10) -> EmotionResult:
         """
         Comprehensive emotion analysis
         
@@ -88,258 +299,609 @@ class EmotionAnalyzerV2:
             threshold: Minimum confidence to include emotion (0.0-1.0)
             
         Returns:
-            Dict with comprehensive emotion analysis
+            EmotionResult with comprehensive emotion analysis (read like a dict)
+        """
+        return self.analyze_batch([text], threshold)[0]
+    
+    def _build_results(
+        self,
+        texts: List[str],
+        scores: np.ndarray,
+        threshold: float,
+        windows: np.ndarray = None,
+        lexical: np.ndarray = None
+    ) -> List[EmotionResult]:
         """
-        if not self.classifier:
-            return self._fallback_response()
+        Build analysis results from a matrix of raw per-label scores
         
-        if not text or len(text.strip()) < 3:
-            return self._fallback_response()
+        Label-space post-processing runs on the whole matrix at once; each
+        text gets an EmotionResult over its row of the matrix.
         
-        try:
-            # Get predictions
-            results = self.classifier(text[:512])[0]
-            
-            # Sort by confidence
-            sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)
-            
-            # Extract data
-            all_scores = {r['label']: round(r['score'], 4) for r in sorted_results}
-            
-            # Get significant emotions (above threshold)
-            significant = [
-                {"label": r['label'], "confidence": round(r['score'], 4)}
-                for r in sorted_results 
-                if r['score'] >= threshold
-            ]
-            
-            # Primary emotion
-            primary = sorted_results[0]
-            
-            # Detect mixed emotions
-            is_mixed, mixed_type = self._detect_mixed_emotions(
-                text, significant, all_scores
-            )
-            
-            # Detect emotional conflict
-            has_conflict = self._detect_conflict_patterns(text, significant)
-            
-            # Calculate complexity
-            complexity = self._calculate_complexity(all_scores, significant)
-            
-            # Calculate valence (positive/negative)
-            valence = self._calculate_valence(all_scores)
+        Args:
+            texts: Original input texts
+            scores: (len(texts), num_labels) scores, in the model's label order
+            threshold: Minimum confidence to include emotion
+            windows: Number of token windows each row was aggregated from
+            lexical: Rows answered by the cascade's lexical tier
             
+        Returns:
+            List of EmotionResult, in the same order as `texts`
+        """
+        summary = self._summarize(scores, threshold)
+        n_significant = summary["n_significant"]
+        
+        # Detect emotional conflict
+        conflict_cues = self.CONFLICT_MATCHER.find_batch(texts)
+        has_conflict = self._detect_conflict_patterns(conflict_cues, n_significant)
+        
+        emotional_states = self._describe_emotional_states(
+            summary["is_mixed"], has_conflict, summary["has_confusion"], summary["overall"]
+        )
+        
+        # Bulk conversion of the per-row flags, then one compact result per text
+        n_significant = n_significant.tolist()
+        is_mixed = summary["is_mixed"].tolist()
+        mixed_type = summary["mixed_type"].tolist()
+        has_conflict = has_conflict.tolist()
+        has_confusion = summary["has_confusion"].tolist()
+        complexity = summary["complexity"].tolist()
+        valence = summary["valence"].tolist()
+        overall = summary["overall"].tolist()
+        emotional_states = emotional_states.tolist()
+        windows = [1] * len(texts) if windows is None else np.asarray(windows).tolist()
+        lexical = [False] * len(texts) if lexical is None else np.asarray(lexical).tolist()
+        
+        scores = np.atleast_2d(scores)
+        order = summary["order"]
+        
+        results = []
+        for i in range(len(texts)):
+            results.append(EmotionResult(
+                self.labels, scores[i], order[i], n_significant[i],
+                is_mixed=is_mixed[i],
+                mixed_type=mixed_type[i],
+                has_conflict=has_conflict[i],
+                conflict_cues=conflict_cues[i],
+                has_confusion=has_confusion[i],
+                complexity=complexity[i],
+                valence_scores=valence[i],
+                overall=overall[i],
+                emotional_state=emotional_states[i],
+                windows=windows[i],
+                model=self.cascade.name if lexical[i] else self.model_name
+            ))
+        
+        return results
+    
+    def _summarize(self, scores: np.ndarray, threshold: float) -> Dict[str, np.ndarray]:
+        """
+        Vectorized label-space post-processing for a (batch x labels) score matrix
+        
+        Scores are rounded to 4 decimals first, as reported in the results.
+        
+        Returns:
+            Dict of per-row arrays: order (labels by descending score), ranked
+            (rounded scores in that order), n_significant, is_mixed,
+            mixed_type, complexity, valence (positive/negative/neutral
+            columns), overall and has_confusion
+        """
+        scores = np.atleast_2d(scores)
+        rounded = np.round(scores.astype(np.float64), 4)
+        
+        # Label indices by descending confidence
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranked = np.take_along_axis(rounded, order, axis=1)
+        
+        # Significant emotions (above threshold) are a prefix of the ranking
+        n_significant = np.count_nonzero(scores >= threshold, axis=1)
+        
+        is_mixed, mixed_type = self._detect_mixed_emotions(order, ranked, n_significant)
+        valence, overall = self._calculate_valence(rounded)
+        
+        return {
+            "order": order,
+            "ranked": ranked,
+            "n_significant": n_significant,
+            "is_mixed": is_mixed,
+            "mixed_type": mixed_type,
+            "complexity": self._calculate_complexity(rounded, n_significant),
+            "valence": valence,
+            "overall": overall,
             # Detect confusion specifically
-            has_confusion = all_scores.get('confusion', 0) > 0.15
-            
-            return {
-                "emotion": primary['label'],
-                "confidence": round(primary['score'], 4),
-                "all_scores": all_scores,
-                "significant_emotions": significant[:5],  # Top 5
-                "is_mixed": is_mixed,
-                "mixed_type": mixed_type,
-                "has_conflict": has_conflict,
-                "has_confusion": has_confusion,
-                "complexity": complexity,
-                "valence": valence,
-                "emotional_state": self._describe_emotional_state(
-                    is_mixed, has_conflict, has_confusion, valence
-                ),
-                "model": self.model_name
-            }
-            
-        except Exception as e:
-            logger.error(f"Error analyzing emotion: {e}")
-            return self._fallback_response()
+            "has_confusion": rounded[:, self._confusion_mask].max(axis=1, initial=0.0) > 0.15
+        }
     
     def _detect_mixed_emotions(
-        self, text: str, significant: List[dict], all_scores: dict
-    ) -> Tuple[bool, str]:
+        self, order: np.ndarray, ranked: np.ndarray, n_significant: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Detect if emotions are mixed and what type
         
         Returns:
-            (is_mixed: bool, mixed_type: str)
+            (is_mixed, mixed_type) arrays; mixed_type is one of "single",
+            "conflicted" (positive + negative), "complex" or "layered"
         """
-        if len(significant) < 2:
-            return False, "single"
+        # Positive/negative labels among the top 3 significant emotions
+        top = order[:, :3]
+        in_significant = np.arange(top.shape[1]) < n_significant[:, None]
+        has_positive = (self._positive_mask[top] & in_significant).any(axis=1)
+        has_negative = (self._negative_mask[top] & in_significant).any(axis=1)
         
-        # Check if second emotion is strong enough
-        if significant[1]['confidence'] < 0.20:
-            return False, "single"
+        # Needs a second significant emotion that is strong enough
+        second = ranked[:, 1]
+        single = (n_significant < 2) | (second < 0.20)
         
-        labels = [e['label'] for e in significant[:3]]
+        mixed_type = np.select(
+            [
+                single,
+                has_positive & has_negative,  # Positive + Negative
+                n_significant >= 3,  # Multiple emotions
+                second > 0.25  # Two moderate emotions
+            ],
+            ["single", "conflicted", "complex", "layered"],
+            default="single"
+        )
+        return mixed_type != "single", mixed_type
+    
+    def _detect_conflict_patterns(
+        self, conflict_cues: List[List[dict]], n_significant: np.ndarray
+    ) -> np.ndarray:
+        """Conflict = a linguistic conflict cue plus at least two significant emotions"""
+        has_cue = np.array([bool(cues) for cues in conflict_cues], dtype=bool)
+        return has_cue & (n_significant >= 2)
+    
+    def _calculate_complexity(self, scores: np.ndarray, n_significant: np.ndarray) -> np.ndarray:
+        """
+        Calculate emotional complexity from the significant count and entropy
         
-        # Check for positive-negative mix
-        has_positive = any(label in self.POSITIVE_EMOTIONS for label in labels)
-        has_negative = any(label in self.NEGATIVE_EMOTIONS for label in labels)
+        Returns:
+            Array of 'simple', 'moderate', 'complex', 'very_complex'
+        """
+        # Entropy (emotional diversity) over the non-zero scores
+        nonzero = scores > 0
+        entropy = -np.where(nonzero, scores * np.log(scores + 1e-10), 0.0).sum(axis=1)
         
-        if has_positive and has_negative:
-            return True, "conflicted"  # Positive + Negative
+        return np.select(
+            [
+                ~nonzero.any(axis=1),
+                (n_significant == 1) & (entropy < 1.5),
+                (n_significant == 2) & (entropy < 2.5),
+                (n_significant >= 3) & (entropy < 3.0)
+            ],
+            ["simple", "simple", "moderate", "complex"],
+            default="very_complex"
+        )
+    
+    def _calculate_valence(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate emotional valence (positive/negative/neutral)
         
-        # Multiple emotions from same category
-        if len(significant) >= 3:
-            return True, "complex"  # Multiple emotions
+        Returns:
+            ((batch, 3) normalized positive/negative/neutral scores,
+            overall "positive"/"negative"/"neutral" per row)
+        """
+        sums = scores @ self._valence_masks
+        total = sums.sum(axis=1, keepdims=True)
         
-        # Two moderate emotions
-        if len(significant) >= 2 and significant[1]['confidence'] > 0.25:
-            return True, "layered"  # Layered emotions
+        # Normalize; rows with no category mass are fully neutral
+        normalized = np.divide(
+            sums, total,
+            out=np.tile([0.0, 0.0, 1.0], (len(sums), 1)),
+            where=total > 0
+        )
         
-        return False, "single"
+        overall = np.select(
+            [normalized[:, 0] > 0.5, normalized[:, 1] > 0.5],
+            ["positive", "negative"],
+            default="neutral"
+        )
+        return np.round(normalized, 3), overall
     
-    def _detect_conflict_patterns(self, text: str, significant: List[dict]) -> bool:
-        """Detect linguistic patterns indicating emotional conflict"""
-        text_lower = text.lower()
+    def _describe_emotional_states(
+        self, is_mixed: np.ndarray, has_conflict: np.ndarray,
+        has_confusion: np.ndarray, overall: np.ndarray
+    ) -> np.ndarray:
+        """Generate human-readable emotional state descriptions"""
+        positive = overall == "positive"
+        negative = overall == "negative"
         
-        # Check for conflict phrases
-        has_conflict_phrase = any(
-            phrase in text_lower for phrase in self.CONFLICT_PHRASES
+        return np.select(
+            [
+                has_confusion & is_mixed,
+                has_confusion,
+                has_conflict,
+                is_mixed & positive,
+                is_mixed & negative,
+                is_mixed,
+                positive,
+                negative
+            ],
+            [
+                "confused_mixed", "confused", "conflicted", "mixed_positive",
+                "mixed_negative", "mixed_neutral", "positive", "negative"
+            ],
+            default="neutral"
         )
+    
+    def _fallback_response(self) -> EmotionResult:
+        """Fallback response when analysis fails"""
+        return EmotionResult.fallback()
+    
+    def analyze_batch(
+        self,
+        texts: List[str],
+        threshold: float = 0.10,
+        batch_size: int = None,
+        sentences: bool = False
+    ) -> List[EmotionResult]:
+        """
+        Analyze multiple texts with padded, batched forward passes
         
-        # Check for emotional contrast in text
-        if len(significant) >= 2:
-            labels = [e['label'] for e in significant[:2]]
+        Texts are bucketed by token length so each forward pass only pads
+        to the longest sequence in its bucket.
+        
+        Args:
+            texts: Input texts to analyze
+            threshold: Minimum confidence to include emotion (0.0-1.0)
+            batch_size: Max texts per forward pass (defaults to BATCH_SIZE)
+            sentences: Also add a per-sentence "sentences" timeline to each result;
+                the sentences are scored in the same batch as the full texts
+            
+        Returns:
+            List of EmotionResult, in the same order as `texts`
+        """
+        results = [self._fallback_response() for _ in texts]
+        if sentences:
+            for result in results:
+                result.sentences = []
+        
+        if not self.model:
+            return results
+        
+        # Only texts long enough to analyze go through the model
+        valid = [
+            i for i, text in enumerate(texts)
+            if text and len(text.strip()) >= 3
+        ]
+        if not valid:
+            return results
+        
+        try:
+            # Full texts first, then every sentence of every text, in one pass
+            inputs = [texts[i] for i in valid]
+            spans = {}
+            if sentences:
+                for i in valid:
+                    spans[i] = self.split_sentences(texts[i])
+                    inputs.extend(texts[i][start:end] for start, end in spans[i])
+            
+            scores, windows, lexical = self._get_scores(inputs, batch_size or self.BATCH_SIZE)
+            
+            n_texts = len(valid)
+            built = self._build_results(
+                [texts[i] for i in valid], scores[:n_texts], threshold,
+                windows[:n_texts], lexical[:n_texts]
+            )
+            for i, result in zip(valid, built):
+                results[i] = result
             
-            has_positive = any(label in self.POSITIVE_EMOTIONS for label in labels)
-            has_negative = any(label in self.NEGATIVE_EMOTIONS for label in labels)
+            if sentences:
+                items = [(i, index, span) for i in valid for index, span in enumerate(spans[i])]
+                timeline = self._build_sentence_results(texts, items, scores[n_texts:], threshold)
+                
+                offset = 0
+                for i in valid:
+                    results[i].sentences = timeline[offset:offset + len(spans[i])]
+                    offset += len(spans[i])
+        except Exception as e:
+            logger.error(f"Error analyzing emotion batch: {e}")
+        
+        return results
+    
+    def split_sentences(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split `text` into sentences
+        
+        Returns:
+            (start, end) character offsets of each sentence, whitespace
+            trimmed; fragments too short to analyze (or with no words) are
+            skipped and at most `emotion_max_sentences` spans are returned
+        """
+        spans = []
+        for match in self.SENTENCE_PATTERN.finditer(text):
+            sentence = match.group()
+            start = match.start() + len(sentence) - len(sentence.lstrip())
+            end = match.end() - (len(sentence) - len(sentence.rstrip()))
             
-            if has_positive and has_negative and has_conflict_phrase:
-                return True
+            if end - start >= 3 and any(c.isalnum() for c in sentence):
+                spans.append((start, end))
+                if len(spans) >= settings.emotion_max_sentences:
+                    break
         
-        return has_conflict_phrase and len(significant) >= 2
+        return spans
     
-    def _calculate_complexity(self, all_scores: dict, significant: List[dict]) -> str:
+    def _build_sentence_results(
+        self,
+        texts: List[str],
+        items: List[Tuple[int, int, Tuple[int, int]]],
+        scores: np.ndarray,
+        threshold: float
+    ) -> List[dict]:
         """
-        Calculate emotional complexity
+        Timeline entries for sentences of `texts`
         
+        Args:
+            texts: Full entry texts
+            items: (text index, sentence index, (start, end) offsets) per sentence
+            scores: (len(items), num_labels) per-sentence scores
+            threshold: Minimum confidence to include emotion
+            
         Returns:
-            'simple', 'moderate', 'complex', 'very_complex'
+            Dicts with the sentence, its offsets, top emotions and valence
         """
-        # Count significant emotions
-        sig_count = len(significant)
+        if not items:
+            return []
         
-        # Calculate entropy (emotional diversity)
-        scores = [s for s in all_scores.values() if s > 0]
-        if not scores:
-            return "simple"
+        summary = self._summarize(scores, threshold)
+        labels = self.labels[summary["order"][:, :3]].tolist()
+        ranked = summary["ranked"][:, :3].tolist()
+        overall = summary["overall"].tolist()
         
-        entropy = -sum(s * np.log(s + 1e-10) for s in scores)
+        entries = []
+        for row, (i, index, (start, end)) in enumerate(items):
+            entries.append({
+                "index": index,
+                "text": texts[i][start:end],
+                "start": start,
+                "end": end,
+                "emotion": labels[row][0],
+                "confidence": ranked[row][0],
+                "significant_emotions": [
+                    {"label": label, "confidence": score}
+                    for label, score in zip(labels[row], ranked[row])
+                    if score >= threshold
+                ],
+                "valence": overall[row]
+            })
         
-        # Determine complexity
-        if sig_count == 1 and entropy < 1.5:
-            return "simple"
-        elif sig_count == 2 and entropy < 2.5:
-            return "moderate"
-        elif sig_count >= 3 and entropy < 3.0:
-            return "complex"
-        else:
-            return "very_complex"
+        return entries
     
-    def _calculate_valence(self, all_scores: dict) -> dict:
+    def _get_scores(
+        self, texts: List[str], batch_size: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Calculate emotional valence (positive/negative/neutral)
+        Per-label scores for `texts`, served from the cache where possible
+        
+        Only cache misses are scored. Raw transformer scores are cached, so
+        any threshold can be applied to a cached entry; lexical-tier answers
+        are cheap and not cached.
         
         Returns:
-            Dict with positive, negative, neutral scores
+            (scores, windows, lexical): (len(texts), num_labels) scores, the
+            number of token windows each text was scored over, and a mask of
+            texts answered by the cascade's lexical tier
         """
-        positive_score = sum(
-            all_scores.get(emotion, 0) 
-            for emotion in self.POSITIVE_EMOTIONS
-        )
+        if not self.cache:
+            return self._score_uncached(texts, batch_size)
         
-        negative_score = sum(
-            all_scores.get(emotion, 0)
-            for emotion in self.NEGATIVE_EMOTIONS
-        )
+        # Normalization only shapes the key; the model scores the text as written
+        keys = [self._cache_key(normalize_text(text)) for text in texts]
+        scores = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        windows = np.ones(len(texts), dtype=np.int64)
+        lexical = np.zeros(len(texts), dtype=bool)
+        
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached['scores']
+                windows[i] = cached['windows']
+        
+        if missing:
+            fresh, fresh_windows, fresh_lexical = self._score_uncached(
+                [texts[i] for i in missing], batch_size
+            )
+            for i, row, n_windows, is_lexical in zip(missing, fresh, fresh_windows, fresh_lexical):
+                scores[i] = row
+                windows[i] = n_windows
+                lexical[i] = is_lexical
+                if not is_lexical:
+                    self.cache.set(keys[i], {'scores': row.tolist(), 'windows': int(n_windows)})
+        
+        return scores, windows, lexical
+    
+    def _score_uncached(
+        self, texts: List[str], batch_size: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score `texts` through the cascade: lexical tier first (if enabled),
+        then the transformer for everything the lexical tier did not answer
+        
+        Returns:
+            Same (scores, windows, lexical) as `_get_scores`; lexical answers
+            use no token windows
+        """
+        if not self.cascade:
+            scores, windows = self._score_batch(texts, batch_size)
+            return scores, windows, np.zeros(len(texts), dtype=bool)
         
-        neutral_score = sum(
-            all_scores.get(emotion, 0)
-            for emotion in self.NEUTRAL_EMOTIONS
+        scores, lexical = self.cascade.route(texts)
+        windows = np.zeros(len(texts), dtype=np.int64)
+        
+        escalated = np.flatnonzero(~lexical)
+        if len(escalated):
+            start = time.perf_counter()
+            fresh, fresh_windows = self._score_batch([texts[i] for i in escalated], batch_size)
+            self.cascade.record_escalation(len(escalated), time.perf_counter() - start)
+            
+            scores[escalated] = fresh
+            windows[escalated] = fresh_windows
+        
+        return scores, windows, lexical
+    
+    def _cache_key(self, text: str) -> str:
+        """Content-addressed key: normalized text + model name + model version"""
+        return content_key(
+            self.model.config.name_or_path,
+            self._model_revision(),
+            self.backend.name,
+            self.SCORING_VERSION,
+            settings.emotion_window_overlap,
+            settings.emotion_max_windows,
+            settings.emotion_window_aggregation,
+            text
+        )
+    
+    def _model_revision(self) -> str:
+        """Hub commit hash of the loaded weights, if known"""
+        return (
+            getattr(self.model.config, '_commit_hash', None)
+            or self._store_revision
+            or 'unversioned'
         )
+    
+    def _score_batch(self, texts: List[str], batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score whole texts, splitting long ones into overlapping token windows
         
-        total = positive_score + negative_score + neutral_score
-        
-        if total == 0:
-            return {
-                "positive": 0.0,
-                "negative": 0.0,
-                "neutral": 1.0,
-                "overall": "neutral"
-            }
-        
-        # Normalize
-        pos_norm = positive_score / total
-        neg_norm = negative_score / total
-        neu_norm = neutral_score / total
-        
-        # Determine overall
-        if pos_norm > 0.5:
-            overall = "positive"
-        elif neg_norm > 0.5:
-            overall = "negative"
-        else:
-            overall = "neutral"
+        The windows of every text go through the model together, then each
+        text's window scores are aggregated back into one row.
         
-        return {
-            "positive": round(pos_norm, 3),
-            "negative": round(neg_norm, 3),
-            "neutral": round(neu_norm, 3),
-            "overall": overall
-        }
+        Returns:
+            (scores, windows): (len(texts), num_labels) scores in input order
+            and the number of windows per text
+        """
+        sequences, owners = self._split_windows(texts)
+        window_scores = self._forward_sequences(sequences, batch_size)
+        
+        windows = np.bincount(owners, minlength=len(texts))
+        if len(sequences) == len(texts):
+            return window_scores, windows
+        
+        lengths = np.array([len(ids) for ids in sequences], dtype=np.float32)
+        return self._aggregate_windows(window_scores, owners, lengths, len(texts)), windows
     
-    def _describe_emotional_state(
-        self, is_mixed: bool, has_conflict: bool, 
-        has_confusion: bool, valence: dict
-    ) -> str:
-        """Generate human-readable emotional state description"""
-        
-        if has_confusion and is_mixed:
-            return "confused_mixed"
-        elif has_confusion:
-            return "confused"
-        elif has_conflict:
-            return "conflicted"
-        elif is_mixed and valence['overall'] == 'positive':
-            return "mixed_positive"
-        elif is_mixed and valence['overall'] == 'negative':
-            return "mixed_negative"
-        elif is_mixed:
-            return "mixed_neutral"
-        elif valence['overall'] == 'positive':
-            return "positive"
-        elif valence['overall'] == 'negative':
-            return "negative"
-        else:
-            return "neutral"
+    def _split_windows(self, texts: List[str]) -> Tuple[List[List[int]], np.ndarray]:
+        """
+        Tokenize `texts` into model-sized windows
+        
+        Windows hold MAX_TOKENS tokens including special tokens and overlap
+        by `emotion_window_overlap` tokens; the last window is aligned to the
+        end of the text. At most `emotion_max_windows` windows per text.
+        
+        Returns:
+            (sequences, owners): token id lists with special tokens, and the
+            index of the text each window came from
+        """
+        prefix, suffix = self._special_prefix, self._special_suffix
+        content_size = self.MAX_TOKENS - len(prefix) - len(suffix)
+        step = max(1, content_size - settings.emotion_window_overlap)
+        max_tokens = content_size + step * (max(1, settings.emotion_max_windows) - 1)
+        
+        encoded = self.tokenizer(
+            texts, add_special_tokens=False, truncation=False, verbose=False
+        )['input_ids']
+        
+        sequences = []
+        owners = []
+        for i, ids in enumerate(encoded):
+            ids = ids[:max_tokens]
+            
+            if len(ids) <= content_size:
+                starts = [0]
+            else:
+                starts = list(range(0, len(ids) - content_size, step))
+                starts.append(len(ids) - content_size)
+            
+            for start in starts:
+                sequences.append(prefix + ids[start:start + content_size] + suffix)
+                owners.append(i)
+        
+        return sequences, np.array(owners, dtype=np.int64)
     
-    def _fallback_response(self):
-        """Fallback response when analysis fails"""
-        return {
-            "emotion": "neutral",
-            "confidence": 0.0,
-            "all_scores": {},
-            "significant_emotions": [],
-            "is_mixed": False,
-            "mixed_type": "single",
-            "has_conflict": False,
-            "has_confusion": False,
-            "complexity": "unknown",
-            "valence": {
-                "positive": 0.0,
-                "negative": 0.0,
-                "neutral": 1.0,
-                "overall": "neutral"
-            },
-            "emotional_state": "neutral",
-            "model": "fallback"
-        }
+    def _forward_sequences(self, sequences: List[List[int]], batch_size: int) -> np.ndarray:
+        """
+        Run the model directly over token id sequences, in length-bucketed batches
+        
+        Returns:
+            (len(sequences), num_labels) array of per-label scores, in input order
+        """
+        # Single sequence: no bucketing or padding needed
+        if len(sequences) == 1:
+            input_ids = np.array(sequences, dtype=np.int64)
+            logits = self.backend.forward(input_ids, np.ones_like(input_ids))
+            return self._activation(logits)
+        
+        pad_id = self.tokenizer.pad_token_id or 0
+        lengths = np.array([len(ids) for ids in sequences])
+        
+        # Sort by token length so each bucket has similar-length sequences
+        order = np.argsort(lengths, kind='stable')
+        scores = np.zeros((len(sequences), len(self.labels)), dtype=np.float32)
+        
+        for bucket in self._buckets(order, lengths, batch_size):
+            width = lengths[bucket].max()
+            
+            input_ids = np.full((len(bucket), width), pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(bucket), width), dtype=np.int64)
+            for row, i in enumerate(bucket):
+                input_ids[row, :lengths[i]] = sequences[i]
+                attention_mask[row, :lengths[i]] = 1
+            
+            logits = self.backend.forward(input_ids, attention_mask)
+            scores[bucket] = self._activation(logits)
+        
+        return scores
     
-    def analyze_batch(self, texts: List[str]) -> List[dict]:
-        """Analyze multiple texts at once (more efficient)"""
-        return [self.analyze(text) for text in texts]
+    @staticmethod
+    def _buckets(order: np.ndarray, lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+        """
+        Split length-sorted indices into forward-pass buckets
+        
+        A bucket closes at `batch_size` sequences, or early when the next
+        sequence would more than double its padded width (e.g. short
+        sentences batched with full-length document windows).
+        """
+        buckets = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            if (
+                end == len(order)
+                or end - start >= batch_size
+                or lengths[order[end]] > 2 * lengths[order[start]]
+            ):
+                buckets.append(order[start:end])
+                start = end
+        return buckets
+    
+    def _aggregate_windows(
+        self, window_scores: np.ndarray, owners: np.ndarray, lengths: np.ndarray, n_texts: int
+    ) -> np.ndarray:
+        """Combine window scores per text: max, mean or token-length-weighted mean"""
+        method = settings.emotion_window_aggregation.lower()
+        scores = np.zeros((n_texts, window_scores.shape[1]), dtype=np.float32)
+        
+        if method == "max":
+            np.maximum.at(scores, owners, window_scores)
+        elif method == "mean":
+            np.add.at(scores, owners, window_scores)
+            scores /= np.bincount(owners, minlength=n_texts)[:, None]
+        else:  # weighted
+            np.add.at(scores, owners, window_scores * lengths[:, None])
+            scores /= np.bincount(owners, weights=lengths, minlength=n_texts)[:, None]
+        
+        return scores
+    
+    def _activation(self, logits: np.ndarray) -> np.ndarray:
+        """Vectorized sigmoid (multi-label) or softmax over the label axis"""
+        if self._multi_label:
+            return 1.0 / (1.0 + np.exp(-logits))
+        
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
 
 
-# Singleton instance
-emotion_analyzer_v2 = EmotionAnalyzerV2()
\ No newline at end of file
+# Singleton instance (the model loads on first use or at startup)
+emotion_analyzer_v2 = LazyService("GoEmotions analyzer", EmotionAnalyzerV2)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Confidence cascade for emotion analysis
+
+A lexical TF-IDF + logistic regression model scores every text first and
+answers on its own when it is confident; everything else escalates to
+the transformer. Train the lexical model with
+`python -m scripts.train_lexical_classifier`.
+"""
+
+import logging
+import threading
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LexicalEmotionClassifier:
+    """
+    TF-IDF (word 1-2 grams) + one-vs-rest logistic regression over GoEmotions labels
+
+    The per-label regressions are folded into one (features x labels)
+    weight matrix, so scoring is a sparse matmul and a sigmoid instead of
+    a Python loop over 28 estimators.
+    """
+
+    name = "goemotions-lexical"
+    FORMAT_VERSION = 1
+
+    def __init__(self, pipeline, labels: Sequence[str]):
+        self.pipeline = pipeline
+        self.labels = list(labels)
+        self._vectorizer = pipeline.steps[0][1]
+        self._weights, self._bias = self._fold_estimators(pipeline.steps[-1][1])
+
+    @classmethod
+    def train(
+        cls,
+        texts: List[str],
+        label_ids: List[List[int]],
+        labels: Sequence[str],
+        min_df: int = 2,
+        C: float = 4.0
+    ) -> "LexicalEmotionClassifier":
+        """
+        Fit on GoEmotions-style data
+
+        Args:
+            texts: Training texts
+            label_ids: Indices into `labels` for each text (multi-label)
+            labels: Label names, in column order
+            min_df: Minimum document frequency for a TF-IDF feature
+            C: Inverse regularization strength of each logistic regression
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.multiclass import OneVsRestClassifier
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import MultiLabelBinarizer
+
+        targets = MultiLabelBinarizer(classes=list(range(len(labels)))).fit_transform(label_ids)
+        pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=min_df, sublinear_tf=True, lowercase=True),
+            OneVsRestClassifier(LogisticRegression(C=C, max_iter=1000, solver="liblinear"))
+        )
+        pipeline.fit(texts, targets)
+        return cls(pipeline, labels)
+
+    def predict_scores(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), len(labels)) independent per-label probabilities"""
+        logits = self._vectorizer.transform(texts) @ self._weights + self._bias
+        return (1.0 / (1.0 + np.exp(-logits))).astype(np.float32, copy=False)
+
+    def _fold_estimators(self, one_vs_rest) -> Tuple[np.ndarray, np.ndarray]:
+        """(weights, bias) equivalent to the one-vs-rest positive-class probabilities"""
+        n_features = len(self._vectorizer.vocabulary_)
+        weights = np.zeros((n_features, len(one_vs_rest.estimators_)), dtype=np.float32)
+        bias = np.zeros(len(one_vs_rest.estimators_), dtype=np.float32)
+
+        for j, estimator in enumerate(one_vs_rest.estimators_):
+            if hasattr(estimator, "coef_"):
+                weights[:, j] = estimator.coef_.ravel()
+                bias[j] = estimator.intercept_[0]
+            else:
+                # Label constant in the training data: fixed probability
+                p = float(estimator.predict_proba(np.zeros((1, n_features)))[0, 1])
+                p = min(max(p, 1e-6), 1 - 1e-6)
+                bias[j] = np.log(p / (1 - p))
+
+        return weights, bias
+
+    def save(self, path: str):
+        import joblib
+
+        joblib.dump(
+            {"format": self.FORMAT_VERSION, "labels": self.labels, "pipeline": self.pipeline},
+            path
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalEmotionClassifier":
+        import joblib
+
+        data = joblib.load(path)
+        if data.get("format") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical model format: {data.get('format')}")
+        return cls(data["pipeline"], data["labels"])
+
+
+class EmotionCascade:
+    """
+    Routes texts between the lexical tier and the transformer
+
+    A text is answered by the lexical tier when it is at most `max_chars`
+    long and the lexical model's top label probability is at least
+    `confidence`. Counts and time per tier are kept for the metrics
+    endpoint.
+    """
+
+    def __init__(
+        self,
+        classifier: LexicalEmotionClassifier,
+        labels: Sequence[str],
+        confidence: float = 0.9,
+        max_chars: int = 280
+    ):
+        """
+        Args:
+            classifier: Lexical model
+            labels: Transformer labels; lexical scores are returned in this order
+            confidence: Minimum top-label probability to answer lexically
+            max_chars: Longer texts always escalate
+        """
+        self.classifier = classifier
+        self.name = classifier.name
+        self.confidence = confidence
+        self.max_chars = max_chars
+
+        # Transformer label index -> lexical column (-1 when the lexical model lacks it)
+        columns = {label: i for i, label in enumerate(classifier.labels)}
+        self._columns = np.array([columns.get(label, -1) for label in labels])
+        missing = [label for label, c in zip(labels, self._columns) if c < 0]
+        if missing:
+            logger.warning(f"Lexical model has no scores for: {', '.join(missing)}")
+
+        self._lock = threading.Lock()
+        self.lexical_texts = 0
+        self.lexical_answered = 0
+        self.lexical_seconds = 0.0
+        self.escalated = 0
+        self.transformer_seconds = 0.0
+
+    def route(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score `texts` lexically
+
+        Returns:
+            (scores, answered): (len(texts), num_labels) lexical scores in
+            transformer label order, and a mask of the texts the lexical
+            tier answers (the rest must escalate)
+        """
+        scores = np.zeros((len(texts), len(self._columns)), dtype=np.float32)
+        answered = np.zeros(len(texts), dtype=bool)
+
+        eligible = [i for i, text in enumerate(texts) if len(text) <= self.max_chars]
+        if eligible:
+            start = time.perf_counter()
+            probabilities = self.classifier.predict_scores([texts[i] for i in eligible])
+            elapsed = time.perf_counter() - start
+
+            present = self._columns >= 0
+            scores[np.ix_(eligible, np.flatnonzero(present))] = probabilities[:, self._columns[present]]
+            answered[eligible] = scores[eligible].max(axis=1) >= self.confidence
+
+            with self._lock:
+                self.lexical_texts += len(eligible)
+                self.lexical_seconds += elapsed
+
+        with self._lock:
+            self.lexical_answered += int(answered.sum())
+        return scores, answered
+
+    def record_escalation(self, count: int, seconds: float):
+        """Account for `count` texts scored by the transformer in `seconds`"""
+        with self._lock:
+            self.escalated += count
+            self.transformer_seconds += seconds
+
+    def stats(self) -> dict:
+        """Escalation rate and per-tier latency"""
+        total = self.lexical_answered + self.escalated
+        return {
+            "confidence": self.confidence,
+            "max_chars": self.max_chars,
+            "texts": total,
+            "lexical_answered": self.lexical_answered,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / total, 4) if total else 0.0,
+            "lexical_ms_per_text": round(
+                self.lexical_seconds / self.lexical_texts * 1000, 3
+            ) if self.lexical_texts else 0.0,
+            "transformer_ms_per_text": round(
+                self.transformer_seconds / self.escalated * 1000, 3
+            ) if self.escalated else 0.0
+        }
@@ -0,0 +1,175 @@
+import json
+from collections.abc import Mapping
+from typing import List, Optional
+
+import numpy as np
+
+from ..schemas import EmotionAnalysisV2
+
+
+class EmotionResult(Mapping):
+    """
+    Compact result of one GoEmotions analysis
+
+    Holds the per-label scores as a single float array plus the flags
+    computed for the whole batch; `all_scores`, `significant_emotions` and
+    `valence` are derived from the array on first access. Read-only
+    Mapping access (`result['emotion']`, `.get()`) matches the dicts the
+    analyzer used to return, and `to_response()` / `to_storage()` serialize
+    straight to the API and journal formats.
+    """
+
+    __slots__ = (
+        "labels", "scores", "order", "n_significant",
+        "is_mixed", "mixed_type", "has_conflict", "conflict_cues", "has_confusion",
+        "complexity", "valence_scores", "overall", "emotional_state",
+        "windows", "model", "sentences", "_ranked", "_all_scores"
+    )
+
+    # Keys in the order the analysis dict has always had them
+    KEYS = (
+        "emotion", "confidence", "all_scores", "significant_emotions",
+        "is_mixed", "mixed_type", "has_conflict", "conflict_cues", "has_confusion",
+        "complexity", "valence", "emotional_state", "windows", "model"
+    )
+
+    # Keys persisted in JournalEntry.emotion_scores
+    STORAGE_KEYS = KEYS[2:]
+
+    MAX_SIGNIFICANT = 5  # Significant emotions reported
+
+    def __init__(
+        self,
+        labels: np.ndarray,
+        scores: np.ndarray,
+        order: np.ndarray,
+        n_significant: int,
+        is_mixed: bool = False,
+        mixed_type: str = "single",
+        has_conflict: bool = False,
+        conflict_cues: Optional[List[dict]] = None,
+        has_confusion: bool = False,
+        complexity: str = "unknown",
+        valence_scores: tuple = (0.0, 0.0, 1.0),
+        overall: str = "neutral",
+        emotional_state: str = "neutral",
+        windows: int = 1,
+        model: str = "fallback",
+        sentences: Optional[List[dict]] = None
+    ):
+        """
+        Args:
+            labels: Model labels, in score order
+            scores: Raw per-label scores
+            order: Label indices by descending score
+            n_significant: Number of labels at or above the threshold
+            valence_scores: Normalized (positive, negative, neutral)
+            overall: Overall valence
+            sentences: Per-sentence timeline, when requested
+        """
+        self.labels = labels
+        self.scores = scores
+        self.order = order
+        self.n_significant = n_significant
+        self.is_mixed = is_mixed
+        self.mixed_type = mixed_type
+        self.has_conflict = has_conflict
+        self.conflict_cues = conflict_cues if conflict_cues is not None else []
+        self.has_confusion = has_confusion
+        self.complexity = complexity
+        self.valence_scores = valence_scores
+        self.overall = overall
+        self.emotional_state = emotional_state
+        self.windows = windows
+        self.model = model
+        self.sentences = sentences
+        self._ranked: Optional[List[float]] = None
+        self._all_scores: Optional[dict] = None
+
+    @classmethod
+    def fallback(cls) -> "EmotionResult":
+        """Result used when analysis is not possible"""
+        empty = np.zeros(0, dtype=np.float32)
+        return cls(empty.astype(str), empty, empty.astype(np.int64), 0, windows=0)
+
+    # Derived fields
+
+    @property
+    def ranked(self) -> List[float]:
+        """Scores rounded to 4 decimals, by descending confidence"""
+        if self._ranked is None:
+            self._ranked = np.round(
+                self.scores[self.order].astype(np.float64), 4
+            ).tolist()
+        return self._ranked
+
+    @property
+    def emotion(self) -> str:
+        return str(self.labels[self.order[0]]) if len(self.order) else "neutral"
+
+    @property
+    def confidence(self) -> float:
+        return self.ranked[0] if len(self.order) else 0.0
+
+    @property
+    def all_scores(self) -> dict:
+        if self._all_scores is None:
+            self._all_scores = dict(zip(self.labels[self.order].tolist(), self.ranked))
+        return self._all_scores
+
+    @property
+    def significant_emotions(self) -> List[dict]:
+        top = min(self.n_significant, self.MAX_SIGNIFICANT)
+        return [
+            {"label": label, "confidence": score}
+            for label, score in zip(self.labels[self.order[:top]].tolist(), self.ranked[:top])
+        ]
+
+    @property
+    def valence(self) -> dict:
+        positive, negative, neutral = self.valence_scores
+        return {
+            "positive": positive,
+            "negative": negative,
+            "neutral": neutral,
+            "overall": self.overall
+        }
+
+    # Mapping interface
+
+    def __getitem__(self, key: str):
+        if key in self.KEYS or (key == "sentences" and self.sentences is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.KEYS
+        if self.sentences is not None:
+            yield "sentences"
+
+    def __len__(self) -> int:
+        return len(self.KEYS) + (self.sentences is not None)
+
+    def __repr__(self) -> str:
+        return f"EmotionResult(emotion={self.emotion!r}, confidence={self.confidence}, model={self.model!r})"
+
+    # Serialization
+
+    def to_dict(self) -> dict:
+        """Plain dict with the same keys and values as the Mapping view"""
+        return {key: self[key] for key in self}
+
+    def to_response(self) -> EmotionAnalysisV2:
+        """API response model for /analysis/emotion-v2"""
+        return EmotionAnalysisV2(**self.to_dict())
+
+    def to_storage_dict(self) -> dict:
+        """Metadata stored in JournalEntry.emotion_scores (and returned by /journal)"""
+        data = {key: getattr(self, key) for key in self.STORAGE_KEYS}
+        if self.sentences is not None:
+            data["sentences"] = self.sentences
+        return data
+
+    def to_storage(self) -> str:
+        """JSON for JournalEntry.emotion_scores"""
+        return json.dumps(self.to_storage_dict())
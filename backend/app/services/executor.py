@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class BoundedExecutor:
+    """
+    Sized thread pool for blocking calls made from async routes
+
+    At most `max_workers` calls run at once; further callers wait on an
+    asyncio semaphore instead of piling work into the pool's queue, so the
+    event loop (and endpoints like /health) stays responsive under load.
+    Model inference and LLM SDK calls release the GIL while they wait,
+    so threads overlap them for real.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name
+            )
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` in the pool and await its result
+
+        Args:
+            func: Blocking callable
+            *args, **kwargs: Passed to `func`
+
+        Returns:
+            Whatever `func` returns (exceptions propagate to the caller)
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait = time.perf_counter() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        self.active += 1
+        try:
+            result = await loop.run_in_executor(
+                self.pool, functools.partial(func, *args, **kwargs)
+            )
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            slots.release()
+
+    def stats(self) -> dict:
+        """Concurrency and wait metrics"""
+        finished = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 3) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3)
+        }
+
+    def shutdown(self):
+        """Stop the worker threads (waits for running calls)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Concurrency semaphore for the current event loop"""
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+
+# Singleton instances
+# Enough inference threads to keep every model replica busy
+inference_executor = BoundedExecutor(
+    "inference", max(settings.inference_workers, settings.emotion_replicas)
+)
+llm_executor = BoundedExecutor("llm", settings.llm_workers)
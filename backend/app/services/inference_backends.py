@@ -0,0 +1,171 @@
+"""
+Inference backends for the GoEmotions classifier
+
+Each backend takes padded `input_ids` / `attention_mask` arrays and returns
+raw logits as a NumPy array, so the analyzer's tokenization and
+post-processing are the same whichever runtime executes the model.
+"""
+
+import inspect
+import logging
+import os
+import re
+from typing import List
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Sentences used to check an exported model against the PyTorch reference
+PARITY_TEXTS = [
+    "Today was absolutely amazing! Everything went perfectly!",
+    "I feel terrible. Nothing is going right.",
+    "I should be happy about this opportunity, but something inside me feels uneasy.",
+    "I'm so confused about what to do next in my life.",
+    "I love them but I'm also frustrated with their behavior.",
+    "Thank you so much for helping me, I really appreciate it.",
+    "I'm nervous about the interview tomorrow.",
+    "Wow, I did not expect that at all!"
+]
+
+
+class TorchBackend:
+    """
+    Runs the Hugging Face model with PyTorch on CPU
+
+    With `compiled`, the model goes through `torch.compile` (dynamic
+    shapes); graphs are captured lazily on the first calls, which is what
+    the startup warmup is for.
+    """
+
+    def __init__(self, model, compiled: bool = False):
+        self.model = model.eval()
+        self.name = "torch"
+        self.compiled = compiled
+        self._module = torch.compile(self.model, dynamic=True) if compiled else self.model
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            logits = self._module(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask)
+            ).logits
+        return logits.numpy()
+
+
+class OnnxBackend:
+    """Runs an exported (optionally INT8-quantized) model with ONNX Runtime"""
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0, quantized: bool = False):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.name = "onnx-int8" if quantized else "onnx"
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(
+            ["logits"],
+            {
+                "input_ids": input_ids.astype(np.int64, copy=False),
+                "attention_mask": attention_mask.astype(np.int64, copy=False)
+            }
+        )[0]
+
+
+def onnx_model_path(output_dir: str, model_name: str, revision: str, quantized: bool) -> str:
+    """Where the exported model for `model_name`@`revision` lives"""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+    suffix = "-int8" if quantized else ""
+    return os.path.join(output_dir, f"{slug}-{revision[:12]}{suffix}.onnx")
+
+
+def export_onnx(model, tokenizer, output_dir: str, revision: str, quantize: bool = True) -> str:
+    """
+    Export `model` to ONNX and optionally apply dynamic INT8 quantization
+
+    Existing exports for the same model revision are reused.
+
+    Returns:
+        Path of the model ONNX Runtime should load
+    """
+    model_name = model.config.name_or_path
+    fp32_path = onnx_model_path(output_dir, model_name, revision, quantized=False)
+    int8_path = onnx_model_path(output_dir, model_name, revision, quantized=True)
+    target = int8_path if quantize else fp32_path
+
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    if not os.path.exists(fp32_path):
+        logger.info(f"Exporting {model_name} to ONNX...")
+        dummy = tokenizer(["Exporting the emotion model"], return_tensors="pt")
+
+        # Newer torch defaults to the dynamo exporter; the TorchScript one
+        # needs no extra dependencies and handles dynamic axes directly
+        export_kwargs = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            export_kwargs["dynamo"] = False
+
+        with torch.inference_mode():
+            torch.onnx.export(
+                model.eval(),
+                (dummy["input_ids"], dummy["attention_mask"]),
+                fp32_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"}
+                },
+                opset_version=14,
+                **export_kwargs
+            )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("Applying dynamic INT8 quantization...")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    return target
+
+
+def check_parity(
+    reference, candidate, tokenizer, activation, texts: List[str] = None
+) -> float:
+    """
+    Compare two backends on the same inputs
+
+    Args:
+        reference: Backend treated as ground truth (usually TorchBackend)
+        candidate: Backend being validated
+        tokenizer: Tokenizer shared by both backends
+        activation: Logits -> scores function applied to both outputs
+        texts: Inputs to compare on (defaults to PARITY_TEXTS)
+
+    Returns:
+        Max absolute difference between per-label scores
+    """
+    features = tokenizer(
+        texts or PARITY_TEXTS, padding=True, truncation=True, return_tensors="np"
+    )
+    args = (features["input_ids"], features["attention_mask"])
+
+    expected = activation(reference.forward(*args))
+    actual = activation(candidate.forward(*args))
+
+    return float(np.max(np.abs(expected - actual)))
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    Module-level service singleton that is created on first use
+
+    Attribute access (and assignment) is forwarded to the instance, so
+    call sites keep using `service.method()`. The first access, or an
+    explicit `load()`, runs the factory once under a lock and logs how long
+    it took. Heavy imports (torch, transformers, provider SDKs) belong in
+    the factory's code path so importing the module stays cheap.
+
+    Every LazyService is registered so the startup hook can load them all
+    in the background with `load_all_in_background()`.
+    """
+
+    _registry: List["LazyService"] = []
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Args:
+            name: Component name used in log messages
+            factory: Zero-argument callable that builds the instance
+        """
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+        object.__setattr__(self, "load_seconds", None)
+        LazyService._registry.append(self)
+
+    @property
+    def name(self) -> str:
+        return self._lazy_name
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_instance is not None
+
+    def load(self) -> Any:
+        """The instance, created (and timed) on the first call"""
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+
+        with self._lazy_lock:
+            if self._lazy_instance is None:
+                logger.info(f"⏳ Loading {self._lazy_name}...")
+                start = time.perf_counter()
+                instance = self._lazy_factory()
+                elapsed = time.perf_counter() - start
+
+                object.__setattr__(self, "load_seconds", elapsed)
+                object.__setattr__(self, "_lazy_instance", instance)
+                logger.info(f"✅ {self._lazy_name} loaded in {elapsed:.2f}s")
+        return self._lazy_instance
+
+    def replace(self, instance: Any) -> Any:
+        """
+        Atomically make `instance` the service
+
+        Callers that already resolved the previous instance (or one of its
+        bound methods) keep using it until they return.
+
+        Returns:
+            The previous instance (None if it was never loaded)
+        """
+        with self._lazy_lock:
+            previous = self._lazy_instance
+            object.__setattr__(self, "_lazy_instance", instance)
+        return previous
+
+    def __getattr__(self, attr: str):
+        # Only called for names not defined on the proxy itself
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self.load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyService {self._lazy_name} ({state})>"
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Load state and load time (seconds) of every registered service"""
+        return {
+            service._lazy_name: {
+                "loaded": service.is_loaded,
+                "load_seconds": round(service.load_seconds, 3) if service.load_seconds is not None else None
+            }
+            for service in cls._registry
+        }
+
+
+def load_all(services: Optional[List[LazyService]] = None) -> float:
+    """
+    Load services one after another in the calling thread
+
+    A service that fails to load is logged and skipped; it is retried on
+    its next use.
+
+    Args:
+        services: Services to load, in order (default: every registered one)
+
+    Returns:
+        Total seconds taken
+    """
+    services = list(LazyService._registry if services is None else services)
+    start = time.perf_counter()
+    for service in services:
+        try:
+            service.load()
+        except Exception as e:
+            logger.error(f"❌ Failed to load {service.name}: {e}")
+    return time.perf_counter() - start
+
+
+def load_all_in_background(
+    services: Optional[List[LazyService]] = None,
+    after: Optional[Callable[[], None]] = None
+) -> threading.Thread:
+    """
+    `load_all()` in a daemon thread
+
+    Args:
+        services: Services to load, in order (default: every registered one)
+        after: Called in the same thread once everything is loaded (e.g. warmup)
+
+    Returns:
+        The started thread
+    """
+    def run():
+        elapsed = load_all(services)
+        logger.info(f"✅ Background loading finished in {elapsed:.2f}s")
+        if after:
+            after()
+
+    thread = threading.Thread(target=run, name="service-loader", daemon=True)
+    thread.start()
+    return thread
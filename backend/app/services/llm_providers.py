@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Optional, Tuple
+
+from ..config import get_settings
+from .cache import TieredCache, content_key
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ProviderLoop:
+    """
+    Event loop thread that owns every async LLM client
+
+    Async SDK clients (httpx connection pools, grpc.aio channels) are bound
+    to the event loop they were first used on. Running all provider calls
+    on one long-lived loop lets a single keep-alive pool per provider serve
+    the request loop, the sync `generate()` wrappers and background jobs
+    alike. Awaiting a call from another loop costs one cross-thread hop,
+    which is negligible next to an LLM round trip; the caller's loop stays
+    free while the call is in flight.
+
+    The thread is started on first use and restarted in a forked worker.
+    """
+
+    def __init__(self, name: str = "llm-io"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+
+        # Metrics
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._start()
+        return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule `coro` on the provider loop"""
+        return asyncio.run_coroutine_threadsafe(self._track(coro), self.loop)
+
+    async def run(self, coro: Coroutine) -> Any:
+        """Await `coro` on the provider loop from any other event loop"""
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                return await self._track(coro)
+        except RuntimeError:
+            pass
+        return await asyncio.wrap_future(self.submit(coro))
+
+    async def stream(self, items: AsyncIterator) -> AsyncIterator:
+        """
+        Iterate an async generator on the provider loop from any other event loop
+
+        Items are handed over as they arrive. Closing the returned iterator
+        early (e.g. the client disconnected) cancels the provider-side one.
+        """
+        caller = asyncio.get_running_loop()
+        if caller is self._loop:
+            async for item in items:
+                yield item
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def pump():
+            try:
+                async for item in items:
+                    caller.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                caller.call_soon_threadsafe(queue.put_nowait, (end, e))
+                raise
+            caller.call_soon_threadsafe(queue.put_nowait, (end, None))
+
+        pumping = self.submit(pump())
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            pumping.cancel()
+
+    def run_sync(self, coro: Coroutine) -> Any:
+        """Block the calling thread (never the provider loop's) until `coro` finishes"""
+        return self.submit(coro).result()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._loop is not None and self._pid == os.getpid(),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+        self._loop = loop
+        self._pid = os.getpid()
+
+    async def _track(self, coro: Coroutine) -> Any:
+        self.in_flight += 1
+        try:
+            result = await coro
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+class LLMProvider(ABC):
+    """
+    Async text completion against one hosted model
+
+    Subclasses implement `_complete()` and, if the API can stream,
+    `_stream()`; `complete()` and `stream()` run them on the shared
+    provider loop, so they can be used from any event loop.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> str:
+        """
+        Generate a completion for `prompt`
+
+        Args:
+            prompt: User prompt
+            system: System message (OpenAI only)
+            temperature: Sampling temperature (OpenAI only)
+            max_tokens: Max completion tokens (OpenAI only)
+
+        Returns:
+            Generated text
+        """
+        start = time.perf_counter()
+        text = await provider_loop.run(self._complete(prompt, system, temperature, max_tokens))
+        logger.debug(f"{self.name} {self.model} answered in {time.perf_counter() - start:.2f}s")
+        return text
+
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> AsyncIterator[str]:
+        """
+        Generate a completion for `prompt`, yielding text chunks as they arrive
+
+        Args: as for `complete()`
+        """
+        async for chunk in provider_loop.stream(self._stream(prompt, system, temperature, max_tokens)):
+            yield chunk
+
+    async def complete_with_source(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> Tuple[str, "LLMProvider"]:
+        """`complete()`, plus the provider that answered (a router picks one of several)"""
+        return await self.complete(prompt, system, temperature, max_tokens), self
+
+    async def stream_with_source(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> AsyncIterator[Tuple[str, "LLMProvider"]]:
+        """`stream()`, yielding each chunk with the provider that produced it"""
+        async for chunk in self.stream(prompt, system, temperature, max_tokens):
+            yield chunk, self
+
+    @abstractmethod
+    async def _complete(
+        self, prompt: str, system: Optional[str], temperature: float, max_tokens: int
+    ) -> str:
+        """One completion from the provider's API (runs on the provider loop)"""
+
+    async def _stream(
+        self, prompt: str, system: Optional[str], temperature: float, max_tokens: int
+    ) -> AsyncIterator[str]:
+        # Providers without a streaming API answer in one chunk
+        yield await self._complete(prompt, system, temperature, max_tokens)
+
+    def cache_key(
+        self, prompt: str, system: Optional[str], temperature: float, max_tokens: int
+    ) -> str:
+        """Fingerprint of a completion request (everything that shapes the reply)"""
+        return content_key(self.name, self.model, temperature, max_tokens, system or "", prompt)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.model}>"
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini over the SDK's grpc.aio client (one multiplexed HTTP/2 channel)"""
+
+    name = "gemini"
+
+    def __init__(self, model: str, api_key: str):
+        super().__init__(model)
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model)
+
+    async def _complete(self, prompt, system, temperature, max_tokens) -> str:
+        # Generation settings are left at the model defaults, as before
+        response = await self._model.generate_content_async(prompt)
+        return response.text
+
+    async def _stream(self, prompt, system, temperature, max_tokens) -> AsyncIterator[str]:
+        response = await self._model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions over a pooled keep-alive httpx client"""
+
+    name = "openai"
+
+    def __init__(self, model: str, api_key: str):
+        super().__init__(model)
+        import httpx
+        from openai import AsyncOpenAI
+
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=settings.llm_timeout_seconds,
+            http_client=httpx.AsyncClient(
+                timeout=settings.llm_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_keepalive_connections
+                )
+            )
+        )
+
+    async def _complete(self, prompt, system, temperature, max_tokens) -> str:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def _stream(self, prompt, system, temperature, max_tokens) -> AsyncIterator[str]:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str]) -> list:
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+
+async def complete_cached(
+    provider: LLMProvider,
+    prompt: str,
+    cache: Optional[TieredCache],
+    system: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 300
+) -> Tuple[str, bool]:
+    """
+    `provider.complete()`, answered from `cache` when the same request was made before
+
+    The reply is stored under the key of the provider that actually
+    answered, which for a router may be a hedged or fallback provider.
+
+    Args:
+        provider: Provider to call on a cache miss
+        prompt, system, temperature, max_tokens: As for `complete()`
+        cache: Reply cache (None to always call the provider)
+
+    Returns:
+        (reply text, whether it was served from the cache)
+    """
+    key = provider.cache_key(prompt, system, temperature, max_tokens) if cache else None
+    if key:
+        text = cache.get(key)
+        if text is not None:
+            return text, True
+
+    text, source = await provider.complete_with_source(
+        prompt, system=system, temperature=temperature, max_tokens=max_tokens
+    )
+    if key and text:
+        cache.set(source.cache_key(prompt, system, temperature, max_tokens), text)
+    return text, False
+
+
+def create_provider(name: str, model: str) -> Optional[LLMProvider]:
+    """
+    Provider `name` ("gemini" or "openai") for `model`
+
+    Returns:
+        The provider, or None if its API key is not set or the SDK fails to initialize
+    """
+    providers = {
+        "gemini": (GeminiProvider, settings.gemini_api_key),
+        "openai": (OpenAIProvider, settings.openai_api_key)
+    }
+    if name not in providers:
+        raise ValueError(f"Unknown provider: {name}")
+
+    cls, api_key = providers[name]
+    if not api_key:
+        return None
+    try:
+        return cls(model, api_key)
+    except Exception as e:
+        logger.warning(f"Failed to initialize {name}: {e}")
+        return None
+
+
+# Singleton instance
+provider_loop = ProviderLoop()
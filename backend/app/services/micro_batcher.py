@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from .model_swap import analyze_batch
+from .executor import BoundedExecutor, inference_executor
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class _PendingRequest:
+    """A single analyze call waiting to be batched"""
+
+    __slots__ = ("text", "threshold", "sentences", "enqueued_at", "future")
+
+    def __init__(
+        self, text: str, threshold: float, sentences: bool, future: Optional[asyncio.Future]
+    ):
+        self.text = text
+        self.threshold = threshold
+        self.sentences = sentences
+        self.enqueued_at = time.perf_counter()
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batcher for emotion analysis
+
+    Concurrent `analyze()` calls are collected and run as a single
+    `analyze_batch()` call on the inference executor. Each caller's future
+    is resolved with its own result. When no batch is in flight, whatever
+    is queued is dispatched at once, so a lone request under low traffic
+    pays no batching delay; while a batch runs, requests are collected for
+    up to `max_wait_ms` (or until `max_batch_size` are waiting).
+
+    Concurrent calls for the same (text, threshold, sentences) are
+    coalesced first: only one of them is queued, and all receive its result.
+    """
+
+    def __init__(
+        self,
+        analyze_batch: Callable[..., List[dict]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_concurrency: int = 1,
+        enabled: bool = True,
+        executor: Optional[BoundedExecutor] = None,
+        coalesce: bool = True
+    ):
+        self.analyze_batch = analyze_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.enabled = enabled
+        self.in_flight = SingleFlight("emotion", enabled=coalesce)
+
+        # Loop-bound state, created on first use in a running loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[_PendingRequest] = []
+        self._has_items: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._running = 0  # Batches dispatched and not finished yet
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    async def analyze(
+        self, text: str, threshold: float = 0.10, sentences: bool = False
+    ) -> dict:
+        """
+        Queue `text` for batched analysis and wait for its result
+
+        Args:
+            text: Input text to analyze
+            threshold: Minimum confidence to include emotion (0.0-1.0)
+            sentences: Include the per-sentence breakdown
+
+        Returns:
+            Same result as `EmotionAnalyzerV2.analyze` (shared with
+            concurrent identical calls, so treat it as read-only)
+        """
+        return await self.in_flight.do(
+            (text, threshold, sentences), self._analyze, text, threshold, sentences
+        )
+
+    async def _analyze(self, text: str, threshold: float, sentences: bool) -> dict:
+        loop = asyncio.get_running_loop()
+
+        if not self.enabled:
+            request = _PendingRequest(text, threshold, sentences, None)
+            return (await self._execute(self._run_batch, [request]))[0]
+
+        self._ensure_worker(loop)
+
+        request = _PendingRequest(text, threshold, sentences, loop.create_future())
+        self._pending.append(request)
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+
+        return await request.future
+
+    def stats(self) -> dict:
+        """Batch size and queue wait metrics"""
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "avg_queue_wait_ms": round(
+                self.total_queue_wait / self.requests * 1000, 3
+            ) if self.requests else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait * 1000, 3),
+            "queued": len(self._pending),
+            "coalescing": self.in_flight.stats()
+        }
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop):
+        """Start the collector task (again) if this is a new event loop"""
+        if self._loop is loop and self._worker and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._pending = []
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._running = 0
+        self._worker = loop.create_task(self._collect())
+
+    async def _collect(self):
+        """Form batches from pending requests and hand them off"""
+        while True:
+            await self._has_items.wait()
+
+            # Idle model: dispatch right away. Busy: let the batch fill while the
+            # current one runs, bounded by the oldest request's deadline
+            remaining = self._pending[0].enqueued_at + self.max_wait - time.perf_counter()
+            if self._running and remaining > 0 and len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._slots.acquire()
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._has_items.clear()
+
+            self._running += 1
+            asyncio.get_running_loop().create_task(self._process(batch))
+
+    async def _process(self, batch: List[_PendingRequest]):
+        """Run one batch in a worker thread and resolve its futures"""
+        try:
+            self._record(batch)
+            results = await self._execute(self._run_batch, batch)
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Error in batched emotion analysis: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _execute(self, func: Callable, *args):
+        """Run blocking `func` off the event loop"""
+        if self.executor:
+            return await self.executor.run(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _run_batch(self, batch: List[_PendingRequest]) -> List[dict]:
+        """Call analyze_batch once per distinct (threshold, sentences) in the batch"""
+        results: List[Optional[dict]] = [None] * len(batch)
+
+        groups: Dict[Tuple[float, bool], List[int]] = {}
+        for i, request in enumerate(batch):
+            groups.setdefault((request.threshold, request.sentences), []).append(i)
+
+        for (threshold, sentences), indices in groups.items():
+            group = self.analyze_batch(
+                [batch[i].text for i in indices], threshold, sentences=sentences
+            )
+            for i, result in zip(indices, group):
+                results[i] = result
+
+        return results
+
+    def _record(self, batch: List[_PendingRequest]):
+        """Update batch size and queue wait metrics"""
+        now = time.perf_counter()
+        size = len(batch)
+
+        self.batches += 1
+        self.requests += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_size_histogram[size] = self.batch_size_histogram.get(size, 0) + 1
+
+        for request in batch:
+            wait = now - request.enqueued_at
+            self.total_queue_wait += wait
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+
+
+# Singleton instance
+emotion_batcher = MicroBatcher(
+    analyze_batch,  # Active analyzer, resolved per batch (see model_swap)
+    max_batch_size=settings.emotion_batch_max_size,
+    max_wait_ms=settings.emotion_batch_max_wait_ms,
+    max_concurrency=max(settings.emotion_batch_concurrency, settings.emotion_replicas),
+    enabled=settings.emotion_batching_enabled,
+    executor=inference_executor,
+    coalesce=settings.request_coalescing_enabled
+)
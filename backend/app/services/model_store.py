@@ -0,0 +1,277 @@
+"""
+Local model store
+
+Models are fetched ahead of time with `python -m app.cli fetch-models`
+into `<local_model_store>/<org>--<name>/` (config, tokenizer files and
+safetensors weights, plus a manifest with the hub revision and a SHA-256
+per file). At runtime they are loaded from there with the hub disabled,
+and the weights are memory-mapped so every worker shares the same page
+cache pages instead of holding a private copy.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MANIFEST_NAME = "mindmate_manifest.json"
+
+# Files needed to load a model: config, tokenizer and safetensors weights
+ALLOW_PATTERNS = ["*.json", "*.txt", "*.model", "*.safetensors"]
+
+# safetensors dtype names -> torch dtype attribute names
+SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8",
+    "U8": "uint8", "BOOL": "bool"
+}
+
+
+def offline_mode() -> bool:
+    """Whether models must come from the store (OFFLINE_MODELS, else: a store is configured)"""
+    if settings.offline_models is not None:
+        return settings.offline_models
+    return bool(settings.local_model_store)
+
+
+def missing_model_error(model_name: str) -> FileNotFoundError:
+    """Error for a model that offline mode needs but the store does not have"""
+    return FileNotFoundError(
+        f"{model_name} is not in the model store ({model_dir(model_name)}) and offline "
+        f"mode is on; run `python -m app.cli fetch-models`, or set OFFLINE_MODELS=False "
+        f"to download it from the Hugging Face hub"
+    )
+
+
+def require_models(model_names: List[str]):
+    """
+    Fail fast when offline mode is on and a model is not in the store
+
+    Called at startup, so a missing model stops the server instead of
+    leaving it up with a degraded emotion analyzer.
+
+    Raises:
+        FileNotFoundError: The first missing model and how to fetch it
+    """
+    if not offline_mode():
+        return
+    for model_name in model_names:
+        if local_model_path(model_name) is None:
+            raise missing_model_error(model_name)
+
+
+def enforce_offline():
+    """Disable every Hugging Face hub request in this process"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    # Already-imported hub code read the environment at import time
+    constants = sys.modules.get("huggingface_hub.constants")
+    if constants is not None:
+        constants.HF_HUB_OFFLINE = True
+
+
+def model_dir(model_name: str) -> str:
+    """Store directory for a hub model id"""
+    return os.path.join(settings.local_model_store, model_name.replace("/", "--"))
+
+
+def local_model_path(model_name: str) -> Optional[str]:
+    """
+    Directory to load `model_name` from without the network
+
+    Returns:
+        `model_name` itself when it is already a local directory, the
+        store directory when the model has been fetched, otherwise None
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    if not settings.local_model_store:
+        return None
+
+    path = model_dir(model_name)
+    if os.path.isfile(os.path.join(path, "config.json")):
+        return path
+    return None
+
+
+def read_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def fetch(model_name: str, revision: Optional[str] = None, force: bool = False) -> dict:
+    """
+    Download a model from the hub into the store
+
+    Repositories without safetensors weights are converted after download.
+
+    Args:
+        model_name: Hub model id
+        revision: Branch, tag or commit (default: main)
+        force: Re-download even if the model is already in the store
+
+    Returns:
+        The manifest written next to the model
+    """
+    from huggingface_hub import HfApi, snapshot_download
+
+    path = model_dir(model_name)
+    if force and os.path.isdir(path):
+        shutil.rmtree(path)
+
+    info = HfApi().model_info(model_name, revision=revision)
+    repo_files = [sibling.rfilename for sibling in info.siblings or []]
+    has_safetensors = any(name.endswith(".safetensors") for name in repo_files)
+
+    patterns = ALLOW_PATTERNS if has_safetensors else ALLOW_PATTERNS + ["pytorch_model*.bin"]
+    snapshot_download(model_name, revision=info.sha, local_dir=path, allow_patterns=patterns)
+
+    if not has_safetensors:
+        _convert_to_safetensors(path)
+
+    manifest = {
+        "model": model_name,
+        "revision": info.sha,
+        "files": {name: _sha256(os.path.join(path, name)) for name in _model_files(path)}
+    }
+    with open(os.path.join(path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify(model_name: str) -> List[str]:
+    """
+    Check a stored model against its manifest
+
+    Returns:
+        Problems found (empty when the model is complete and unmodified)
+    """
+    path = model_dir(model_name)
+    manifest = read_manifest(path)
+    if manifest is None:
+        return [f"no manifest in {path} (run fetch-models)"]
+
+    problems = []
+    for name, digest in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.isfile(file_path):
+            problems.append(f"missing {name}")
+        elif _sha256(file_path) != digest:
+            problems.append(f"checksum mismatch for {name}")
+
+    if not any(name.endswith(".safetensors") for name in manifest["files"]):
+        problems.append("no safetensors weights")
+    if "config.json" not in manifest["files"]:
+        problems.append("no config.json")
+    return problems
+
+
+def map_safetensors(path: str) -> Dict[str, "torch.Tensor"]:
+    """
+    Tensors of a safetensors file, backed by a copy-on-write memory map
+
+    The mapping is MAP_PRIVATE: pages come from the page
+    cache and are shared by every process mapping the same file until one
+    of them writes to it, which inference never does.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, entry in header.items():
+        dtype = getattr(torch, SAFETENSORS_DTYPES[entry["dtype"]])
+        start, end = entry["data_offsets"]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        offset = data_start + start
+
+        if offset % itemsize:
+            # Misaligned for a zero-copy view; copy this tensor instead
+            raw = torch.empty(0, dtype=torch.uint8).set_(storage, offset, (end - start,))
+            tensors[name] = raw.clone().view(dtype).reshape(entry["shape"])
+        else:
+            tensors[name] = torch.empty(0, dtype=dtype).set_(
+                storage, offset // itemsize, tuple(entry["shape"])
+            )
+    return tensors
+
+
+def share_weights(model, path: str) -> Tuple[int, int]:
+    """
+    Point a loaded model's parameters at memory-mapped safetensors data
+
+    Parameters whose name, shape and dtype match a tensor in the weights
+    file are swapped for the mapped tensor, releasing the private copy
+    made while loading.
+
+    Args:
+        model: Model loaded from `path`
+        path: Model directory with *.safetensors weights
+
+    Returns:
+        (mapped, total) parameter counts
+    """
+    mapped_tensors = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".safetensors"):
+            mapped_tensors.update(map_safetensors(os.path.join(path, name)))
+
+    prefix = getattr(model, "base_model_prefix", "")
+    parameters = list(model.named_parameters())
+    mapped = 0
+    for name, parameter in parameters:
+        source = mapped_tensors.get(name)
+        if source is None and prefix:
+            # Checkpoints may be saved with or without the base model prefix
+            source = mapped_tensors.get(
+                name[len(prefix) + 1:] if name.startswith(prefix + ".") else f"{prefix}.{name}"
+            )
+        if source is not None and source.shape == parameter.shape and source.dtype == parameter.dtype:
+            parameter.data = source
+            mapped += 1
+    return mapped, len(parameters)
+
+
+def _model_files(path: str) -> List[str]:
+    return sorted(
+        name for name in os.listdir(path)
+        if name != MANIFEST_NAME and os.path.isfile(os.path.join(path, name))
+    )
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _convert_to_safetensors(path: str):
+    """Re-save pytorch_model*.bin weights as safetensors"""
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(path, local_files_only=True)
+    model.save_pretrained(path, safe_serialization=True)
+    for name in os.listdir(path):
+        if name.startswith("pytorch_model") and name.endswith(".bin"):
+            os.remove(os.path.join(path, name))
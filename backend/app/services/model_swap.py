@@ -0,0 +1,293 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from ..config import get_settings
+from .emotion_analyzer_v2 import EmotionAnalyzerV2, emotion_analyzer_v2
+from .lazy import LazyService
+from .warmup import Warmup
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ModelSwapper:
+    """
+    Zero-downtime replacement of the active emotion model
+
+    `start()` loads and warms up a candidate model in a background thread
+    next to the active one. Optionally a sampled share of live texts is also scored by
+    the candidate ("shadow" scoring: results are compared, never
+    returned) to collect latency and label-agreement stats. The candidate
+    is then swapped in with a single assignment on the analyzer's
+    LazyService: a request that already resolved the old analyzer
+    finishes on it, every later request uses the new one.
+
+    Shadow scoring runs on its own thread after the live batch has been
+    answered, so it never delays a response; sampled texts are dropped
+    while a previous shadow batch is still running.
+    """
+
+    HISTORY_SIZE = 10  # Swaps remembered in stats()
+
+    def __init__(self, service: LazyService):
+        self.service = service
+        self._lock = threading.Lock()
+        self._shadow_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion-shadow")
+        self._shadow_busy = False
+        self._generation = 0
+        self.history: List[dict] = []
+        self._reset(None, "idle")
+
+    def _reset(self, model_name: Optional[str], status: str, **options):
+        self.candidate: Optional[EmotionAnalyzerV2] = None
+        self.candidate_name = model_name
+        self.status = status  # idle, loading, shadowing, ready, promoted, failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup: Optional[Warmup] = None
+        self.shadow_rate = options.get("shadow_rate", 0.0)
+        self.shadow_samples = options.get("shadow_samples", 0)
+        self.auto_promote = options.get("auto_promote", False)
+        self.min_agreement = options.get("min_agreement", 0.0)
+
+        # Shadow comparison stats
+        self.samples = 0
+        self.agreements = 0
+        self.dropped = 0
+        self.compared = 0  # Samples with comparable scores (same label set)
+        self.score_diff_sum = 0.0
+        self.active_seconds = 0.0
+        self.candidate_seconds = 0.0
+
+    def start(
+        self,
+        model_name: str,
+        shadow_rate: float = 0.0,
+        shadow_samples: int = 0,
+        auto_promote: bool = True,
+        min_agreement: float = 0.0
+    ) -> dict:
+        """
+        Start loading a candidate model in the background
+
+        Args:
+            model_name: Hub model id, or a model directory / store entry
+            shadow_rate: Share of live texts (0-1) also scored by the candidate
+            shadow_samples: Shadow-scored texts to collect before the
+                candidate is ready (0 = ready as soon as it is loaded)
+            auto_promote: Swap the candidate in once it is ready
+            min_agreement: Minimum primary-label agreement for auto-promotion
+
+        Returns:
+            Current swap status
+        """
+        if not 0.0 <= shadow_rate <= 1.0:
+            raise ValueError("shadow_rate must be between 0 and 1")
+        if shadow_samples and not shadow_rate:
+            raise ValueError("shadow_samples needs a shadow_rate above 0")
+
+        with self._lock:
+            if self.status == "loading":
+                raise RuntimeError(f"{self.candidate_name} is still loading")
+            self._generation += 1
+            generation = self._generation
+            self._reset(
+                model_name, "loading",
+                shadow_rate=shadow_rate, shadow_samples=shadow_samples,
+                auto_promote=auto_promote, min_agreement=min_agreement
+            )
+
+        threading.Thread(
+            target=self._load, args=(generation, model_name),
+            name="emotion-model-loader", daemon=True
+        ).start()
+        return self.stats()
+
+    def _load(self, generation: int, model_name: str):
+        start = time.perf_counter()
+        try:
+            candidate = EmotionAnalyzerV2(model_name, fallback=False)
+            # Same warmup as at startup, so the swap does not bring a latency spike
+            warmup = Warmup.from_settings()
+            if not warmup.run(candidate, enabled=settings.warmup_enabled):
+                raise RuntimeError(f"warmup failed: {warmup.error}")
+        except Exception as e:
+            with self._lock:
+                if generation == self._generation:
+                    self.status = "failed"
+                    self.error = str(e)
+            logger.error(f"❌ Candidate emotion model {model_name} failed to load: {e}")
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                return  # Cancelled or superseded while loading
+            self.candidate = candidate
+            self.warmup = warmup
+            self.load_seconds = time.perf_counter() - start
+            self.status = "shadowing" if self.shadow_samples else "ready"
+        logger.info(f"✅ Candidate emotion model {model_name} loaded in {self.load_seconds:.2f}s")
+        self._maybe_promote()
+
+    def observe(self, texts: List[str], threshold: float, results: list, seconds: float):
+        """
+        Shadow-score a sample of a live batch (called after it was answered)
+
+        Args:
+            texts: Texts of the live batch
+            threshold: Threshold they were analyzed with
+            results: Active model results, in input order
+            seconds: Time the active model took for the batch
+        """
+        if self.status != "shadowing" or not texts:
+            return
+
+        sampled = [i for i in range(len(texts)) if random.random() < self.shadow_rate]
+        if not sampled:
+            return
+
+        with self._lock:
+            if self.status != "shadowing":
+                return
+            if self._shadow_busy:
+                self.dropped += len(sampled)
+                return
+            self._shadow_busy = True
+            candidate, generation = self.candidate, self._generation
+
+        self._shadow_worker.submit(
+            self._shadow, candidate, generation,
+            [texts[i] for i in sampled], threshold, [results[i] for i in sampled],
+            seconds * len(sampled) / len(texts)
+        )
+
+    def _shadow(self, candidate, generation, texts, threshold, active_results, active_seconds):
+        try:
+            start = time.perf_counter()
+            shadow_results = candidate.analyze_batch(texts, threshold)
+            elapsed = time.perf_counter() - start
+
+            agreements = sum(
+                a["emotion"] == b["emotion"] for a, b in zip(active_results, shadow_results)
+            )
+            diffs = [
+                float(np.abs(a.scores - b.scores).mean())
+                for a, b in zip(active_results, shadow_results)
+                if len(a.scores) and np.array_equal(a.labels, b.labels)
+            ]
+
+            with self._lock:
+                if generation != self._generation or self.status != "shadowing":
+                    return
+                self.samples += len(texts)
+                self.agreements += agreements
+                self.compared += len(diffs)
+                self.score_diff_sum += sum(diffs)
+                self.active_seconds += active_seconds
+                self.candidate_seconds += elapsed
+                if self.samples >= self.shadow_samples:
+                    self.status = "ready"
+            self._maybe_promote()
+        except Exception as e:
+            logger.warning(f"⚠️ Shadow scoring failed: {e}")
+        finally:
+            with self._lock:
+                self._shadow_busy = False
+
+    def _maybe_promote(self):
+        if self.status != "ready" or not self.auto_promote:
+            return
+        if self.samples and self.agreements / self.samples < self.min_agreement:
+            logger.warning(
+                f"⚠️ Not promoting {self.candidate_name}: agreement "
+                f"{self.agreements / self.samples:.1%} is below {self.min_agreement:.1%}"
+            )
+            return
+        self.promote()
+
+    def promote(self) -> dict:
+        """
+        Swap the loaded candidate in as the active model
+
+        Raises:
+            RuntimeError: No loaded candidate
+        """
+        with self._lock:
+            if self.candidate is None or self.status not in ("shadowing", "ready"):
+                raise RuntimeError("No loaded candidate model to promote")
+
+            previous = self.service.replace(self.candidate)
+            previous_name = getattr(previous, "model_name", None)
+            self.history.append({
+                "from": previous_name,
+                "to": self.candidate.model_name,
+                "at": time.time(),
+                "shadow_samples": self.samples,
+                "agreement": round(self.agreements / self.samples, 4) if self.samples else None
+            })
+            del self.history[:-self.HISTORY_SIZE]
+            self.candidate = None
+            self.status = "promoted"
+
+        logger.info(f"🔄 Active emotion model swapped: {previous_name} -> {self.candidate_name}")
+        return self.stats()
+
+    def cancel(self) -> dict:
+        """Drop the candidate (or ignore it once its load finishes)"""
+        with self._lock:
+            self._generation += 1
+            self._reset(None, "idle")
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Active model, candidate status and shadow comparison stats"""
+        active = self.service.load() if self.service.is_loaded else None
+        samples, compared = self.samples, self.compared
+        return {
+            "active_model": getattr(active, "model_name", None),
+            "active_revision": (
+                active._model_revision() if active is not None and active.model is not None else None
+            ),
+            "candidate_model": self.candidate_name,
+            "status": self.status,
+            "error": self.error,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup": self.warmup.stats() if self.warmup else None,
+            "shadow": {
+                "rate": self.shadow_rate,
+                "target_samples": self.shadow_samples,
+                "samples": samples,
+                "dropped": self.dropped,
+                "label_agreement": round(self.agreements / samples, 4) if samples else None,
+                "compared": compared,
+                "mean_score_diff": round(self.score_diff_sum / compared, 4) if compared else None,
+                "active_ms_per_text": round(self.active_seconds / samples * 1000, 3) if samples else None,
+                "candidate_ms_per_text": round(self.candidate_seconds / samples * 1000, 3) if samples else None
+            },
+            "auto_promote": self.auto_promote,
+            "min_agreement": self.min_agreement,
+            "history": list(self.history)
+        }
+
+
+def analyze_batch(texts: List[str], threshold: float = 0.10, **kwargs) -> list:
+    """
+    `analyze_batch()` on the active analyzer, shadow-scored by a candidate model if one is set
+
+    The active analyzer is resolved once per call, so a swap never splits a batch.
+    """
+    analyzer = emotion_analyzer_v2.load()
+    start = time.perf_counter()
+    results = analyzer.analyze_batch(texts, threshold, **kwargs)
+    model_swapper.observe(texts, threshold, results, time.perf_counter() - start)
+    return results
+
+
+# Singleton instance
+model_swapper = ModelSwapper(emotion_analyzer_v2)
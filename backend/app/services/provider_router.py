@@ -0,0 +1,407 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .llm_providers import LLMProvider
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ProviderUnavailable(Exception):
+    """Every provider's circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a provider after a burst of failures
+
+    `failures` failures within `window_seconds` open the breaker. After
+    `cooldown_seconds` one trial request is let through (half-open): its
+    success closes the breaker again, its failure re-opens it.
+
+    Thread-safe: routed calls record outcomes from the request loop, the
+    provider loop and threads using the sync wrappers alike.
+    """
+
+    def __init__(self, failures: int = 5, window_seconds: float = 30.0, cooldown_seconds: float = 30.0):
+        self.failures = max(1, failures)
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+
+        self.state = "closed"  # closed, open, half_open
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._recent: Deque[float] = deque()
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the trial slot when half-open)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Give back the half-open trial slot of a request that ended without an outcome"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> bool:
+        """Returns: whether this closed a breaker that was not closed"""
+        with self._lock:
+            reclosed = self.state != "closed"
+            self._trial_running = False
+            self.state = "closed"
+            self._recent.clear()
+            return reclosed
+
+    def record_failure(self) -> bool:
+        """Returns: whether this failure opened the breaker"""
+        now = time.monotonic()
+        with self._lock:
+            self._trial_running = False
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.window_seconds:
+                self._recent.popleft()
+
+            if self.state == "half_open" or len(self._recent) >= self.failures:
+                opened = self.state != "open"
+                if opened:
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = now
+                self._recent.clear()
+                return opened
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "recent_failures": len(self._recent),
+                "open_for_seconds": (
+                    round(time.monotonic() - self.opened_at, 1) if self.state == "open" else None
+                )
+            }
+
+
+class _ProviderHealth:
+    """
+    Latency window, counters and circuit breaker of one routed provider
+
+    Counters and latencies change under `lock`.
+    """
+
+    def __init__(self, provider: LLMProvider, latency_window: int):
+        self.provider = provider
+        self.breaker = CircuitBreaker(
+            failures=settings.llm_breaker_failures,
+            window_seconds=settings.llm_breaker_window_seconds,
+            cooldown_seconds=settings.llm_breaker_cooldown_seconds
+        )
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0  # Lost a hedge race
+        self.hedges_won = 0
+        self.lock = threading.Lock()
+
+    def count(self, counter: str):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_latency(self, seconds: float):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self.lock:
+            latencies = list(self.latencies)
+        return float(np.quantile(latencies, q)) if latencies else None
+
+    def stats(self) -> dict:
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        with self.lock:
+            calls, successes, failures = self.calls, self.successes, self.failures
+            cancelled, hedges_won = self.cancelled, self.hedges_won
+        finished = successes + failures
+        return {
+            "model": self.provider.model,
+            "calls": calls,
+            "successes": successes,
+            "failures": failures,
+            "error_rate": round(failures / finished, 4) if finished else 0.0,
+            "cancelled": cancelled,
+            "hedges_won": hedges_won,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "circuit": self.breaker.stats()
+        }
+
+
+class ProviderRouter:
+    """
+    Routes completions across providers by health and latency
+
+    Requests go to the primary provider. If it has not answered after its
+    recent p95 latency (the hedge delay), the same request is also sent to
+    the next healthy provider and whichever answers first wins; the other
+    call is cancelled. A provider that fails falls over to the next one
+    immediately, and a burst of failures opens its circuit breaker so it
+    is skipped until its cooldown has passed.
+
+    Exposes the `LLMProvider` interface (`complete`, `stream`, their
+    `*_with_source` variants and `cache_key`), so generators and the reply
+    cache use it like a single provider.
+
+    Breaker state and counters are guarded by locks, since routed calls
+    run on the request loop, the provider loop and sync-wrapper threads.
+    """
+
+    MIN_LATENCY_SAMPLES = 20  # Below this the configured default hedge delay is used
+
+    def __init__(self, providers: Dict[str, LLMProvider], primary: Optional[str] = None):
+        """
+        Args:
+            providers: Providers by name, in fallback order
+            primary: Provider tried first (default: the first one)
+        """
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        self.health = {
+            name: _ProviderHealth(provider, settings.llm_latency_window)
+            for name, provider in providers.items()
+        }
+        self.primary = primary if primary in providers else next(iter(providers))
+        self.hedging = settings.llm_hedging_enabled
+        self.hedges = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.primary
+
+    @property
+    def model(self) -> str:
+        return self.health[self.primary].provider.model
+
+    def cache_key(self, prompt: str, system: Optional[str], temperature: float, max_tokens: int) -> str:
+        # Lookup key: a reply from the primary. Replies are stored under the
+        # key of the provider that actually answered (see `complete_cached`),
+        # so a hedged or fallback reply is never served as the primary's
+        return self.health[self.primary].provider.cache_key(prompt, system, temperature, max_tokens)
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on `name` before hedging: its recent p95 latency"""
+        health = self.health[name]
+        if len(health.latencies) < self.MIN_LATENCY_SAMPLES:
+            return settings.llm_hedge_default_delay_seconds
+        return max(settings.llm_hedge_min_delay_seconds, health.quantile(settings.llm_hedge_quantile))
+
+    async def complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> str:
+        """
+        `complete()` on the primary, hedged to or failing over to the others
+
+        Raises:
+            ProviderUnavailable: Every circuit is open
+            Exception: The last provider error, if all of them failed
+        """
+        text, _ = await self.complete_with_source(prompt, system, temperature, max_tokens)
+        return text
+
+    async def complete_with_source(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> Tuple[str, LLMProvider]:
+        """`complete()`, plus the provider whose reply won"""
+        order = self._order()
+        running: Dict[asyncio.Task, str] = {}
+        hedged = set()
+
+        def start(reason: Optional[str] = None) -> Optional[str]:
+            name = self._take(order)
+            if name is not None:
+                task = asyncio.ensure_future(self._call(name, prompt, system, temperature, max_tokens))
+                running[task] = name
+                if reason == "hedge":
+                    hedged.add(name)
+                    self._count("hedges")
+                elif reason == "failover":
+                    self._count("failovers")
+            return name
+
+        first = start()
+        if first is None:
+            raise ProviderUnavailable("No reflection provider available (all circuits open)")
+
+        delay = self.hedge_delay(first) if self.hedging else None
+        error: Optional[BaseException] = None
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Slower than its p95: hedge once to the next healthy provider
+                    delay = None
+                    start("hedge")
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        if name in hedged:
+                            self.health[name].count("hedges_won")
+                        return task.result(), self.health[name].provider
+                    error = task.exception()
+
+                # Every call failed so far: fall over right away
+                if not running:
+                    start("failover")
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise error
+
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> AsyncIterator[str]:
+        """
+        `stream()` on the first healthy provider
+
+        Streams are not hedged; a provider that fails before its first
+        chunk falls over to the next one.
+        """
+        async for chunk, _ in self.stream_with_source(prompt, system, temperature, max_tokens):
+            yield chunk
+
+    async def stream_with_source(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 300
+    ) -> AsyncIterator[Tuple[str, LLMProvider]]:
+        """`stream()`, yielding each chunk with the provider that produced it"""
+        order = self._order()
+        name = self._take(order)
+        if name is None:
+            raise ProviderUnavailable("No reflection provider available (all circuits open)")
+
+        while True:
+            health = self.health[name]
+            health.count("calls")
+            started = False
+            try:
+                async for chunk in health.provider.stream(prompt, system, temperature, max_tokens):
+                    started = True
+                    yield chunk, health.provider
+            except Exception as e:
+                self._record_failure(name, e)
+                name = None if started else self._take(order)
+                if name is None:
+                    raise
+                self._count("failovers")
+                continue
+            except BaseException:
+                # Closed early by the consumer: no outcome to record
+                health.breaker.release()
+                raise
+
+            self._record_success(name)
+            return
+
+    def stats(self) -> dict:
+        """Routing counters and per-provider latency, error rate and circuit state"""
+        with self._lock:
+            hedges, failovers = self.hedges, self.failovers
+        return {
+            "primary": self.primary,
+            "hedging": self.hedging,
+            "hedge_delay_ms": round(self.hedge_delay(self.primary) * 1000, 1),
+            "hedges": hedges,
+            "failovers": failovers,
+            "providers": {name: health.stats() for name, health in self.health.items()}
+        }
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _order(self) -> List[str]:
+        """Provider names, primary first"""
+        return [self.primary] + [name for name in self.health if name != self.primary]
+
+    def _take(self, order: List[str]) -> Optional[str]:
+        """Pop the next provider in `order` whose circuit lets a request through"""
+        while order:
+            name = order.pop(0)
+            if self.health[name].breaker.allow():
+                return name
+        return None
+
+    async def _call(self, name, prompt, system, temperature, max_tokens) -> str:
+        health = self.health[name]
+        health.count("calls")
+        start = time.perf_counter()
+        try:
+            text = await health.provider.complete(prompt, system, temperature, max_tokens)
+        except asyncio.CancelledError:
+            health.count("cancelled")
+            health.breaker.release()
+            raise
+        except Exception as e:
+            self._record_failure(name, e)
+            raise
+        finally:
+            # Hedge losers and failures count with their elapsed time as a lower
+            # bound: the slowest calls are the ones hedged away, and leaving them
+            # out would pull the p95 (and with it the hedge delay) ever lower
+            health.record_latency(time.perf_counter() - start)
+
+        self._record_success(name)
+        return text
+
+    def _record_success(self, name: str):
+        health = self.health[name]
+        health.count("successes")
+        if health.breaker.record_success():
+            logger.info(f"✅ {name} circuit closed again")
+
+    def _record_failure(self, name: str, error: Exception):
+        health = self.health[name]
+        health.count("failures")
+        logger.warning(f"⚠️ {name} reflection request failed: {error}")
+        if health.breaker.record_failure():
+            logger.error(f"❌ {name} circuit opened after repeated failures")
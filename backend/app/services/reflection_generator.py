@@ -1,6 +1,9 @@
-import google.generativeai as genai
-from openai import OpenAI
 from ..config import get_settings
+from .lazy import LazyService
+from .cache import reflection_cache
+from .llm_providers import complete_cached, create_provider, provider_loop
+from .provider_router import ProviderRouter
+from .single_flight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,31 +14,26 @@ _reflection_provider = settings.reflection_provider.lower()
 
 class ReflectionGenerator:
     def __init__(self):
+        # Identical concurrent requests (retries, double submits) share one LLM call
+        self.in_flight = SingleFlight("reflection", enabled=settings.request_coalescing_enabled)
+        # Replies to an identical prompt are reused (retries, re-submissions, re-processing)
+        self.cache = reflection_cache if settings.reflection_cache_enabled else None
         self._initialize_providers()
         self._select_provider()
     
     def _initialize_providers(self):
         """Initialize both Gemini and OpenAI clients"""
-        self.gemini_model = None
-        self.openai_client = None
-        self.openai_model = settings.openai_model
+        self.providers = {}
         
-        # Initialize Gemini if API key is available
-        if settings.gemini_api_key:
-            try:
-                genai.configure(api_key=settings.gemini_api_key)
-                self.gemini_model = genai.GenerativeModel(settings.gemini_model)
-                logger.info(f"✅ Gemini {settings.gemini_model} initialized")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Gemini: {e}")
+        for name, model in (("gemini", settings.gemini_model), ("openai", settings.openai_model)):
+            provider = create_provider(name, model)
+            if provider:
+                self.providers[name] = provider
+                logger.info(f"✅ {name.title()} {model} initialized")
         
-        # Initialize OpenAI if API key is available
-        if settings.openai_api_key:
-            try:
-                self.openai_client = OpenAI(api_key=settings.openai_api_key)
-                logger.info(f"✅ OpenAI {settings.openai_model} initialized")
-            except Exception as e:
-                logger.warning(f"Failed to initialize OpenAI: {e}")
+        # The selected provider is the router's primary; the other one takes
+        # hedged and failed-over requests
+        self.router = ProviderRouter(self.providers) if self.providers else None
     
     def _select_provider(self):
         """Select the active provider based on settings"""
@@ -43,21 +41,19 @@ class ReflectionGenerator:
         
         provider = _reflection_provider or settings.reflection_provider.lower()
         
-        if provider == "gemini" and self.gemini_model:
-            self.use_gemini = True
-            logger.info(f"✅ Using Gemini {settings.gemini_model} for reflections (Testing Mode)")
-        elif provider == "openai" and self.openai_client:
-            self.use_gemini = False
-            logger.info(f"✅ Using OpenAI {settings.openai_model} for reflections (Production Mode)")
-        elif self.gemini_model:
-            self.use_gemini = True
-            logger.info(f"✅ Falling back to Gemini {settings.gemini_model}")
-        elif self.openai_client:
-            self.use_gemini = False
-            logger.info(f"✅ Falling back to OpenAI {settings.openai_model}")
+        if provider in self.providers:
+            self.active_provider = provider
+            mode = "Testing" if provider == "gemini" else "Production"
+            logger.info(f"✅ Using {provider.title()} {self.providers[provider].model} for reflections ({mode} Mode)")
+        elif self.providers:
+            self.active_provider = next(iter(self.providers))
+            logger.info(f"✅ Falling back to {self.active_provider.title()} {self.providers[self.active_provider].model}")
         else:
             logger.warning("⚠️ No AI API key provided for either provider")
-            self.use_gemini = None
+            self.active_provider = None
+        
+        if self.router and self.active_provider:
+            self.router.primary = self.active_provider
     
     @classmethod
     def set_provider(cls, provider: str, instance=None):
@@ -84,8 +80,15 @@ class ReflectionGenerator:
         return _reflection_provider or settings.reflection_provider.lower()
     
     def generate(self, journal_text: str, emotion: str) -> dict:
+        """Generate AI reflection based on journal and emotion (blocking wrapper of `agenerate`)"""
+        return provider_loop.run_sync(self.agenerate(journal_text, emotion))
+    
+    async def agenerate(self, journal_text: str, emotion: str) -> dict:
         """Generate AI reflection based on journal and emotion"""
-        
+        key = (self.get_provider(), journal_text, emotion)
+        return await self.in_flight.do(key, self._agenerate, journal_text, emotion)
+    
+    async def _agenerate(self, journal_text: str, emotion: str) -> dict:
         prompt = f"""You are a compassionate mental wellness companion named MindMate.
 
 The user wrote this journal entry:
@@ -108,23 +111,18 @@ TIPS:
             # Recheck provider in case it was changed at runtime
             self._select_provider()
             
-            if self.use_gemini and self.gemini_model:
-                response = self.gemini_model.generate_content(prompt)
-                text = response.text
-            elif not self.use_gemini and self.openai_client:
-                response = self.openai_client.chat.completions.create(
-                    model=self.openai_model,
-                    messages=[
-                        {"role": "system", "content": "You are a supportive mental wellness AI companion."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=300
-                )
-                text = response.choices[0].message.content
-            else:
+            if not self.router:
                 raise Exception("No available AI provider")
             
+            text, cached = await complete_cached(
+                self.router,
+                prompt,
+                self.cache,
+                system="You are a supportive mental wellness AI companion.",
+                temperature=0.7,
+                max_tokens=300
+            )
+            
             # Parse response
             parts = text.split("TIPS:")
             reflection = parts[0].replace("REFLECTION:", "").strip()
@@ -136,14 +134,16 @@ TIPS:
             
             return {
                 "reflection": reflection,
-                "suggestions": tips[:2]  # Max 2 tips
+                "suggestions": tips[:2],  # Max 2 tips
+                "cached": cached
             }
             
         except Exception as e:
             logger.error(f"Error generating reflection: {e}")
             return {
                 "reflection": "Thank you for sharing. Remember, it's okay to feel what you're feeling.",
-                "suggestions": ["Take a few deep breaths", "Be kind to yourself"]
+                "suggestions": ["Take a few deep breaths", "Be kind to yourself"],
+                "cached": False
             }
 
 # Singleton instance
@@ -156,8 +156,8 @@ def get_reflection_generator():
         _reflection_generator_instance = ReflectionGenerator()
     return _reflection_generator_instance
 
-# Create singleton
-reflection_generator = get_reflection_generator()
+# Create singleton (provider SDKs are imported on first use or at startup)
+reflection_generator = LazyService("Reflection generator", get_reflection_generator)
 
 # Update set_provider to use the singleton
 def set_provider(provider: str):
@@ -1,6 +1,10 @@
-import google.generativeai as genai
-from openai import OpenAI
+from typing import AsyncIterator, Tuple
 from ..config import get_settings
+from .lazy import LazyService
+from .cache import reflection_cache
+from .llm_providers import complete_cached, create_provider, provider_loop
+from .provider_router import ProviderRouter
+from .single_flight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
@@ -53,93 +57,171 @@ class ReflectionGeneratorV2:
         }
     }
     
+    SYSTEM_PROMPT = (
+        "You are MindMate, an emotionally intelligent mental wellness AI. "
+        "You understand nuance, complexity, and mixed emotions."
+    )
+    
     def __init__(self):
-        self.use_gemini = True if settings.gemini_api_key else False
+        # Identical concurrent requests (retries, double submits) share one LLM call
+        self.in_flight = SingleFlight("reflection-v2", enabled=settings.request_coalescing_enabled)
+        # Replies to an identical prompt are reused (retries, re-submissions, re-processing)
+        self.cache = reflection_cache if settings.reflection_cache_enabled else None
+        # Gemini first, OpenAI for hedged and failed-over requests, else templates only
+        providers = {
+            name: provider for name, provider in (
+                ("gemini", create_provider("gemini", "gemini-pro")),
+                ("openai", create_provider("openai", "gpt-3.5-turbo"))
+            ) if provider
+        }
+        self.provider = ProviderRouter(providers) if providers else None
         
-        if self.use_gemini:
-            genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
-            logger.info("✅ Using Gemini for reflections")
-        elif settings.openai_api_key:
-            self.client = OpenAI(api_key=settings.openai_api_key)
-            self.use_gemini = False
-            logger.info("✅ Using OpenAI for reflections")
+        if self.provider:
+            logger.info(f"✅ Using {self.provider.name.title()} for reflections")
         else:
             logger.warning("⚠️ No AI API key provided")
-            self.client = None
     
     def generate(self, journal_text: str, emotion_data: dict) -> dict:
+        """Blocking wrapper of `agenerate` for code running outside an event loop"""
+        return provider_loop.run_sync(self.agenerate(journal_text, emotion_data))
+    
+    async def agenerate(self, journal_text: str, emotion_data: dict, fallback: bool = True) -> dict:
         """
         Generate contextual reflection based on GoEmotions analysis
         
         Args:
             journal_text: User's journal entry
             emotion_data: Full GoEmotions analysis result
+            fallback: Answer with the template reflection when the provider
+                fails; False raises the provider error instead, for callers
+                that retry (without any provider the template is used either way)
             
         Returns:
-            Dict with reflection, suggestions, and metadata
+            Dict with reflection, suggestions, and metadata (shared with
+            concurrent identical calls, so treat it as read-only)
+        """
+        # The rendered prompt covers every analysis field the reply depends on
+        key = (self._prompt(journal_text, emotion_data), fallback)
+        return await self.in_flight.do(key, self._agenerate, journal_text, emotion_data, fallback)
+    
+    async def astream(self, journal_text: str, emotion_data: dict) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Generate a reflection, streaming it while the provider writes it
+        
+        Args:
+            journal_text: User's journal entry
+            emotion_data: Full GoEmotions analysis result
+            
+        Yields:
+            ("token", {"text": ...}) chunks of the reflection paragraph, then
+            ("reflection", result) with the same dict `agenerate` returns.
+            The final result is authoritative: if the provider fails
+            mid-stream it is the template fallback.
         """
-        # Extract emotion analysis
-        primary = emotion_data.get('emotion', 'neutral')
         emotional_state = emotion_data.get('emotional_state', 'neutral')
-        is_mixed = emotion_data.get('is_mixed', False)
-        has_conflict = emotion_data.get('has_conflict', False)
-        has_confusion = emotion_data.get('has_confusion', False)
-        significant = emotion_data.get('significant_emotions', [])
-        complexity = emotion_data.get('complexity', 'moderate')
-        valence = emotion_data.get('valence', {})
         
-        # Build contextual prompt
-        prompt = self._build_advanced_prompt(
-            journal_text,
-            primary,
-            emotional_state,
-            is_mixed,
-            has_conflict,
-            has_confusion,
-            significant,
-            complexity,
-            valence
-        )
+        if not self.provider:
+            yield "reflection", self.fallback(emotion_data)
+            return
+        
+        prompt = self._prompt(journal_text, emotion_data)
+        key = self.provider.cache_key(prompt, self.SYSTEM_PROMPT, 0.75, 300) if self.cache else None
+        text = self.cache.get(key) if key else None
+        cached = text is not None
         
         try:
-            if self.use_gemini:
-                response = self.model.generate_content(prompt)
-                text = response.text
-            elif self.client:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are MindMate, an emotionally intelligent mental wellness AI. You understand nuance, complexity, and mixed emotions."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
+            if cached:
+                visible = self._visible_reflection(text + "TIPS:")
+                if visible:
+                    yield "token", {"text": visible}
+            else:
+                text = ""
+                sent = 0
+                source = None
+                async for chunk, source in self.provider.stream_with_source(
+                    prompt,
+                    system=self.SYSTEM_PROMPT,
                     temperature=0.75,
                     max_tokens=300
-                )
-                text = response.choices[0].message.content
-            else:
-                # Use template-based fallback
-                return self._template_based_reflection(
-                    emotional_state, primary, significant
-                )
+                ):
+                    text += chunk
+                    visible = self._visible_reflection(text)
+                    if len(visible) > sent:
+                        yield "token", {"text": visible[sent:]}
+                        sent = len(visible)
+                
+                if key and text:
+                    # Under the key of the provider that answered (may be a fallback)
+                    self.cache.set(source.cache_key(prompt, self.SYSTEM_PROMPT, 0.75, 300), text)
             
-            # Parse response
-            reflection, suggestions = self._parse_response(text)
-            
-            return {
-                "reflection": reflection,
-                "suggestions": suggestions[:3],
-                "tone": self._determine_tone(emotional_state),
-                "emotional_state": emotional_state,
-                "focus": self._determine_focus(emotional_state, has_confusion)
-            }
+            result = self._result(text, emotional_state, emotion_data.get('has_confusion', False), cached)
+        except Exception as e:
+            logger.error(f"Error streaming reflection: {e}")
+            result = self.fallback(emotion_data)
+        
+        yield "reflection", result
+    
+    async def _agenerate(self, journal_text: str, emotion_data: dict, fallback: bool = True) -> dict:
+        emotional_state = emotion_data.get('emotional_state', 'neutral')
+        
+        if not self.provider:
+            # Use template-based fallback
+            return self.fallback(emotion_data)
+        
+        try:
+            text, cached = await complete_cached(
+                self.provider,
+                self._prompt(journal_text, emotion_data),
+                self.cache,
+                system=self.SYSTEM_PROMPT,
+                temperature=0.75,
+                max_tokens=300
+            )
+            return self._result(text, emotional_state, emotion_data.get('has_confusion', False), cached)
             
         except Exception as e:
+            if not fallback:
+                raise
             logger.error(f"Error generating reflection: {e}")
-            return self._template_based_reflection(emotional_state, primary, significant)
+            return self.fallback(emotion_data)
+    
+    def _prompt(self, journal_text: str, emotion_data: dict) -> str:
+        """Prompt for `journal_text` from its GoEmotions analysis"""
+        return self._build_advanced_prompt(
+            journal_text,
+            emotion_data.get('emotion', 'neutral'),
+            emotion_data.get('emotional_state', 'neutral'),
+            emotion_data.get('is_mixed', False),
+            emotion_data.get('has_conflict', False),
+            emotion_data.get('has_confusion', False),
+            emotion_data.get('significant_emotions', []),
+            emotion_data.get('complexity', 'moderate'),
+            emotion_data.get('valence', {})
+        )
+    
+    def _result(self, text: str, emotional_state: str, has_confusion: bool, cached: bool) -> dict:
+        """Parsed provider response with tone, focus and whether it came from the cache"""
+        reflection, suggestions = self._parse_response(text)
+        
+        return {
+            "reflection": reflection,
+            "suggestions": suggestions[:3],
+            "tone": self._determine_tone(emotional_state),
+            "emotional_state": emotional_state,
+            "focus": self._determine_focus(emotional_state, has_confusion),
+            "cached": cached
+        }
+    
+    def fallback(self, emotion_data: dict) -> dict:
+        """Template reflection used when no provider answered (marked with "fallback")"""
+        result = self._template_based_reflection(
+            emotion_data.get('emotional_state', 'neutral'),
+            emotion_data.get('emotion', 'neutral'),
+            emotion_data.get('significant_emotions', [])
+        )
+        result["cached"] = False
+        result["fallback"] = True
+        return result
     
     def _build_advanced_prompt(
         self, text: str, primary: str, emotional_state: str,
@@ -243,6 +325,20 @@ TIPS:
         
         return prompt
     
+    @staticmethod
+    def _visible_reflection(text: str) -> str:
+        """Reflection paragraph of a partial response, without a possibly split marker"""
+        head, found, _ = text.partition("TIPS:")
+        if not found:
+            head = head[:max(0, len(head) - len("TIPS:") + 1)]
+        
+        head = head.lstrip()
+        if "REFLECTION:".startswith(head):
+            return ""
+        if head.startswith("REFLECTION:"):
+            head = head[len("REFLECTION:"):].lstrip()
+        return head
+    
     def _parse_response(self, text: str) -> tuple:
         """Parse AI response into reflection and suggestions"""
         parts = text.split("TIPS:")
@@ -308,5 +404,5 @@ TIPS:
             return "support"
 
 
-# Singleton
-reflection_generator_v2 = ReflectionGeneratorV2()
\ No newline at end of file
+# Singleton (provider SDKs are imported on first use or at startup)
+reflection_generator_v2 = LazyService("Reflection generator v2", ReflectionGeneratorV2)
\ No newline at end of file
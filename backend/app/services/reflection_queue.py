@@ -0,0 +1,479 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models import JournalEntry, ReflectionJob
+from .llm_providers import provider_loop
+from .reflection_generator_v2 import reflection_generator_v2
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ReflectionQueue:
+    """
+    Background generation of journal reflections, with job state in the database
+
+    `/journal/create` can save an entry and answer right away: `enqueue()`
+    adds a `ReflectionJob` row in the same transaction as the entry, and
+    worker tasks on the provider loop generate the reflection and write it
+    back to the entry. Because the queue lives in the database, nothing is
+    lost on a restart: a job is claimed with an atomic status update and a
+    lease, and a job whose worker died (crash, deploy, killed process) is
+    picked up again once its lease runs out.
+
+    A provider error is retried with exponential backoff; once
+    `max_attempts` are used up the generator's template reflection is
+    stored instead and the job ends as "fallback", with the last error.
+
+    Delivery is at least once: a job that overruns its lease may be
+    generated twice, but only the worker holding the current lease writes
+    its result (a stale worker's result is dropped).
+    """
+
+    STATUSES = ("pending", "running", "done", "fallback", "failed")
+
+    def __init__(
+        self,
+        generator: Any = reflection_generator_v2,
+        session_factory=SessionLocal,
+        workers: int = 4,
+        max_attempts: int = 3,
+        retry_seconds: float = 5.0,
+        lease_seconds: float = 120.0,
+        poll_seconds: float = 2.0
+    ):
+        """
+        Args:
+            generator: Reflection generator (`agenerate(text, emotion_data,
+                fallback=False)` raising on provider errors, `fallback(emotion_data)`)
+            session_factory: Creates database sessions
+            workers: Jobs processed concurrently in this process
+            max_attempts: Attempts before the template reflection is stored
+            retry_seconds: Delay before the first retry, doubled after each failure
+            lease_seconds: Time a claimed job may run before it is claimed again
+            poll_seconds: How often idle workers look for jobs (e.g. enqueued
+                by another process, or due for a retry)
+        """
+        self.generator = generator
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_seconds = retry_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._supervisor: Optional[Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+        # Metrics
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.fallbacks = 0  # Out of attempts, template reflection stored
+        self.failed = 0
+        self.recovered = 0  # Jobs picked up again after their lease ran out
+
+    @classmethod
+    def from_settings(cls) -> "ReflectionQueue":
+        return cls(
+            workers=settings.reflection_queue_workers,
+            max_attempts=settings.reflection_job_max_attempts,
+            retry_seconds=settings.reflection_job_retry_seconds,
+            lease_seconds=settings.reflection_job_lease_seconds,
+            poll_seconds=settings.reflection_queue_poll_seconds
+        )
+
+    def enqueue(self, db: Session, entry_id: int) -> ReflectionJob:
+        """
+        Add a pending job for `entry_id` to `db`'s transaction
+
+        The caller commits (together with the entry) and then calls `notify()`,
+        which counts the job: a rolled-back job is never counted.
+        """
+        job = ReflectionJob(entry_id=entry_id, status="pending", run_after=datetime.utcnow())
+        db.add(job)
+        return job
+
+    def start(self):
+        """Start the workers on the provider loop (once per process)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup = None
+            self._supervisor = asyncio.run_coroutine_threadsafe(self._run(), provider_loop.loop)
+        logger.info(f"📬 Reflection queue started with {self.workers} workers")
+
+    def stop(self):
+        """Cancel the workers; claimed jobs are picked up again after their lease"""
+        with self._lock:
+            if self._supervisor is not None:
+                self._supervisor.cancel()
+            self._supervisor = None
+            self._pid = None
+
+    def notify(self, jobs: int = 1):
+        """
+        Count `jobs` committed jobs and wake idle workers (starts the queue if needed)
+
+        Args:
+            jobs: Jobs the caller's transaction enqueued
+        """
+        with self._lock:
+            self.enqueued += jobs
+        self.start()
+        wakeup = self._wakeup
+        if wakeup is not None:
+            provider_loop.loop.call_soon_threadsafe(wakeup.set)
+
+    def status(self, entry_id: int) -> Optional[dict]:
+        """
+        Reflection state of an entry
+
+        Returns:
+            Dict with status ("pending", "running", "done", "fallback",
+            "failed" or "none"), reflection, reflection_metadata, attempts and error;
+            None if the entry does not exist
+        """
+        db = self.session_factory()
+        try:
+            entry = db.query(JournalEntry).filter(JournalEntry.id == entry_id).first()
+            if entry is None:
+                return None
+            job = db.query(ReflectionJob).filter(ReflectionJob.entry_id == entry_id).first()
+
+            if job is None:
+                # Entry created with its reflection inline
+                status, metadata, attempts, error = ("done" if entry.reflection else "none"), None, 0, None
+            else:
+                status, attempts, error = job.status, job.attempts, job.error
+                metadata = json.loads(job.result) if job.result else None
+
+            return {
+                "entry_id": entry_id,
+                "status": status,
+                "reflection": entry.reflection,
+                "reflection_metadata": metadata,
+                "attempts": attempts,
+                "error": error
+            }
+        finally:
+            db.close()
+
+    async def wait_for(self, entry_id: int, timeout: float = 0.0) -> Optional[dict]:
+        """
+        `status()` once the reflection is finished, or after `timeout` seconds (long poll)
+
+        Completion in this process wakes the waiter right away; jobs run by
+        another process are noticed by re-reading the row every `poll_seconds`.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            event = asyncio.Event()
+            waiter = (loop, event)
+            with self._lock:
+                self._waiters.setdefault(entry_id, []).append(waiter)
+            try:
+                state = await asyncio.to_thread(self.status, entry_id)
+                remaining = deadline - time.monotonic()
+                if state is None or state["status"] not in ("pending", "running") or remaining <= 0:
+                    return state
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, self.poll_seconds))
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._lock:
+                    waiters = self._waiters.get(entry_id, [])
+                    if waiter in waiters:
+                        waiters.remove(waiter)
+                    if not waiters:
+                        self._waiters.pop(entry_id, None)
+
+    def has_unfinished_jobs(self) -> bool:
+        """Whether any job is pending or running (e.g. left over from before a restart)"""
+        db = self.session_factory()
+        try:
+            return db.query(ReflectionJob.id)\
+                .filter(ReflectionJob.status.in_(("pending", "running")))\
+                .first() is not None
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        """Process-local counters plus jobs per status in the database (blocking query)"""
+        db = self.session_factory()
+        try:
+            jobs = dict(
+                db.query(ReflectionJob.status, func.count(ReflectionJob.id))
+                .group_by(ReflectionJob.status)
+                .all()
+            )
+        finally:
+            db.close()
+
+        return {
+            "running": self._pid == os.getpid(),
+            "workers": self.workers,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "fallbacks": self.fallbacks,
+            "failed": self.failed,
+            "recovered": self.recovered,
+            "jobs": {status: jobs.get(status, 0) for status in self.STATUSES}
+        }
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        workers = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        try:
+            # Reclaim jobs left behind by workers that died mid-job
+            while True:
+                try:
+                    if await asyncio.to_thread(self._recover_expired):
+                        self._wakeup.set()
+                except Exception as e:
+                    logger.error(f"Reflection queue recovery failed: {e}")
+                await asyncio.sleep(max(self.lease_seconds / 2, self.poll_seconds))
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _worker(self):
+        while True:
+            try:
+                self._wakeup.clear()
+                claimed = await asyncio.to_thread(self._claim)
+                if claimed is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._process(*claimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reflection queue worker error: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+    def _claim(self) -> Optional[Tuple[int, int, datetime]]:
+        """
+        Atomically move the oldest due pending job to running
+
+        Returns:
+            (job id, entry id, lease end), or None when no job is due. The
+            lease end identifies this claim when the result is written.
+        """
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        db = self.session_factory()
+        try:
+            candidates = db.query(ReflectionJob.id, ReflectionJob.entry_id)\
+                .filter(ReflectionJob.status == "pending", ReflectionJob.run_after <= now)\
+                .order_by(ReflectionJob.id)\
+                .limit(self.workers)\
+                .all()
+
+            for job_id, entry_id in candidates:
+                # Only one worker (in any process) wins the status change
+                claimed = db.query(ReflectionJob)\
+                    .filter(ReflectionJob.id == job_id, ReflectionJob.status == "pending")\
+                    .update({
+                        "status": "running",
+                        "attempts": ReflectionJob.attempts + 1,
+                        "lease_until": lease_until,
+                        "updated_at": now
+                    }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    return job_id, entry_id, lease_until
+            return None
+        finally:
+            db.close()
+
+    def _recover_expired(self) -> int:
+        """Requeue (or fail, when out of attempts) running jobs whose lease ran out"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            expired = db.query(ReflectionJob)\
+                .filter(ReflectionJob.status == "running", ReflectionJob.lease_until < now)\
+                .all()
+            for job in expired:
+                job.lease_until = None
+                if job.attempts >= self.max_attempts:
+                    job.status = "failed"
+                    job.error = "Lease expired on the last attempt"
+                else:
+                    job.status = "pending"
+                    job.run_after = now
+            db.commit()
+        finally:
+            db.close()
+
+        if expired:
+            self.recovered += len(expired)
+            logger.warning(f"⚠️ Recovered {len(expired)} reflection jobs with expired leases")
+        return len(expired)
+
+    async def _process(self, job_id: int, entry_id: int, lease: datetime):
+        loaded = await asyncio.to_thread(self._load_entry, entry_id)
+        if loaded is None:
+            await asyncio.to_thread(self._finish, job_id, entry_id, lease, None, "Entry no longer exists")
+            return
+
+        content, emotion_data = loaded
+        generator = self.generator
+        if hasattr(generator, "load"):
+            # Building the generator is blocking: keep it off the provider loop
+            generator = await asyncio.to_thread(generator.load)
+
+        try:
+            result = await generator.agenerate(content, emotion_data, fallback=False)
+        except Exception as e:
+            if await asyncio.to_thread(self._retry, job_id, entry_id, lease, e):
+                return
+            # Out of attempts: store the template reflection, recorded as a fallback
+            logger.error(f"❌ Reflection for entry {entry_id} failed on every attempt, using the template: {e}")
+            result = generator.fallback(emotion_data)
+            await asyncio.to_thread(self._finish, job_id, entry_id, lease, result, str(e))
+            return
+
+        await asyncio.to_thread(self._finish, job_id, entry_id, lease, result, None)
+
+    def _load_entry(self, entry_id: int) -> Optional[Tuple[str, dict]]:
+        """Entry text and the emotion data it was analyzed with"""
+        db = self.session_factory()
+        try:
+            entry = db.query(JournalEntry).filter(JournalEntry.id == entry_id).first()
+            if entry is None:
+                return None
+            try:
+                emotion_data = json.loads(entry.emotion_scores) if entry.emotion_scores else {}
+            except (json.JSONDecodeError, TypeError):
+                emotion_data = {}
+            emotion_data['emotion'] = entry.emotion or 'neutral'
+            return entry.content, emotion_data
+        finally:
+            db.close()
+
+    def _finish(
+        self,
+        job_id: int,
+        entry_id: int,
+        lease: datetime,
+        result: Optional[dict],
+        error: Optional[str]
+    ):
+        """
+        Write the reflection to the entry and close the job, in one transaction
+
+        The job ends "done", "fallback" (template reflection) or, without a
+        result, "failed". Nothing is written unless the job still holds the
+        lease from this worker's claim: once it expired, the job may have
+        been claimed (and finished) by another worker.
+        """
+        changes = {"lease_until": None, "error": error, "updated_at": datetime.utcnow()}
+        if result is None:
+            changes["status"] = "failed"
+        else:
+            changes["status"] = "fallback" if result.get('fallback') else "done"
+            changes["result"] = json.dumps({
+                'suggestions': result.get('suggestions', []),
+                'tone': result.get('tone', 'supportive'),
+                'focus': result.get('focus', 'support'),
+                'cached': result.get('cached', False),
+                'fallback': result.get('fallback', False)
+            })
+
+        db = self.session_factory()
+        try:
+            owned = self._owned(db, job_id, lease).update(changes, synchronize_session=False)
+            if not owned:
+                db.rollback()
+                logger.warning(f"⚠️ Dropped the result for entry {entry_id}: the job's lease expired")
+                return
+            if result is not None:
+                db.query(JournalEntry)\
+                    .filter(JournalEntry.id == entry_id)\
+                    .update({"reflection": result['reflection']}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if result is None:
+            self.failed += 1
+        elif result.get('fallback'):
+            self.fallbacks += 1
+        else:
+            self.completed += 1
+        self._wake_waiters(entry_id)
+
+    def _retry(self, job_id: int, entry_id: int, lease: datetime, error: Exception) -> bool:
+        """
+        Schedule another attempt after a backoff
+
+        Returns:
+            False when the job has no attempts left (nothing is changed).
+            True once rescheduled, or when the lease was lost: the job
+            belongs to another worker then and is left alone.
+        """
+        db = self.session_factory()
+        try:
+            job = self._owned(db, job_id, lease).first()
+            if job is None:
+                return True
+            if job.attempts >= self.max_attempts:
+                return False
+            attempts = job.attempts
+            job.status = "pending"
+            job.lease_until = None
+            job.error = str(error)
+            job.run_after = datetime.utcnow() + timedelta(seconds=self.retry_seconds * 2 ** (attempts - 1))
+            db.commit()
+        finally:
+            db.close()
+
+        self.retried += 1
+        logger.warning(f"⚠️ Reflection for entry {entry_id} failed (attempt {attempts}), retrying: {error}")
+        return True
+
+    @staticmethod
+    def _owned(db: Session, job_id: int, lease: datetime):
+        """Query for the job while it is still running under the claim with this lease end"""
+        return db.query(ReflectionJob).filter(
+            ReflectionJob.id == job_id,
+            ReflectionJob.status == "running",
+            ReflectionJob.lease_until == lease
+        )
+
+    def _wake_waiters(self, entry_id: int):
+        with self._lock:
+            waiters = self._waiters.pop(entry_id, [])
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # The waiter's loop is gone
+
+
+# Singleton instance
+reflection_queue = ReflectionQueue.from_settings()
@@ -0,0 +1,170 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def available_cpus() -> List[int]:
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def torch_thread_budget() -> int:
+    """PyTorch intra-op threads for this process (TORCH_THREADS_PER_WORKER, else its share of the CPUs)"""
+    return settings.torch_threads_per_worker or max(
+        1, len(available_cpus()) // max(1, settings.web_workers)
+    )
+
+
+def plan_cpu_slices(replicas: int, threads_per_replica: int = 0) -> List[List[int]]:
+    """
+    Split the available CPUs into one contiguous slice per replica
+
+    Args:
+        replicas: Number of replicas
+        threads_per_replica: Cores per replica (0 = divide evenly)
+
+    Returns:
+        List of CPU id lists, one per replica
+    """
+    cpus = available_cpus()
+    per_replica = min(len(cpus), threads_per_replica or max(1, len(cpus) // replicas))
+
+    slices = []
+    for i in range(replicas):
+        start = (i * per_replica) % len(cpus)
+        cpu_slice = cpus[start:start + per_replica]
+        if len(cpu_slice) < per_replica:
+            cpu_slice += cpus[:per_replica - len(cpu_slice)]
+        slices.append(cpu_slice)
+    return slices
+
+
+class _Replica:
+    """One backend plus the pinned thread that runs it"""
+
+    __slots__ = ("index", "cpus", "backend", "worker", "calls", "busy_seconds")
+
+    def __init__(self, index: int, cpus: List[int], pin: bool):
+        self.index = index
+        self.cpus = cpus
+        self.backend = None
+        self.worker = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"emotion-replica-{index}",
+            initializer=_init_thread,
+            initargs=(cpus if pin else None,)
+        )
+        self.calls = 0
+        self.busy_seconds = 0.0
+
+
+def _init_thread(cpus: Optional[List[int]]):
+    """Pin the calling thread to `cpus` (if given)"""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            logger.warning(f"Could not pin replica to CPUs {cpus}: {e}")
+
+
+class ReplicaPool:
+    """
+    Pool of model replicas, each pinned to its own slice of cores
+
+    Every replica owns a dedicated worker thread pinned to its CPU slice;
+    backends are created on that thread so ONNX Runtime thread pools
+    inherit the affinity. `forward()` hands the call to whichever replica
+    is idle, so the pool can stand in for a single backend.
+
+    The per-replica thread count is passed to the factory and only isolates
+    replicas whose backend has its own thread pool (ONNX Runtime sessions,
+    `intra_op_num_threads`). PyTorch's intra-op pool is process-wide, so
+    torch replicas share a single count that the caller sets once.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[int, int], object],
+        replicas: int,
+        threads_per_replica: int = 0,
+        pin: bool = True
+    ):
+        """
+        Args:
+            factory: `factory(index, threads)` -> backend, called on the replica's thread
+            replicas: Number of replicas to create
+            threads_per_replica: Cores per replica (0 = divide evenly)
+            pin: Pin each replica's thread to its CPU slice
+        """
+        slices = plan_cpu_slices(replicas, threads_per_replica)
+        threads = len(slices[0])
+
+        self._replicas: List[_Replica] = []
+        self._idle: "queue.Queue[_Replica]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.threads_per_replica = threads
+
+        for index, cpus in enumerate(slices):
+            replica = _Replica(index, cpus, pin)
+            replica.backend = replica.worker.submit(factory, index, threads).result()
+            self._replicas.append(replica)
+            self._idle.put(replica)
+
+        self.name = self._replicas[0].backend.name
+        logger.info(
+            f"✅ Emotion replica pool ready: {replicas} x {self.name}, "
+            f"{threads} threads each"
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._replicas)
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Run a forward pass on the next idle replica"""
+        replica = self._idle.get()
+        start = time.perf_counter()
+        try:
+            return replica.worker.submit(
+                replica.backend.forward, input_ids, attention_mask
+            ).result()
+        finally:
+            with self._lock:
+                replica.calls += 1
+                replica.busy_seconds += time.perf_counter() - start
+            self._idle.put(replica)
+
+    def stats(self) -> dict:
+        """Per-replica call counts and busy time"""
+        return {
+            "replicas": self.size,
+            "threads_per_replica": self.threads_per_replica,
+            "idle": self._idle.qsize(),
+            "per_replica": [
+                {
+                    "index": r.index,
+                    "cpus": r.cpus,
+                    "calls": r.calls,
+                    "busy_ms": round(r.busy_seconds * 1000, 1)
+                }
+                for r in self._replicas
+            ]
+        }
+
+    def shutdown(self):
+        """Stop every replica's worker thread"""
+        for replica in self._replicas:
+            replica.worker.shutdown(wait=True)
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation
+
+    The first caller for a key runs the computation; callers arriving with
+    the same key while it is in flight wait for it and all receive its
+    result (or its exception). Nothing is kept once the computation
+    finishes, so this only removes duplicate concurrent work (retries,
+    double submits); caching finished results is a separate concern.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        """
+        Args:
+            name: Label used in stats
+            enabled: When False every call runs its own computation
+        """
+        self.name = name
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+
+        # Metrics
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await `func(*args, **kwargs)`, sharing it with concurrent calls for `key`
+
+        The computation runs as its own task, so a caller that is cancelled
+        (e.g. its client disconnected) does not cancel it for the others.
+
+        Args:
+            key: Hashable identity of the computation
+            func: Coroutine function
+            *args, **kwargs: Passed to `func`
+
+        Returns:
+            The shared result (exceptions propagate to every caller)
+        """
+        if not self.enabled:
+            return await func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(flight)
+            if task is None:
+                self.executed += 1
+                task = loop.create_task(func(*args, **kwargs))
+                self._tasks[flight] = task
+                task.add_done_callback(lambda done: self._finish_task(flight, done))
+            else:
+                self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """How many calls ran, and how many shared an in-flight computation"""
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "failed": self.failed,
+            "in_flight": len(self._tasks)
+        }
+
+    def _finish_task(self, flight: Tuple[asyncio.AbstractEventLoop, Hashable], task: asyncio.Task):
+        with self._lock:
+            self._tasks.pop(flight, None)
+            # Retrieve the exception so it is not reported as unhandled
+            # when every caller was cancelled
+            if task.cancelled() or task.exception() is not None:
+                self.failed += 1
@@ -3,6 +3,8 @@ from fastapi import UploadFile
 import tempfile
 import os
 from pathlib import Path
+from .executor import inference_executor, llm_executor
+from .lazy import LazyService
 
 logger = logging.getLogger(__name__)
 
@@ -96,12 +98,15 @@ class SpeechToTextService:
             from ..config import get_settings
             settings = get_settings()
             
-            with open(audio_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model=settings.whisper_model,
-                    file=audio_file,
-                    language="en"
-                )
+            def transcribe():
+                with open(audio_path, "rb") as audio_file:
+                    return self.client.audio.transcriptions.create(
+                        model=settings.whisper_model,
+                        file=audio_file,
+                        language="en"
+                    )
+            
+            transcript = await llm_executor.run(transcribe)
             return transcript.text
         except Exception as e:
             logger.error(f"OpenAI transcription error: {e}")
@@ -115,12 +120,12 @@ class SpeechToTextService:
             settings = get_settings()
             
             # Upload audio file
-            audio_file = genai.upload_file(audio_path)
+            audio_file = await llm_executor.run(genai.upload_file, audio_path)
             
             # Use Gemini for transcription (can use flash models for audio)
             model = genai.GenerativeModel(settings.gemini_model)
             
-            response = model.generate_content([
+            response = await llm_executor.run(model.generate_content, [
                 "Please transcribe this audio file. Only provide the transcription text, nothing else.",
                 audio_file
             ])
@@ -134,12 +139,12 @@ class SpeechToTextService:
     async def _transcribe_local(self, audio_path: str) -> str:
         """Transcribe using local Whisper model"""
         try:
-            result = self.local_model.transcribe(audio_path)
+            result = await inference_executor.run(self.local_model.transcribe, audio_path)
             return result["text"]
         except Exception as e:
             logger.error(f"Local Whisper error: {e}")
             raise
 
 
-# Singleton instance
-speech_to_text_service = SpeechToTextService()
\ No newline at end of file
+# Singleton instance (the backend, possibly local Whisper, loads on first use or at startup)
+speech_to_text_service = LazyService("Speech-to-text", SpeechToTextService)
\ No newline at end of file
@@ -0,0 +1,174 @@
+import logging
+import statistics
+import threading
+import time
+from typing import List, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Text repeated to build warmup inputs of a given token length
+WARMUP_TEXT = (
+    "Today I finally talked to my sister about the move, and although I was nervous "
+    "at first I felt relieved and grateful that she listened. "
+)
+
+
+class Warmup:
+    """
+    Shape-representative warmup that decides when a worker is ready
+
+    Each round runs the model over every (sequence length, batch size) in
+    the grid, plus one end-to-end batch of mixed-length texts through
+    windowing and post-processing. The first rounds absorb one-off costs
+    (allocator growth, kernel selection, ONNX Runtime arena sizing,
+    torch.compile graph capture). Rounds repeat until the median round time
+    of the last `window` rounds is within `tolerance` of the window before
+    it, or `max_rounds` / `max_seconds` is reached.
+    """
+
+    def __init__(
+        self,
+        seq_lengths: List[int],
+        batch_sizes: List[int],
+        window: int = 3,
+        tolerance: float = 0.1,
+        max_rounds: int = 12,
+        max_seconds: float = 120.0
+    ):
+        self.seq_lengths = sorted(set(seq_lengths))
+        self.batch_sizes = sorted(set(batch_sizes))
+        self.window = max(1, window)
+        self.tolerance = tolerance
+        self.max_rounds = max(2 * self.window, max_rounds)
+        self.max_seconds = max_seconds
+
+        self._done = threading.Event()
+        self.status = "pending"  # pending, warming, ready, failed
+        self.error: Optional[str] = None
+        self.round_ms: List[float] = []
+        self.stabilized = False
+        self.seconds: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls) -> "Warmup":
+        return cls(
+            settings.warmup_seq_lengths,
+            settings.warmup_batch_sizes,
+            window=settings.warmup_window,
+            tolerance=settings.warmup_tolerance,
+            max_rounds=settings.warmup_max_rounds,
+            max_seconds=settings.warmup_max_seconds
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warmup has finished (ready or failed)"""
+        return self._done.wait(timeout)
+
+    def run(self, analyzer, enabled: bool = True) -> bool:
+        """
+        Warm `analyzer` up until its latency is stable
+
+        Args:
+            analyzer: Loaded EmotionAnalyzerV2
+            enabled: When False, only check the model is loaded
+
+        Returns:
+            Whether the analyzer is ready
+        """
+        start = time.perf_counter()
+        try:
+            if analyzer.model is None:
+                raise RuntimeError("no emotion model is loaded")
+
+            self.status = "warming"
+            if enabled:
+                self._run_rounds(analyzer, start)
+            self.status = "ready"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Warmup failed: {e}")
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+
+        if self.ready:
+            detail = (
+                f"{len(self.round_ms)} rounds, p50 {self.p50_ms():.1f} ms/round"
+                + ("" if self.stabilized else ", latency not yet stable")
+            ) if self.round_ms else "warmup disabled"
+            logger.info(f"✅ Emotion model ready in {self.seconds:.2f}s ({detail})")
+        return self.ready
+
+    def _run_rounds(self, analyzer, start: float):
+        inputs = [
+            (self._sequence(analyzer, length), batch)
+            for length in self.seq_lengths
+            for batch in self.batch_sizes
+        ]
+        texts = [WARMUP_TEXT[:40], WARMUP_TEXT * 2, WARMUP_TEXT * 12, WARMUP_TEXT * 40]
+        # Replica pools hand consecutive calls to replicas in turn; warm every one
+        repeats = getattr(analyzer.backend, "size", 1)
+
+        while len(self.round_ms) < self.max_rounds:
+            round_start = time.perf_counter()
+            for sequence, batch in inputs:
+                for _ in range(repeats):
+                    analyzer._forward_sequences([sequence] * batch, batch)
+            scores, windows = analyzer._score_batch(texts, analyzer.BATCH_SIZE)
+            analyzer._build_results(texts, scores, 0.10, windows)
+            self.round_ms.append((time.perf_counter() - round_start) * 1000)
+
+            if self._is_stable():
+                self.stabilized = True
+                return
+            if time.perf_counter() - start > self.max_seconds:
+                break
+        logger.warning(f"⚠️ Warmup latency did not stabilize after {len(self.round_ms)} rounds")
+
+    def _is_stable(self) -> bool:
+        if len(self.round_ms) < 2 * self.window:
+            return False
+        recent = statistics.median(self.round_ms[-self.window:])
+        previous = statistics.median(self.round_ms[-2 * self.window:-self.window])
+        return abs(recent - previous) <= self.tolerance * previous
+
+    @staticmethod
+    def _sequence(analyzer, length: int) -> List[int]:
+        """Token ids of exactly `length` tokens (special tokens included, capped at MAX_TOKENS)"""
+        length = min(length, analyzer.MAX_TOKENS)
+        prefix, suffix = analyzer._special_prefix, analyzer._special_suffix
+        content = analyzer.tokenizer(WARMUP_TEXT, add_special_tokens=False)['input_ids']
+        room = max(1, length - len(prefix) - len(suffix))
+        body = (content * (room // len(content) + 1))[:room]
+        return prefix + body + suffix
+
+    def p50_ms(self) -> Optional[float]:
+        if not self.round_ms:
+            return None
+        return statistics.median(self.round_ms[-self.window:])
+
+    def stats(self) -> dict:
+        p50 = self.p50_ms()
+        return {
+            "status": self.status,
+            "error": self.error,
+            "rounds": len(self.round_ms),
+            "stabilized": self.stabilized,
+            "p50_round_ms": round(p50, 1) if p50 is not None else None,
+            "round_ms": [round(ms, 1) for ms in self.round_ms],
+            "seq_lengths": self.seq_lengths,
+            "batch_sizes": self.batch_sizes,
+            "seconds": round(self.seconds, 2) if self.seconds is not None else None
+        }
+
+
+# Singleton instance (readiness of this worker's startup model)
+startup_warmup = Warmup.from_settings()
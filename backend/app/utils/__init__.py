@@ -9,11 +9,14 @@ from .helpers import (
     sanitize_text,
     calculate_sentiment_score
 )
+from .sse import sse_event, SSE_HEADERS
 
 __all__ = [
     "format_date",
     "calculate_streak",
     "get_emotion_emoji",
     "sanitize_text",
-    "calculate_sentiment_score"
+    "calculate_sentiment_score",
+    "sse_event",
+    "SSE_HEADERS"
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+import json
+from typing import Any
+
+# Keep proxies (nginx) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one server-sent event
+    
+    Args:
+        event: Event name
+        data: JSON-serializable payload (datetimes are sent as strings)
+        
+    Returns:
+        The event, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration: several workers sharing one copy of the models
+
+Usage (from backend/):
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported and every model loaded in the master process before
+the workers are forked (see app/prefork.py). Check sharing with
+`python -m scripts.memory_report --pidfile gunicorn.pid`.
+"""
+
+from app.config import get_settings
+
+settings = get_settings()
+
+bind = f"{settings.host}:{settings.port}"
+workers = settings.web_workers
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+pidfile = "gunicorn.pid"
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked
+    from app.prefork import load_before_fork
+    load_before_fork()
+
+
+def post_fork(server, worker):
+    from app.prefork import after_fork
+    after_fork()
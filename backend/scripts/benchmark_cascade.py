@@ -0,0 +1,86 @@
+"""
+Cascade vs transformer-only: agreement, escalation rate and latency
+
+Runs the same texts through the analyzer with and without the lexical
+tier (emotion cache disabled) and reports how often the primary label
+agrees, overall and on the texts the lexical tier answered.
+
+Texts come from a GoEmotions TSV (first column) or a plain file with one
+text per line.
+
+Usage (from backend/):
+    python -m scripts.benchmark_cascade --data path/to/dev.tsv [--confidence 0.9]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.emotion_analyzer_v2 import emotion_analyzer_v2
+from app.services.emotion_cascade import EmotionCascade, LexicalEmotionClassifier
+
+
+def read_texts(path: str, limit: int):
+    with open(path, encoding="utf-8") as f:
+        texts = [line.rstrip("\n").split("\t")[0] for line in f if line.strip()]
+    return texts[:limit]
+
+
+def run(analyzer, texts, batch_size: int):
+    """Primary labels, models and seconds for analyzing `texts` in batches"""
+    emotions, models = [], []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        for result in analyzer.analyze_batch(texts[i:i + batch_size]):
+            emotions.append(result["emotion"])
+            models.append(result["model"])
+    return np.array(emotions), np.array(models), time.perf_counter() - start
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", required=True)
+    parser.add_argument("--model", default=settings.emotion_cascade_model_path)
+    parser.add_argument("--confidence", type=float, default=settings.emotion_cascade_confidence)
+    parser.add_argument("--max-chars", type=int, default=settings.emotion_cascade_max_chars)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    analyzer = emotion_analyzer_v2
+    analyzer.cache = None
+    texts = read_texts(args.data, args.limit)
+
+    analyzer.cascade = None
+    reference, _, transformer_seconds = run(analyzer, texts, args.batch_size)
+
+    cascade = EmotionCascade(
+        LexicalEmotionClassifier.load(args.model), analyzer.labels.tolist(),
+        confidence=args.confidence, max_chars=args.max_chars
+    )
+    analyzer.cascade = cascade
+    emotions, models, cascade_seconds = run(analyzer, texts, args.batch_size)
+
+    lexical = models == cascade.name
+    agree = emotions == reference
+    stats = cascade.stats()
+
+    print(f"\n🪜 CASCADE ({len(texts)} texts, confidence >= {args.confidence}, "
+          f"max {args.max_chars} chars)")
+    print(f"  escalation rate:        {stats['escalation_rate']:.1%}")
+    print(f"  lexical tier:           {stats['lexical_ms_per_text']:.3f} ms/text")
+    print(f"  transformer tier:       {stats['transformer_ms_per_text']:.3f} ms/text")
+    print(f"  agreement (all):        {agree.mean():.1%}")
+    if lexical.any():
+        print(f"  agreement (lexical):    {agree[lexical].mean():.1%} of {lexical.sum()} texts")
+    print(f"  transformer only:       {transformer_seconds * 1000 / len(texts):.2f} ms/text")
+    print(f"  cascade end-to-end:     {cascade_seconds * 1000 / len(texts):.2f} ms/text "
+          f"({transformer_seconds / cascade_seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Conflict cue detection: per-phrase substring loop vs compiled matcher
+
+Runs both over synthetic ~5k-character journal entries and reports the
+time per entry, plus entries where the substring loop fires only on a
+cue inside another word ("but" in "button").
+
+Usage (from backend/):
+    python -m scripts.benchmark_conflict_matcher [--entries N] [--rounds N]
+"""
+
+import argparse
+import random
+import time
+
+from app.services.conflict_matcher import CONFLICT_PHRASES, ConflictMatcher
+
+SENTENCES = [
+    "I pressed the button on the coffee machine and waited.",
+    "It was a worthwhile afternoon at the library with my sister.",
+    "I should be happy about the new job, but something feels off.",
+    "The meeting ran long and everyone seemed tired by the end of it.",
+    "Part of me wants to move to the coast, part of me wants to stay.",
+    "We walked the dog along the river and talked about the weekend.",
+    "Even though the trip went well, I keep replaying the argument.",
+    "My butler joke at dinner did not land with anyone at the table.",
+    "The rain finally stopped and the streets smelled like wet stone."
+]
+
+def make_entries(count: int, length: int = 5000, seed: int = 0):
+    """Random entries of about `length` characters built from SENTENCES"""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(count):
+        parts, size = [], 0
+        while size < length:
+            sentence = rng.choice(SENTENCES)
+            parts.append(sentence)
+            size += len(sentence) + 1
+        entries.append(" ".join(parts))
+    return entries
+
+
+def substring_loop(text: str) -> bool:
+    """The previous check: one `in` test per phrase on the lowercased text"""
+    text_lower = text.lower()
+    return any(phrase in text_lower for phrase in CONFLICT_PHRASES)
+
+
+def timed(fn, entries, rounds: int) -> float:
+    """Mean microseconds per entry"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in entries:
+            fn(text)
+    return (time.perf_counter() - start) * 1e6 / (rounds * len(entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    matcher = ConflictMatcher(CONFLICT_PHRASES)
+    entries = make_entries(args.entries)
+    # Entries where the only "cues" sit inside other words
+    decoys = [" ".join([SENTENCES[0], SENTENCES[1], SENTENCES[7]])] * len(entries)
+
+    loop_us = timed(substring_loop, entries, args.rounds)
+    any_us = timed(matcher.contains, entries, args.rounds)
+    find_us = timed(matcher.find, entries, args.rounds)
+
+    false_hits = sum(substring_loop(t) and not matcher.contains(t) for t in decoys)
+    cues = sum(len(c) for c in matcher.find_batch(entries)) / len(entries)
+
+    print(f"\n🔎 CONFLICT CUES ({len(entries)} entries x ~5k chars, {args.rounds} rounds)")
+    print(f"  substring loop (any):   {loop_us:8.1f} µs/entry")
+    print(f"  compiled matcher (any): {any_us:8.1f} µs/entry")
+    print(f"  compiled matcher (all): {find_us:8.1f} µs/entry, {cues:.1f} cues/entry with positions")
+    print(f"  in-word false positives removed: {false_hits}/{len(decoys)} decoy entries")
+
+
+if __name__ == "__main__":
+    main()
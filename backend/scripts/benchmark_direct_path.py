@@ -0,0 +1,94 @@
+"""
+Per-call overhead: transformers pipeline + dict post-processing vs direct path
+
+Both paths use the same loaded model and tokenizer, with the emotion cache
+disabled, so the difference is tokenization/pipeline plumbing and result
+building.
+
+Usage (from backend/):
+    python -m scripts.benchmark_direct_path [--rounds N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from transformers import pipeline
+
+from app.services.emotion_analyzer_v2 import emotion_analyzer_v2
+
+TEXTS = [
+    "I should be happy about this opportunity, but something inside me feels uneasy.",
+    "I'm so confused about what to do next in my life.",
+    "Today was absolutely amazing! Everything went perfectly!",
+    "I feel terrible. Nothing is going right.",
+    "I'm excited for the trip but also terrified of leaving."
+]
+
+
+def pipeline_path(classifier, text: str, threshold: float = 0.10) -> dict:
+    """The previous analyze() hot path: pipeline output -> sorted dict trees"""
+    results = classifier(text[:512])[0]
+    sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)
+    all_scores = {r['label']: round(r['score'], 4) for r in sorted_results}
+    significant = [
+        {"label": r['label'], "confidence": round(r['score'], 4)}
+        for r in sorted_results
+        if r['score'] >= threshold
+    ]
+    return {"emotion": sorted_results[0]['label'], "all_scores": all_scores,
+            "significant_emotions": significant[:5]}
+
+
+def direct_path(analyzer, text: str, threshold: float = 0.10) -> dict:
+    """The current analyze() hot path minus the cache"""
+    scores, windows = analyzer._score_batch([text], analyzer.BATCH_SIZE)
+    return analyzer._build_results([text], scores, threshold, windows)[0]
+
+
+def measure(fn, rounds: int):
+    """Mean ms per call and allocated blocks per call"""
+    for text in TEXTS:
+        fn(text)  # warm up
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in TEXTS:
+            fn(text)
+    ms = (time.perf_counter() - start) * 1000 / (rounds * len(TEXTS))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for text in TEXTS:
+        fn(text)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename")
+                 if stat.count_diff > 0) / len(TEXTS)
+
+    return ms, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    analyzer = emotion_analyzer_v2
+    analyzer.cache = None
+    classifier = pipeline(
+        "text-classification", model=analyzer.model, tokenizer=analyzer.tokenizer,
+        top_k=None, device=-1
+    )
+
+    pipe_ms, pipe_blocks = measure(lambda t: pipeline_path(classifier, t), args.rounds)
+    direct_ms, direct_blocks = measure(lambda t: direct_path(analyzer, t), args.rounds)
+
+    print(f"\n⏱️  PER-CALL COST ({len(TEXTS)} texts x {args.rounds} rounds, backend: {analyzer.backend.name})")
+    print(f"  pipeline: {pipe_ms:8.2f} ms   ~{pipe_blocks:8.0f} live allocations")
+    print(f"  direct:   {direct_ms:8.2f} ms   ~{direct_blocks:8.0f} live allocations")
+    print(f"  saved:    {pipe_ms - direct_ms:8.2f} ms per call ({pipe_ms / direct_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
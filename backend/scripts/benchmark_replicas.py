@@ -0,0 +1,91 @@
+"""
+Throughput vs replica count for the emotion model
+
+For each replica count, builds a ReplicaPool over the loaded model (or its
+ONNX export) and drives it with concurrent callers for a fixed duration.
+
+Usage (from backend/):
+    python -m scripts.benchmark_replicas [--replicas 1 2 4 8] [--backend torch|onnx]
+"""
+
+import argparse
+import threading
+import time
+
+from app.config import get_settings
+from app.services.emotion_analyzer_v2 import emotion_analyzer_v2
+from app.services.inference_backends import TorchBackend, OnnxBackend, export_onnx
+from app.services.replica_pool import ReplicaPool, available_cpus
+
+TEXTS = [
+    "I should be happy about this opportunity, but something inside me feels uneasy.",
+    "Today was absolutely amazing! Everything went perfectly!",
+    "I'm so confused about what to do next in my life. Work has been piling up and "
+    "I keep going back and forth on whether to take the new job or stay where I am.",
+    "I feel terrible. Nothing is going right."
+]
+
+
+def run_load(pool: ReplicaPool, features, callers: int, seconds: float) -> float:
+    """Forward passes per second with `callers` threads hammering the pool"""
+    stop = time.perf_counter() + seconds
+    counts = [0] * callers
+
+    def caller(i):
+        n = 0
+        while time.perf_counter() < stop:
+            f = features[n % len(features)]
+            pool.forward(f["input_ids"], f["attention_mask"])
+            n += 1
+        counts[i] = n
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin replicas to cores")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    analyzer = emotion_analyzer_v2
+    features = [analyzer.tokenizer([t], return_tensors="np") for t in TEXTS]
+
+    if args.backend == "onnx":
+        model_path = export_onnx(
+            analyzer.model, analyzer.tokenizer, settings.onnx_model_dir,
+            analyzer._model_revision(), quantize=settings.onnx_quantize
+        )
+
+        def factory(index, threads):
+            return OnnxBackend(model_path, intra_op_threads=threads, quantized=settings.onnx_quantize)
+    else:
+        def factory(index, threads):
+            return TorchBackend(analyzer.model)
+
+    cpus = len(available_cpus())
+    print(f"\n📈 REPLICA SCALING ({args.backend}, {cpus} cores, {args.seconds:.0f}s per point)")
+    print(f"  {'replicas':>8}  {'threads':>7}  {'req/s':>8}  {'speedup':>7}")
+
+    baseline = None
+    for replicas in args.replicas:
+        pool = ReplicaPool(factory, replicas, pin=not args.no_pin)
+        throughput = run_load(pool, features, callers=replicas * 2, seconds=args.seconds)
+        pool.shutdown()
+
+        baseline = baseline or throughput
+        print(f"  {replicas:>8}  {pool.threads_per_replica:>7}  {throughput:>8.1f}  "
+              f"{throughput / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Shared vs private memory of a multi-worker MindMate server
+
+Reads /proc/<pid>/smaps_rollup (Linux) for the gunicorn master and each
+worker. Shared pages (model weights loaded before fork, memory-mapped
+safetensors) count once in PSS; private pages are each worker's own.
+
+Usage (from backend/, while `gunicorn -c gunicorn.conf.py app.main:app` runs):
+    python -m scripts.memory_report [--pidfile gunicorn.pid | --pid MASTER_PID]
+"""
+
+import argparse
+import os
+from typing import Dict, List
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_rollup(pid: int) -> Dict[str, int]:
+    """smaps_rollup fields of `pid`, in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def children(pid: int) -> List[int]:
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids.extend(int(child) for child in f.read().split())
+    return sorted(pids)
+
+
+def mib(kib: int) -> str:
+    return f"{kib / 1024:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pidfile", default="gunicorn.pid")
+    parser.add_argument("--pid", type=int, help="Master pid (overrides --pidfile)")
+    args = parser.parse_args()
+
+    if args.pid:
+        master = args.pid
+    else:
+        with open(args.pidfile) as f:
+            master = int(f.read().strip())
+    workers = children(master)
+
+    print(f"\n🧠 MEMORY (MiB): master {master}, {len(workers)} workers")
+    print(f"  {'process':<16}{'RSS':>9}{'PSS':>9}{'shared':>9}{'private':>9}")
+
+    totals = dict.fromkeys(FIELDS, 0)
+    for label, pid in [("master", master)] + [(f"worker {pid}", pid) for pid in workers]:
+        values = read_rollup(pid)
+        for field in FIELDS:
+            totals[field] += values.get(field, 0)
+        shared = values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)
+        private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+        print(f"  {label:<16}{mib(values.get('Rss', 0))}{mib(values.get('Pss', 0))}"
+              f"{mib(shared)}{mib(private)}")
+
+    private = totals["Private_Clean"] + totals["Private_Dirty"]
+    print(f"\n  sum of RSS (what `ps` suggests):  {mib(totals['Rss']).strip()} MiB")
+    print(f"  sum of PSS (actually used):       {mib(totals['Pss']).strip()} MiB")
+    print(f"  private to some process:          {mib(private).strip()} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Parity and latency check: ONNX Runtime (INT8) vs PyTorch for GoEmotions
+
+Usage (from backend/):
+    python -m scripts.onnx_parity [--no-quantize] [--threads N]
+"""
+
+import argparse
+import time
+
+from app.config import get_settings
+from app.services.emotion_analyzer_v2 import emotion_analyzer_v2
+from app.services.inference_backends import (
+    PARITY_TEXTS, TorchBackend, OnnxBackend, export_onnx, check_parity
+)
+
+
+def time_backend(backend, tokenizer, texts, rounds: int = 20) -> float:
+    """Mean milliseconds per single-text forward pass"""
+    features = [tokenizer([t], return_tensors="np") for t in texts]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for f in features:
+            backend.forward(f["input_ids"], f["attention_mask"])
+    return (time.perf_counter() - start) * 1000 / (rounds * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-quantize", action="store_true", help="Compare the fp32 export")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    analyzer = emotion_analyzer_v2
+    tokenizer = analyzer.tokenizer
+    quantize = not args.no_quantize
+
+    torch_backend = TorchBackend(analyzer.model)
+    model_path = export_onnx(
+        analyzer.model, tokenizer, settings.onnx_model_dir,
+        analyzer._model_revision(), quantize=quantize
+    )
+    onnx_backend = OnnxBackend(model_path, intra_op_threads=args.threads, quantized=quantize)
+
+    max_diff = check_parity(torch_backend, onnx_backend, tokenizer, analyzer._activation)
+    status = "OK" if max_diff <= settings.onnx_parity_tolerance else "FAIL"
+
+    print(f"\n🧪 ONNX PARITY ({onnx_backend.name}, {model_path})")
+    print(f"  Max per-label score difference: {max_diff:.5f} "
+          f"(tolerance {settings.onnx_parity_tolerance}) -> {status}")
+
+    torch_ms = time_backend(torch_backend, tokenizer, PARITY_TEXTS)
+    onnx_ms = time_backend(onnx_backend, tokenizer, PARITY_TEXTS)
+
+    print(f"\n⏱️  LATENCY (batch of 1, mean over {len(PARITY_TEXTS)} texts)")
+    print(f"  torch:          {torch_ms:.2f} ms")
+    print(f"  {onnx_backend.name:<15} {onnx_ms:.2f} ms  ({torch_ms / onnx_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Train the lexical tier of the emotion cascade on GoEmotions
+
+Expects the GoEmotions release layout (github.com/google-research/google-research,
+goemotions/data): train.tsv and dev.tsv with `text<TAB>label_ids<TAB>comment_id`
+rows, and emotions.txt with one label name per line in id order.
+
+Reports dev micro-F1 and, for a range of cascade thresholds, how many
+dev texts the lexical tier would answer and how often its top label is
+one of the gold labels.
+
+Usage (from backend/):
+    python -m scripts.train_lexical_classifier --data-dir path/to/goemotions/data
+"""
+
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.emotion_cascade import LexicalEmotionClassifier
+
+
+def read_split(path: str):
+    """(texts, label id lists) from a GoEmotions TSV file"""
+    texts, label_ids = [], []
+    with open(path, encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            texts.append(row[0])
+            label_ids.append([int(i) for i in row[1].split(",")])
+    return texts, label_ids
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--output", default=settings.emotion_cascade_model_path)
+    parser.add_argument("--min-df", type=int, default=2)
+    parser.add_argument("--C", type=float, default=4.0)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.data_dir, "emotions.txt"), encoding="utf-8") as f:
+        labels = [line.strip() for line in f if line.strip()]
+    train_texts, train_ids = read_split(os.path.join(args.data_dir, "train.tsv"))
+    dev_texts, dev_ids = read_split(os.path.join(args.data_dir, "dev.tsv"))
+
+    print(f"Training on {len(train_texts)} texts, {len(labels)} labels...")
+    start = time.perf_counter()
+    classifier = LexicalEmotionClassifier.train(
+        train_texts, train_ids, labels, min_df=args.min_df, C=args.C
+    )
+    print(f"  trained in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    scores = classifier.predict_scores(dev_texts)
+    ms_per_text = (time.perf_counter() - start) * 1000 / len(dev_texts)
+
+    gold = np.zeros_like(scores, dtype=bool)
+    for row, ids in enumerate(dev_ids):
+        gold[row, ids] = True
+    predicted = scores >= 0.5
+    tp = np.count_nonzero(predicted & gold)
+    f1 = 2 * tp / (np.count_nonzero(predicted) + np.count_nonzero(gold))
+
+    top = scores.argmax(axis=1)
+    top_correct = gold[np.arange(len(top)), top]
+    confidence = scores.max(axis=1)
+
+    print(f"\n📊 DEV ({len(dev_texts)} texts, {ms_per_text:.3f} ms/text)")
+    print(f"  micro-F1 @0.5: {f1:.3f}")
+    print(f"  {'threshold':>9}  {'answered':>8}  {'top-1 in gold':>13}")
+    for threshold in (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95):
+        answered = confidence >= threshold
+        accuracy = top_correct[answered].mean() if answered.any() else 0.0
+        print(f"  {threshold:>9.2f}  {answered.mean():>7.1%}  {accuracy:>12.1%}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    classifier.save(args.output)
+    print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
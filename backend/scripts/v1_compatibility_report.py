@@ -0,0 +1,94 @@
+"""
+V1 compatibility: GoEmotions-derived Ekman labels vs the legacy v1 model
+
+The v1 endpoints now collapse the GoEmotions scores onto the seven Ekman
+labels instead of running j-hartmann/emotion-english-distilroberta-base.
+This loads the legacy model once, runs both over the same texts and
+reports how often the primary label differs, with a confusion table.
+
+Texts come from a GoEmotions TSV (first column) or a plain file with one
+text per line; without --data a small built-in set of journal entries is
+used.
+
+Usage (from backend/):
+    python -m scripts.v1_compatibility_report [--data path/to/dev.tsv] [--limit N]
+"""
+
+import argparse
+from collections import Counter
+
+from transformers import pipeline
+
+from app.services.emotion_analyzer import emotion_analyzer
+
+LEGACY_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+SAMPLE_TEXTS = [
+    "I got the job! I can't stop smiling.",
+    "I miss my grandmother so much today.",
+    "My landlord ignored my messages again and I'm furious.",
+    "I have a presentation tomorrow and my stomach is in knots.",
+    "The fridge smelled so bad I almost threw up.",
+    "Wait, they moved the wedding to next week?",
+    "Went to the store, then cooked dinner.",
+    "Thank you so much for being there for me.",
+    "I feel happy about the promotion but also scared of the responsibility.",
+    "I don't understand why I feel this way.",
+    "I'm so proud of how far I've come this year.",
+    "I regret saying that to her, it was unfair.",
+    "Honestly this whole thing is a bit annoying.",
+    "I realized I had been holding my breath the whole time.",
+    "Nothing much happened today."
+]
+
+
+def read_texts(path: str, limit: int):
+    with open(path, encoding="utf-8") as f:
+        texts = [line.rstrip("\n").split("\t")[0] for line in f if line.strip()]
+    return texts[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--show", type=int, default=10, help="Disagreements to print")
+    args = parser.parse_args()
+
+    texts = read_texts(args.data, args.limit) if args.data else SAMPLE_TEXTS
+
+    print(f"Loading legacy model {LEGACY_MODEL}...")
+    legacy = pipeline("text-classification", model=LEGACY_MODEL, top_k=None)
+
+    confusion = Counter()
+    disagreements = []
+    for text in texts:
+        legacy_scores = legacy(text[:512])[0]
+        expected = max(legacy_scores, key=lambda x: x["score"])["label"]
+        derived = emotion_analyzer.analyze(text)["emotion"]
+
+        confusion[(expected, derived)] += 1
+        if expected != derived:
+            disagreements.append((text, expected, derived))
+
+    agree = len(texts) - len(disagreements)
+    labels = emotion_analyzer.EKMAN_LABELS
+
+    print(f"\n🔁 V1 COMPATIBILITY ({len(texts)} texts)")
+    print(f"  same primary label:  {agree / len(texts):.1%}")
+    print(f"  different:           {len(disagreements) / len(texts):.1%}")
+
+    print("\n  rows: legacy model, columns: GoEmotions-derived")
+    print("  " + " " * 9 + "".join(f"{label[:7]:>8}" for label in labels))
+    for expected in labels:
+        row = "".join(f"{confusion[(expected, derived)]:>8}" for derived in labels)
+        print(f"  {expected:>9}{row}")
+
+    if disagreements:
+        print(f"\n  first {min(args.show, len(disagreements))} disagreements:")
+        for text, expected, derived in disagreements[:args.show]:
+            print(f"    {expected:>8} -> {derived:<8} {text[:70]}")
+
+
+if __name__ == "__main__":
+    main()
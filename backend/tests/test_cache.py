@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from app.services.cache import TieredCache, content_key, normalize_text
+from app.services.emotion_analyzer_v2 import EmotionAnalyzerV2
+
+
+class TestTieredCache:
+    """Test the LRU + SQLite cache"""
+
+    def test_memory_lru_eviction(self):
+        """Test the in-memory tier is bounded and evicts least recently used"""
+        cache = TieredCache("test", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test entries are served from disk by a fresh cache instance"""
+        db_path = str(tmp_path / "cache.db")
+        TieredCache("test", db_path=db_path).set("key", {"scores": [0.1, 0.9]})
+
+        cache = TieredCache("test", db_path=db_path)
+
+        assert cache.get("key") == {"scores": [0.1, 0.9]}
+        assert cache.get("key") == {"scores": [0.1, 0.9]}
+        stats = cache.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_reopen_uses_a_new_connection(self, tmp_path):
+        """Test a reopened cache (as in a forked worker) keeps reading and writing the same file"""
+        cache = TieredCache("test", db_path=str(tmp_path / "cache.db"))
+        cache.set("before", 1)
+        inherited = cache._db
+
+        cache.reopen()
+        cache.set("after", 2)
+
+        assert cache._db is not inherited
+        fresh = TieredCache("test", db_path=str(tmp_path / "cache.db"))
+        assert fresh.get("before") == 1
+        assert fresh.get("after") == 2
+
+    def test_disk_tier_opens_on_first_use(self, tmp_path):
+        """Test constructing a cache does not touch its SQLite file"""
+        db_path = tmp_path / "cache.db"
+        cache = TieredCache("test", db_path=str(db_path))
+
+        assert not db_path.exists()
+        assert cache.stats()["persistent"]
+        assert cache.get("key") is None
+        assert db_path.exists()
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        """Test two caches on the same file do not see each other's keys"""
+        db_path = str(tmp_path / "cache.db")
+        TieredCache("one", db_path=db_path).set("key", 1)
+
+        assert TieredCache("two", db_path=db_path).get("key") is None
+
+    def test_entries_expire_after_ttl(self, tmp_path, monkeypatch):
+        """Test expired entries are misses in both tiers"""
+        now = [1000.0]
+        monkeypatch.setattr("app.services.cache.time.time", lambda: now[0])
+        cache = TieredCache("test", db_path=str(tmp_path / "cache.db"), ttl_seconds=60)
+        cache.set("key", "reply")
+
+        now[0] += 30
+        assert cache.get("key") == "reply"
+
+        now[0] += 31
+        assert cache.get("key") is None
+        assert TieredCache("test", db_path=str(tmp_path / "cache.db"), ttl_seconds=60).get("key") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_disk_tier_is_size_bounded(self, tmp_path):
+        """Test the oldest rows are pruned beyond max_disk_entries"""
+        db_path = str(tmp_path / "cache.db")
+        cache = TieredCache("test", max_entries=1, db_path=db_path, max_disk_entries=10)
+        cache.PRUNE_EVERY = 5
+        for i in range(40):
+            cache.set(f"key {i}", i)
+
+        rows = cache._db.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = 'test'").fetchone()[0]
+        assert rows <= 10 + cache.PRUNE_EVERY
+        assert cache.get("key 39") == 39
+        assert cache.get("key 0") is None
+
+    def test_content_key_normalization(self):
+        """Test whitespace variants of a text share a key"""
+        assert normalize_text("  I feel\n great  ") == "I feel great"
+        assert content_key("model", normalize_text("I  feel great")) == \
+               content_key("model", normalize_text("I feel great"))
+        assert content_key("model-a", "text") != content_key("model-b", "text")
+
+    def test_analyzer_scores_original_text(self):
+        """Test normalization only shapes the cache key, not the text the model scores"""
+        analyzer = EmotionAnalyzerV2.__new__(EmotionAnalyzerV2)
+        analyzer.labels = ["joy", "neutral"]
+        analyzer.cache = TieredCache(namespace="emotion", max_entries=8, db_path=None)
+        analyzer._cache_key = lambda text: content_key("model", text)
+        scored = []
+
+        def score_uncached(texts, batch_size):
+            scored.extend(texts)
+            n = len(texts)
+            return np.full((n, 2), 0.5, dtype=np.float32), np.ones(n, dtype=np.int64), np.zeros(n, dtype=bool)
+
+        analyzer._score_uncached = score_uncached
+        analyzer._get_scores(["I  feel\n great"], batch_size=8)
+        analyzer._get_scores(["I feel great"], batch_size=8)
+
+        assert scored == ["I  feel\n great"]  # The variant was a cache hit
+
+        analyzer.cache = None
+        analyzer._get_scores(["  spaced   out  "], batch_size=8)
+        assert scored[-1] == "  spaced   out  "
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,50 @@
+import pytest
+from app.services.conflict_matcher import ConflictMatcher
+
+
+class TestConflictMatcher:
+    """Test the compiled conflict cue matcher"""
+
+    def test_word_boundaries(self):
+        """Test cues inside other words are not matched"""
+        matcher = ConflictMatcher()
+
+        assert matcher.find("I pressed the button, it was worthwhile") == []
+        assert not matcher.contains("My butler is stillborn")
+        assert matcher.contains("Fine, but tired")
+
+    def test_cues_and_positions(self):
+        """Test every cue is reported with its offsets, longest phrase first"""
+        matcher = ConflictMatcher()
+        text = "Even though I got in, I DON’T KNOW.\nOn the other   hand, part of me is proud"
+
+        cues = matcher.find(text)
+
+        assert [c["cue"] for c in cues] == [
+            "even though", "don't know", "on the other hand", "part of me"
+        ]
+        assert [text[c["start"]:c["end"]] for c in cues] == [
+            "Even though", "DON’T KNOW", "On the other   hand", "part of me"
+        ]
+
+    def test_offsets_survive_case_folding(self):
+        """Test offsets index the original text when lowercasing changes its length"""
+        matcher = ConflictMatcher()
+        text = "İstanbul was lovely but exhausting"
+
+        cues = matcher.find(text)
+
+        assert cues == [{"cue": "but", "start": 20, "end": 23}]
+        assert text[20:23] == "but"
+
+    def test_find_batch(self):
+        """Test batches are matched in input order"""
+        matcher = ConflictMatcher(["but", "torn"])
+
+        results = matcher.find_batch(["torn", "calm", "happy but tired"])
+
+        assert [[c["cue"] for c in r] for r in results] == [["torn"], [], ["but"]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from app.services.emotion_analyzer import EKMAN_MAPPING, EmotionAnalyzer
+from app.services.emotion_result import EmotionResult
+
+GOEMOTIONS_LABELS = np.array(sorted(sum(EKMAN_MAPPING.values(), [])))
+
+
+def make_result(**label_scores):
+    scores = np.zeros(len(GOEMOTIONS_LABELS), dtype=np.float32)
+    for label, score in label_scores.items():
+        scores[GOEMOTIONS_LABELS.tolist().index(label)] = score
+    order = np.argsort(-scores, kind="stable")
+    return EmotionResult(GOEMOTIONS_LABELS, scores, order, 1, model="test")
+
+
+class TestEkmanMapping:
+    """Test the v1 (Ekman) response derived from GoEmotions scores"""
+
+    def test_every_goemotions_label_is_mapped_once(self):
+        """Test the 28 GoEmotions labels map to exactly one Ekman label each"""
+        mapped = sum(EKMAN_MAPPING.values(), [])
+        assert len(mapped) == len(set(mapped)) == 28
+
+    def test_group_maximum_and_normalization(self):
+        """Test each Ekman label takes its strongest member and scores sum to 1"""
+        analyzer = EmotionAnalyzer(analyzer=None)
+
+        result = analyzer.from_v2(make_result(gratitude=0.6, joy=0.2, nervousness=0.2))
+
+        assert result["emotion"] == "joy"
+        assert result["all_scores"]["joy"] == 0.75
+        assert result["all_scores"]["fear"] == 0.25
+        assert list(result["all_scores"])[:2] == ["joy", "fear"]
+
+    def test_fallback_result(self):
+        """Test a fallback v2 result gives the neutral v1 fallback"""
+        analyzer = EmotionAnalyzer(analyzer=None)
+
+        result = analyzer.from_v2(EmotionResult.fallback())
+
+        assert result == {"emotion": "neutral", "confidence": 0.0, "all_scores": {}}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,71 @@
+import warnings
+import numpy as np
+import pytest
+from app.services.emotion_cascade import EmotionCascade, LexicalEmotionClassifier
+
+LABELS = ["joy", "sadness", "fear", "neutral"]
+TRAIN = [
+    ("I am so happy today", [0]), ("What a wonderful happy day", [0]),
+    ("I feel so sad and alone", [1]), ("Crying all night, so sad", [1]),
+    ("I am scared of the dark", [2]), ("Terrified and scared again", [2]),
+    ("The bus came at noon", [3]), ("I read the report at noon", [3])
+] * 5
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    texts, label_ids = zip(*TRAIN)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return LexicalEmotionClassifier.train(list(texts), list(label_ids), LABELS, min_df=1)
+
+
+class TestLexicalClassifier:
+    """Test the lexical tier of the cascade"""
+
+    def test_folded_weights_match_pipeline(self, classifier):
+        """Test the folded linear scorer reproduces the sklearn probabilities"""
+        texts = ["so happy", "scared and sad", "nothing here"]
+
+        expected = classifier.pipeline.predict_proba(texts)
+
+        np.testing.assert_allclose(classifier.predict_scores(texts), expected, atol=1e-5)
+
+    def test_save_and_load(self, classifier, tmp_path):
+        """Test a saved model scores the same after loading"""
+        path = str(tmp_path / "lexical.joblib")
+        classifier.save(path)
+
+        loaded = LexicalEmotionClassifier.load(path)
+
+        assert loaded.labels == LABELS
+        np.testing.assert_allclose(
+            loaded.predict_scores(["so happy"]), classifier.predict_scores(["so happy"])
+        )
+
+
+class TestEmotionCascade:
+    """Test routing between the lexical tier and the transformer"""
+
+    def test_routing_and_label_order(self, classifier):
+        """Test confident short texts are answered, in the transformer's label order"""
+        transformer_labels = ["neutral", "fear", "joy", "sadness", "surprise"]
+        cascade = EmotionCascade(classifier, transformer_labels, confidence=0.5, max_chars=40)
+
+        scores, answered = cascade.route([
+            "I am so happy today",
+            "I am so happy today " * 5,  # Too long: always escalates
+        ])
+
+        assert answered.tolist() == [True, False]
+        assert scores[0].argmax() == transformer_labels.index("joy")
+        assert scores[0, transformer_labels.index("surprise")] == 0.0
+
+        cascade.record_escalation(1, 0.05)
+        stats = cascade.stats()
+        assert stats["escalation_rate"] == 0.5
+        assert stats["transformer_ms_per_text"] == 50.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
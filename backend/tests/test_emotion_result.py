@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pytest
+from app.services.emotion_result import EmotionResult
+
+
+def make_result(**overrides):
+    """EmotionResult over three labels, joy first"""
+    labels = np.array(["anger", "joy", "sadness"])
+    scores = np.array([0.2, 0.71234, 0.05], dtype=np.float32)
+    fields = dict(
+        labels=labels, scores=scores, order=np.argsort(-scores), n_significant=2,
+        mixed_type="layered", is_mixed=True, valence_scores=(0.7, 0.3, 0.0),
+        overall="positive", emotional_state="mixed_positive", model="test"
+    )
+    fields.update(overrides)
+    return EmotionResult(**fields)
+
+
+class TestEmotionResult:
+    """Test the compact emotion result type"""
+
+    def test_reads_like_the_analysis_dict(self):
+        """Test Mapping access gives the analysis dict fields"""
+        result = make_result()
+
+        assert result["emotion"] == "joy"
+        assert result["confidence"] == 0.7123
+        assert list(result["all_scores"]) == ["joy", "anger", "sadness"]
+        assert result["significant_emotions"] == [
+            {"label": "joy", "confidence": 0.7123},
+            {"label": "anger", "confidence": 0.2}
+        ]
+        assert result["valence"]["overall"] == "positive"
+        assert result.get("missing", "default") == "default"
+        assert "sentences" not in result
+        assert not hasattr(result, "__dict__")
+
+    def test_serializers(self):
+        """Test response and storage formats carry the same fields"""
+        result = make_result(sentences=[])
+
+        response = result.to_response()
+        stored = json.loads(result.to_storage())
+
+        assert response.emotion == "joy"
+        assert response.valence.overall == "positive"
+        assert response.sentences == []
+        assert "emotion" not in stored
+        assert stored["all_scores"] == result["all_scores"]
+        assert stored["sentences"] == []
+
+    def test_fallback(self):
+        """Test the fallback result matches the old fallback dict"""
+        result = EmotionResult.fallback()
+
+        assert result["emotion"] == "neutral"
+        assert result["confidence"] == 0.0
+        assert result["all_scores"] == {}
+        assert result["complexity"] == "unknown"
+        assert result["windows"] == 0
+        assert result["model"] == "fallback"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
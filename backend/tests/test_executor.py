@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.executor import BoundedExecutor
+
+
+class TestBoundedExecutor:
+    """Test the bounded executor used for blocking inference and LLM calls"""
+
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_workers calls run at once"""
+        executor = BoundedExecutor("test", max_workers=2)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def blocking_call(i):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return i
+
+        async def run():
+            return await asyncio.gather(*(executor.run(blocking_call, i) for i in range(6)))
+
+        assert asyncio.run(run()) == list(range(6))
+        assert peak[0] == 2
+        assert executor.stats()["completed"] == 6
+
+    def test_event_loop_stays_responsive(self):
+        """Test the loop keeps running while blocking calls are in flight"""
+        executor = BoundedExecutor("test", max_workers=1)
+
+        async def run():
+            slow = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            latency = time.perf_counter() - start
+            await slow
+            return latency
+
+        assert asyncio.run(run()) < 0.1
+
+    def test_exceptions_propagate(self):
+        """Test errors raised in the pool reach the awaiting caller"""
+        executor = BoundedExecutor("test", max_workers=1)
+
+        def failing_call():
+            raise ValueError("bad input")
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(failing_call))
+        assert executor.stats()["failed"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -79,6 +79,73 @@ class TestGoEmotions:
         assert reflection is not None
         assert reflection['tone'] in ['validating', 'empathetic', 'supportive']
     
+    def test_batch_matches_single(self):
+        """Test batched analysis matches per-text analysis, in input order"""
+        texts = [
+            "I am so happy and excited today! Everything is wonderful!",
+            "ok",
+            "This is terrible and I feel awful",
+            "I don't know how to feel about this situation, part of me is relieved but I also miss it"
+        ]
+        batch_results = emotion_analyzer_v2.analyze_batch(texts)
+        
+        assert len(batch_results) == len(texts)
+        assert batch_results[1]['model'] == 'fallback'
+        
+        for text, batch_result in zip(texts, batch_results):
+            single_result = emotion_analyzer_v2.analyze(text)
+            assert batch_result['emotion'] == single_result['emotion']
+            assert abs(batch_result['confidence'] - single_result['confidence']) < 1e-3
+    
+    def test_long_entry_uses_windows(self):
+        """Test long entries are scored over several token windows"""
+        short_result = emotion_analyzer_v2.analyze("I feel a little anxious about tomorrow.")
+        assert short_result['windows'] == 1
+        
+        long_text = " ".join(
+            ["Work was stressful and I felt overwhelmed, but dinner with friends made me happy."] * 60
+        )
+        long_result = emotion_analyzer_v2.analyze(long_text)
+        
+        assert long_result['windows'] > 1
+        assert long_result['emotion'] in long_result['all_scores']
+    
+    def test_sentence_segmentation(self):
+        """Test entries are split into trimmed sentence spans"""
+        text = 'I got the job!  I should be happy, but "I am scared." ...\nWhat now?'
+        spans = emotion_analyzer_v2.split_sentences(text)
+        
+        assert [text[start:end] for start, end in spans] == [
+            "I got the job!",
+            'I should be happy, but "I am scared."',
+            "What now?"
+        ]
+    
+    def test_sentence_breakdown(self):
+        """Test the per-sentence timeline is returned in order"""
+        text = "I got the promotion today. But I am terrified of failing at it."
+        result = emotion_analyzer_v2.analyze_batch([text], sentences=True)[0]
+        
+        assert [s['index'] for s in result['sentences']] == [0, 1]
+        assert result['sentences'][1]['text'] == "But I am terrified of failing at it."
+        assert all(s['emotion'] in result['all_scores'] for s in result['sentences'])
+    
+    def test_bulk_postprocessing_matches_rows(self):
+        """Test a score matrix gives the same results as its rows one by one"""
+        import numpy as np
+        
+        rng = np.random.default_rng(0)
+        scores = rng.random((8, len(emotion_analyzer_v2.labels))).astype(np.float32) ** 4
+        texts = ["I love it but it scares me"] * 8
+        
+        bulk = emotion_analyzer_v2._build_results(texts, scores, 0.10)
+        rows = [
+            emotion_analyzer_v2._build_results([text], row[None, :], 0.10)[0]
+            for text, row in zip(texts, scores)
+        ]
+        
+        assert bulk == rows
+    
     def test_27_emotions_available(self):
         """Test that all 27 GoEmotions are available"""
         from app.services.emotion_analyzer_v2 import EmotionAnalyzerV2
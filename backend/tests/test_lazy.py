@@ -0,0 +1,79 @@
+import threading
+import pytest
+from app.services.lazy import LazyService, load_all_in_background
+
+
+class Widget:
+    created = 0
+
+    def __init__(self):
+        Widget.created += 1
+        self.value = 1
+
+    def double(self):
+        return self.value * 2
+
+
+class TestLazyService:
+    """Test lazily created service singletons"""
+
+    def test_created_on_first_use_only(self):
+        """Test the factory runs once, on first attribute access"""
+        Widget.created = 0
+        service = LazyService("widget", Widget)
+
+        assert not service.is_loaded
+        assert Widget.created == 0
+
+        assert service.double() == 2
+        assert service.value == 1
+        assert Widget.created == 1
+        assert service.is_loaded
+        assert service.load_seconds is not None
+
+    def test_attribute_assignment_is_forwarded(self):
+        """Test setting an attribute on the proxy sets it on the instance"""
+        service = LazyService("widget", Widget)
+
+        service.value = 5
+
+        assert service.load().value == 5
+        assert service.double() == 10
+
+    def test_concurrent_first_use_creates_one_instance(self):
+        """Test racing threads share a single instance"""
+        Widget.created = 0
+        service = LazyService("widget", Widget)
+        start = threading.Barrier(8)
+
+        def use():
+            start.wait()
+            service.double()
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Widget.created == 1
+
+    def test_background_loading(self):
+        """Test background loading loads every service, survives failures and runs `after`"""
+        def broken():
+            raise RuntimeError("no model")
+
+        good = LazyService("widget", Widget)
+        bad = LazyService("broken", broken)
+        done = threading.Event()
+
+        load_all_in_background([bad, good], after=done.set).join(timeout=5)
+
+        assert done.is_set()
+        assert good.is_loaded
+        assert not bad.is_loaded
+        assert LazyService.stats()["broken"]["loaded"] is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,250 @@
+import asyncio
+import time
+import pytest
+from app.services.cache import TieredCache
+from app.services.llm_providers import LLMProvider, provider_loop
+from app.services.provider_router import ProviderRouter
+from app.services.reflection_generator import ReflectionGenerator
+from app.services.reflection_generator_v2 import ReflectionGeneratorV2
+
+REPLY = "REFLECTION: That sounds like a lot to carry.\n\nTIPS:\n- Take a short walk outside\n- Write down one small win\n- Call a friend tonight"
+
+
+class FakeProvider(LLMProvider):
+    """Provider that answers after a fixed delay and records its calls"""
+
+    name = "fake"
+
+    def __init__(self, delay=0.2):
+        super().__init__("fake-model")
+        self.delay = delay
+        self.calls = []
+
+    async def _complete(self, prompt, system, temperature, max_tokens):
+        self.calls.append((asyncio.get_running_loop(), temperature))
+        await asyncio.sleep(self.delay)
+        return REPLY
+
+
+class DownProvider(LLMProvider):
+    """Provider whose every call fails"""
+
+    name = "down"
+
+    def __init__(self):
+        super().__init__("down-model")
+
+    async def _complete(self, prompt, system, temperature, max_tokens):
+        raise ConnectionError("provider down")
+
+
+def emotion_data(label="sadness"):
+    return {
+        "emotion": label,
+        "emotional_state": "negative",
+        "significant_emotions": [{"label": label, "confidence": 0.8}]
+    }
+
+
+class TestProviderLoop:
+    """Test provider calls run concurrently on the shared provider loop"""
+
+    def test_many_calls_overlap(self):
+        """Test a hundred in-flight calls take about one round trip"""
+        provider = FakeProvider(delay=0.2)
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(*(provider.complete(f"prompt {i}") for i in range(100)))
+            return time.perf_counter() - start
+
+        assert asyncio.run(run()) < 1.5
+        assert len(provider.calls) == 100
+        assert all(loop is provider_loop.loop for loop, _ in provider.calls)
+
+    def test_caller_loop_is_not_blocked(self):
+        """Test the calling event loop keeps running during a provider call"""
+        provider = FakeProvider(delay=0.2)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(provider.complete("prompt"), ticker())
+
+        asyncio.run(run())
+        assert len(ticks) == 5
+
+    def test_clients_survive_separate_event_loops(self):
+        """Test calls from different caller loops share the provider loop"""
+        provider = FakeProvider(delay=0.01)
+
+        asyncio.run(provider.complete("first"))
+        asyncio.run(provider.complete("second"))
+
+        assert provider.calls[0][0] is provider.calls[1][0]
+
+
+    def test_provider_without_complete_is_rejected(self):
+        """Test an incomplete provider fails when it is created, not on its first request"""
+        class Incomplete(LLMProvider):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete("model")
+
+class TestReflectionGenerators:
+    """Test agenerate() and the sync generate() wrapper"""
+
+    def test_v2_agenerate_parses_provider_reply(self):
+        """Test the async path returns a parsed reflection"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = FakeProvider(delay=0.01)
+
+        result = asyncio.run(generator.agenerate("I had a hard week at work", emotion_data()))
+
+        assert result["reflection"] == "That sounds like a lot to carry."
+        assert len(result["suggestions"]) == 3
+        assert generator.provider.calls[0][1] == 0.75
+
+    def test_v2_coalesces_only_identical_prompts(self):
+        """Test concurrent calls share a reply only when their prompts match"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = FakeProvider(delay=0.05)
+        text = "I had a hard week at work"
+        other = {**emotion_data(), "has_confusion": True}  # Same labels, different prompt
+
+        async def run():
+            return await asyncio.gather(
+                generator.agenerate(text, emotion_data()),
+                generator.agenerate(text, emotion_data()),
+                generator.agenerate(text, other)
+            )
+
+        asyncio.run(run())
+
+        assert len(generator.provider.calls) == 2
+
+    def test_v2_sync_wrapper(self):
+        """Test generate() blocks until the async call finishes"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = FakeProvider(delay=0.01)
+
+        result = generator.generate("I had a hard week at work", emotion_data())
+
+        assert result["suggestions"][0] == "Take a short walk outside"
+
+    def test_v2_strict_mode_raises_provider_errors(self):
+        """Test fallback=False surfaces provider errors instead of the template"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = DownProvider()
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(generator.agenerate("I can't stop worrying about work", emotion_data(), fallback=False))
+        assert asyncio.run(generator.agenerate("I can't stop worrying about work", emotion_data()))["fallback"]
+
+    def test_v2_without_provider_uses_templates(self):
+        """Test the template fallback when no API key is configured"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = None
+
+        result = generator.generate("I don't know what to think", emotion_data("confusion"))
+
+        assert result["tone"] == "supportive"
+        assert result["suggestions"]
+
+    def test_v1_uses_selected_provider(self):
+        """Test the v1 generator calls the active provider asynchronously"""
+        generator = ReflectionGenerator()
+        generator.cache = None
+        provider = FakeProvider(delay=0.01)
+        generator.providers = {"openai": provider}
+        generator.router = ProviderRouter(generator.providers)
+
+        result = asyncio.run(generator.agenerate("I had a hard week at work", "sadness"))
+
+        assert result["reflection"] == "That sounds like a lot to carry."
+        assert len(result["suggestions"]) == 2
+        assert generator.active_provider == "openai"
+
+    def test_v1_without_provider_falls_back(self):
+        """Test the static reflection when no provider is available"""
+        generator = ReflectionGenerator()
+        generator.cache = None
+        generator.providers = {}
+        generator.router = None
+
+        result = generator.generate("I had a hard week at work", "sadness")
+
+        assert result["suggestions"] == ["Take a few deep breaths", "Be kind to yourself"]
+
+
+
+class TestReflectionCache:
+    """Test provider replies are reused for identical prompts"""
+
+    def test_second_identical_request_is_cached(self, tmp_path):
+        """Test the provider is called once and the repeat is flagged as cached"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = TieredCache("reflection", db_path=str(tmp_path / "cache.db"), ttl_seconds=60)
+        generator.provider = FakeProvider(delay=0.01)
+
+        first = generator.generate("I had a hard week at work", emotion_data())
+        second = generator.generate("I had a hard week at work", emotion_data())
+
+        assert len(generator.provider.calls) == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["reflection"] == first["reflection"]
+
+    def test_key_covers_provider_model_and_sampling(self):
+        """Test a different model or temperature is a different cache entry"""
+        provider = FakeProvider()
+        other = FakeProvider()
+        other.model = "other-model"
+
+        key = provider.cache_key("prompt", "system", 0.7, 300)
+        assert key == FakeProvider().cache_key("prompt", "system", 0.7, 300)
+        assert key != other.cache_key("prompt", "system", 0.7, 300)
+        assert key != provider.cache_key("prompt", "system", 0.75, 300)
+        assert key != provider.cache_key("prompt other", "system", 0.7, 300)
+
+    def test_fallbacks_are_not_cached(self, tmp_path):
+        """Test a failed provider call leaves nothing behind in the cache"""
+        generator = ReflectionGenerator()
+        generator.cache = TieredCache("reflection", db_path=str(tmp_path / "cache.db"))
+        generator.providers = {"openai": FakeProvider()}
+        generator.providers["openai"]._complete = None  # Calling it raises
+        generator.router = ProviderRouter(generator.providers)
+
+        result = generator.generate("I had a hard week at work", "sadness")
+
+        assert result["cached"] is False
+        assert generator.cache.stats()["writes"] == 0
+
+    def test_stream_replays_cached_reply(self, tmp_path):
+        """Test a cached reply is streamed as one token event"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = TieredCache("reflection", db_path=str(tmp_path / "cache.db"))
+        generator.provider = FakeProvider(delay=0.01)
+        generator.generate("I had a hard week at work", emotion_data())
+
+        async def run():
+            return [event async for event in generator.astream("I had a hard week at work", emotion_data())]
+
+        events = asyncio.run(run())
+
+        assert events[0] == ("token", {"text": "That sounds like a lot to carry.\n\n"})
+        assert events[-1][1]["cached"] is True
+        assert len(generator.provider.calls) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
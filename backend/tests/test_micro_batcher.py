@@ -0,0 +1,121 @@
+import asyncio
+import time
+import pytest
+from app.services.micro_batcher import MicroBatcher
+
+
+def make_batch_fn(calls):
+    """analyze_batch stand-in that records the batches it receives"""
+    def analyze_batch(texts, threshold=0.10, sentences=False):
+        calls.append(list(texts))
+        return [{"emotion": text, "threshold": threshold} for text in texts]
+    return analyze_batch
+
+
+class TestMicroBatcher:
+    """Test the dynamic micro-batcher"""
+
+    def test_concurrent_requests_are_batched(self):
+        """Test concurrent calls share batches and get their own results"""
+        calls = []
+        batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=4, max_wait_ms=50)
+        texts = [f"text {i}" for i in range(10)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.analyze(t) for t in texts))
+
+        results = asyncio.run(run())
+
+        assert [r["emotion"] for r in results] == texts
+        assert len(calls) == 3
+        assert all(len(batch) <= 4 for batch in calls)
+
+        stats = batcher.stats()
+        assert stats["requests"] == 10
+        assert stats["batches"] == 3
+        assert stats["max_batch_size_seen"] == 4
+
+    def test_lone_request_is_dispatched_at_once(self):
+        """Test a request arriving at an idle batcher does not wait max_wait_ms"""
+        calls = []
+        batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=16, max_wait_ms=1000)
+
+        result = asyncio.run(batcher.analyze("alone"))
+
+        assert result["emotion"] == "alone"
+        assert calls == [["alone"]]
+        assert batcher.stats()["max_queue_wait_ms"] < 500
+
+    def test_requests_batch_while_a_batch_runs(self):
+        """Test requests arriving during a running batch are collected into the next one"""
+        calls = []
+        record = make_batch_fn(calls)
+
+        def slow_batch(texts, threshold=0.10, sentences=False):
+            time.sleep(0.05)
+            return record(texts, threshold, sentences)
+
+        batcher = MicroBatcher(slow_batch, max_batch_size=8, max_wait_ms=200)
+
+        async def run():
+            first = asyncio.ensure_future(batcher.analyze("first"))
+            await asyncio.sleep(0.01)  # "first" is running now
+            rest = await asyncio.gather(*(batcher.analyze(f"text {i}") for i in range(3)))
+            return [await first] + rest
+
+        results = asyncio.run(run())
+
+        assert len(results) == 4
+        assert calls == [["first"], ["text 0", "text 1", "text 2"]]
+
+    def test_thresholds_are_grouped(self):
+        """Test requests with different thresholds get the right threshold"""
+        calls = []
+        batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=8, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.analyze("a", threshold=0.1),
+                batcher.analyze("b", threshold=0.3)
+            )
+
+        first, second = asyncio.run(run())
+
+        assert first["threshold"] == 0.1
+        assert second["threshold"] == 0.3
+
+    def test_sentence_requests_are_grouped(self):
+        """Test sentence-level requests are not mixed into plain batches"""
+        groups = []
+
+        def analyze_batch(texts, threshold=0.10, sentences=False):
+            groups.append((list(texts), sentences))
+            return [{"emotion": text, "sentences": sentences} for text in texts]
+
+        batcher = MicroBatcher(analyze_batch, max_batch_size=8, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.analyze("a"),
+                batcher.analyze("b", sentences=True),
+                batcher.analyze("c")
+            )
+
+        results = asyncio.run(run())
+
+        assert [r["sentences"] for r in results] == [False, True, False]
+        assert sorted(groups) == [(["a", "c"], False), (["b"], True)]
+
+    def test_errors_propagate_to_callers(self):
+        """Test a failing batch raises in every waiting caller"""
+        def failing_batch(texts, threshold=0.10, sentences=False):
+            raise RuntimeError("model exploded")
+
+        batcher = MicroBatcher(failing_batch, max_batch_size=4, max_wait_ms=5)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(batcher.analyze("boom"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+import json
+import os
+import pytest
+import torch
+from safetensors.torch import save_file
+from app.services import model_store
+from app.services.emotion_analyzer_v2 import EmotionAnalyzerV2
+
+
+class TinyModel(torch.nn.Module):
+    base_model_prefix = "encoder"
+
+    def __init__(self):
+        super().__init__()
+        self.encoder = torch.nn.Linear(4, 3)
+        self.classifier = torch.nn.Linear(3, 2)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store.settings, "local_model_store", str(tmp_path))
+    return tmp_path
+
+
+class TestModelStore:
+    """Test the local model store"""
+
+    def test_map_safetensors_matches_saved_tensors(self, tmp_path):
+        """Test memory-mapped tensors equal the saved ones, including odd dtypes"""
+        tensors = {
+            "weight": torch.randn(3, 5),
+            "half": torch.randn(7).half(),
+            "ids": torch.arange(6, dtype=torch.int64).reshape(2, 3)
+        }
+        path = str(tmp_path / "model.safetensors")
+        save_file(tensors, path)
+
+        mapped = model_store.map_safetensors(path)
+
+        assert set(mapped) == set(tensors)
+        for name, tensor in tensors.items():
+            assert torch.equal(mapped[name], tensor)
+
+    def test_share_weights_points_parameters_at_the_file(self, tmp_path):
+        """Test every matching parameter is swapped for the mapped tensor"""
+        model = TinyModel()
+        save_file({name: p.detach().clone() for name, p in model.named_parameters()},
+                  str(tmp_path / "model.safetensors"))
+        expected = model.classifier(model.encoder(torch.ones(1, 4)))
+
+        mapped, total = model_store.share_weights(model, str(tmp_path))
+
+        assert (mapped, total) == (4, 4)
+        assert torch.equal(model.classifier(model.encoder(torch.ones(1, 4))), expected)
+
+    def test_local_model_path_and_verify(self, store):
+        """Test a stored model is found, verified, and modifications are caught"""
+        name = "org/tiny-model"
+        assert model_store.local_model_path(name) is None
+        assert model_store.verify(name)
+
+        path = model_store.model_dir(name)
+        os.makedirs(path)
+        save_file({"w": torch.zeros(2)}, os.path.join(path, "model.safetensors"))
+        with open(os.path.join(path, "config.json"), "w") as f:
+            f.write("{}")
+        files = {n: model_store._sha256(os.path.join(path, n)) for n in model_store._model_files(path)}
+        with open(os.path.join(path, model_store.MANIFEST_NAME), "w") as f:
+            json.dump({"model": name, "revision": "abc", "files": files}, f)
+
+        assert model_store.local_model_path(name) == path
+        assert model_store.verify(name) == []
+
+        with open(os.path.join(path, "config.json"), "w") as f:
+            f.write('{"changed": true}')
+        assert model_store.verify(name) == ["checksum mismatch for config.json"]
+
+    def test_offline_by_default_with_a_store(self, store, monkeypatch):
+        """Test a configured store means offline unless the hub is explicitly allowed"""
+        monkeypatch.setattr(model_store.settings, "offline_models", None)
+        assert model_store.offline_mode()
+
+        monkeypatch.setattr(model_store.settings, "offline_models", False)
+        assert not model_store.offline_mode()
+
+        monkeypatch.setattr(model_store.settings, "offline_models", None)
+        monkeypatch.setattr(model_store.settings, "local_model_store", "")
+        assert not model_store.offline_mode()
+
+    def test_missing_model_fails_fast_offline(self, store, monkeypatch):
+        """Test a model missing from the store raises instead of downloading it"""
+        monkeypatch.setattr(model_store.settings, "offline_models", None)
+        analyzer = EmotionAnalyzerV2.__new__(EmotionAnalyzerV2)
+
+        with pytest.raises(FileNotFoundError, match="fetch-models"):
+            analyzer._load_weights("org/not-fetched")
+
+    def test_missing_model_stops_startup_offline(self, store, monkeypatch):
+        """Test the startup check raises for a model missing from the store, only when offline"""
+        monkeypatch.setattr(model_store.settings, "offline_models", None)
+        with pytest.raises(FileNotFoundError, match="org--not-fetched"):
+            model_store.require_models(["org/not-fetched"])
+
+        monkeypatch.setattr(model_store.settings, "offline_models", False)
+        model_store.require_models(["org/not-fetched"])
+
+    def test_no_store_means_online(self, monkeypatch):
+        """Test an empty store path disables offline mode and store lookups"""
+        monkeypatch.setattr(model_store.settings, "offline_models", None)
+        monkeypatch.setattr(model_store.settings, "local_model_store", "")
+
+        assert not model_store.offline_mode()
+        assert model_store.local_model_path("org/not-fetched") is None
+        model_store.require_models(["org/not-fetched"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
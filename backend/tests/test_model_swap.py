@@ -0,0 +1,129 @@
+import time
+import numpy as np
+import pytest
+from app.services import model_swap
+from app.services.lazy import LazyService
+from app.services.model_swap import ModelSwapper
+
+LABELS = np.array(["joy", "sadness"])
+
+
+class FakeResult(dict):
+    def __init__(self, emotion):
+        super().__init__(emotion=emotion)
+        self.labels = LABELS
+        self.scores = np.array([1.0, 0.0] if emotion == "joy" else [0.0, 1.0])
+
+
+class FakeAnalyzer:
+    """Stand-in analyzer: every text gets `emotion`"""
+
+    def __init__(self, model_name, fallback=True):
+        if model_name == "broken":
+            raise OSError("no such model")
+        self.model_name = model_name
+        self.model = object()
+        self.emotion = "sadness" if "sad" in model_name else "joy"
+
+    def _model_revision(self):
+        return "test"
+
+    def analyze_batch(self, texts, threshold=0.10, **kwargs):
+        return [FakeResult(self.emotion) for _ in texts]
+
+
+def wait_for(swapper, *statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while swapper.status not in statuses:
+        assert time.time() < deadline, f"still {swapper.status}"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def swapper(monkeypatch):
+    monkeypatch.setattr(model_swap, "EmotionAnalyzerV2", FakeAnalyzer)
+    monkeypatch.setattr(model_swap.settings, "warmup_enabled", False)
+    service = LazyService("fake analyzer", lambda: FakeAnalyzer("active-model"))
+    return ModelSwapper(service)
+
+
+class TestModelSwapper:
+    """Test hot-swapping the active emotion model"""
+
+    def test_swap_without_shadow(self, swapper):
+        """Test a candidate is promoted as soon as it is loaded"""
+        old = swapper.service.load()
+
+        swapper.start("new-model")
+        wait_for(swapper, "promoted")
+
+        assert swapper.service.model_name == "new-model"
+        assert old.model_name == "active-model"  # Holders of the old analyzer are unaffected
+        assert swapper.stats()["history"][-1]["from"] == "active-model"
+
+    def test_shadow_scoring_stats_and_promotion(self, swapper):
+        """Test sampled live traffic is compared before the swap"""
+        active = swapper.service.load()
+        swapper.start("new-model", shadow_rate=1.0, shadow_samples=4)
+        wait_for(swapper, "shadowing")
+
+        for _ in range(2):
+            texts = ["a", "b"]
+            swapper.observe(texts, 0.1, active.analyze_batch(texts), 0.02)
+            time.sleep(0.05)
+        wait_for(swapper, "promoted")
+
+        shadow = swapper.stats()["shadow"]
+        assert shadow["samples"] == 4
+        assert shadow["label_agreement"] == 1.0
+        assert shadow["mean_score_diff"] == 0.0
+
+    def test_low_agreement_holds_the_candidate(self, swapper):
+        """Test auto-promotion waits for a manual promote when labels disagree"""
+        active = swapper.service.load()
+        swapper.start("sad-model", shadow_rate=1.0, shadow_samples=2, min_agreement=0.9)
+        wait_for(swapper, "shadowing")
+
+        swapper.observe(["a", "b"], 0.1, active.analyze_batch(["a", "b"]), 0.02)
+        wait_for(swapper, "ready")
+
+        assert swapper.service.model_name == "active-model"
+        assert swapper.stats()["shadow"]["label_agreement"] == 0.0
+
+        swapper.promote()
+        assert swapper.service.model_name == "sad-model"
+
+    def test_score_diff_averages_compared_samples_only(self, swapper):
+        """Test samples without comparable scores do not dilute the mean score difference"""
+        swapper.start("sad-model", shadow_rate=1.0, shadow_samples=2, min_agreement=0.9)
+        wait_for(swapper, "shadowing")
+
+        skipped = FakeResult("joy")
+        skipped.scores = np.array([])  # e.g. answered without transformer scores
+        swapper.observe(["a", "b"], 0.1, [FakeResult("joy"), skipped], 0.02)
+        wait_for(swapper, "ready")
+
+        shadow = swapper.stats()["shadow"]
+        assert shadow["samples"] == 2
+        assert shadow["compared"] == 1
+        assert shadow["mean_score_diff"] == 1.0
+
+        deadline = time.time() + 5.0
+        while swapper._shadow_busy:  # Released right after the stats update
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+    def test_failed_load_and_cancel(self, swapper):
+        """Test a model that fails to load is reported and never promoted"""
+        swapper.start("broken")
+        wait_for(swapper, "failed")
+
+        assert "no such model" in swapper.stats()["error"]
+        with pytest.raises(RuntimeError):
+            swapper.promote()
+
+        assert swapper.cancel()["status"] == "idle"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
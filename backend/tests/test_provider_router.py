@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import provider_router
+from app.services.cache import TieredCache
+from app.services.llm_providers import LLMProvider, complete_cached
+from app.services.provider_router import CircuitBreaker, ProviderRouter, ProviderUnavailable
+from app.services.reflection_generator import reflection_generator
+
+
+class ScriptedProvider(LLMProvider):
+    """Provider with a fixed delay that can be told to fail"""
+
+    def __init__(self, name, delay=0.01, fail=False):
+        super().__init__(f"{name}-model")
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _complete(self, prompt, system, temperature, max_tokens):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return f"answer from {self.name}"
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    """Short hedge delay and a small failure burst for the tests"""
+    monkeypatch.setattr(provider_router.settings, "llm_hedge_default_delay_seconds", 0.05)
+    monkeypatch.setattr(provider_router.settings, "llm_hedge_min_delay_seconds", 0.0)
+    monkeypatch.setattr(provider_router.settings, "llm_breaker_failures", 3)
+    monkeypatch.setattr(provider_router.settings, "llm_breaker_cooldown_seconds", 30.0)
+
+
+def make_router(primary_delay=0.01, secondary_delay=0.01, primary_fails=False, secondary_fails=False):
+    primary = ScriptedProvider("gemini", primary_delay, primary_fails)
+    secondary = ScriptedProvider("openai", secondary_delay, secondary_fails)
+    return ProviderRouter({"gemini": primary, "openai": secondary}), primary, secondary
+
+
+class TestHedging:
+    """Test hedged requests and failover"""
+
+    def test_healthy_primary_answers_alone(self):
+        """Test a fast primary is not hedged"""
+        router, primary, secondary = make_router()
+
+        assert asyncio.run(router.complete("prompt")) == "answer from gemini"
+        assert secondary.calls == 0
+        assert router.stats()["hedges"] == 0
+
+    def test_slow_primary_is_hedged(self):
+        """Test the secondary is fired after the hedge delay and the first answer wins"""
+        router, primary, secondary = make_router(primary_delay=1.0)
+
+        async def run():
+            answer = await router.complete("prompt")
+            await asyncio.sleep(0.05)  # Let the cancelled call unwind
+            return answer
+
+        assert asyncio.run(run()) == "answer from openai"
+        stats = router.stats()
+        assert stats["hedges"] == 1
+        assert stats["providers"]["openai"]["hedges_won"] == 1
+        assert stats["providers"]["gemini"]["cancelled"] == 1
+        assert primary.cancelled == 1
+
+    def test_hedge_loser_still_records_latency(self):
+        """Test a cancelled primary adds its elapsed time to the latency window"""
+        router, primary, secondary = make_router(primary_delay=1.0)
+
+        async def run():
+            await router.complete("prompt")
+            await asyncio.sleep(0.05)  # Let the cancelled call unwind
+
+        asyncio.run(run())
+
+        latencies = list(router.health["gemini"].latencies)
+        assert len(latencies) == 1
+        assert 0.05 <= latencies[0] < 1.0
+
+    def test_primary_can_still_win_after_hedging(self):
+        """Test a hedge does not discard a primary answer that arrives first"""
+        router, primary, secondary = make_router(primary_delay=0.08, secondary_delay=1.0)
+
+        assert asyncio.run(router.complete("prompt")) == "answer from gemini"
+        assert router.stats()["hedges"] == 1
+
+    def test_failed_primary_fails_over(self):
+        """Test an error moves the request to the secondary without waiting"""
+        router, primary, secondary = make_router(primary_fails=True)
+
+        assert asyncio.run(router.complete("prompt")) == "answer from openai"
+        assert router.stats()["failovers"] == 1
+        assert len(router.health["gemini"].latencies) == 1
+
+    def test_all_failing_raises_last_error(self):
+        """Test the caller sees an error when every provider fails"""
+        router, _, _ = make_router(primary_fails=True, secondary_fails=True)
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(router.complete("prompt"))
+
+    def test_hedge_delay_follows_p95(self):
+        """Test the hedge delay tracks the primary's recent p95 latency"""
+        router, _, _ = make_router()
+        router.health["gemini"].latencies.extend([0.1] * 95 + [1.0] * 5)
+
+        assert router.hedge_delay("gemini") == pytest.approx(0.145, abs=0.01)
+
+    def test_cache_key_follows_primary(self):
+        """Test cache lookups use the key of the provider the request is meant for"""
+        router, primary, _ = make_router()
+        assert router.cache_key("p", None, 0.7, 300) == primary.cache_key("p", None, 0.7, 300)
+
+    def test_fallback_reply_is_cached_under_its_own_provider(self):
+        """Test a reply from the fallback is never served as the primary's"""
+        router, primary, secondary = make_router(primary_fails=True)
+        cache = TieredCache(namespace="reflection", max_entries=8)
+
+        text, cached = asyncio.run(complete_cached(router, "p", cache))
+
+        assert (text, cached) == ("answer from openai", False)
+        assert cache.get(primary.cache_key("p", None, 0.7, 300)) is None
+        assert cache.get(secondary.cache_key("p", None, 0.7, 300)) == "answer from openai"
+
+
+class TestCircuitBreaker:
+    """Test failure bursts take a provider out of rotation"""
+
+    def test_burst_opens_circuit(self):
+        """Test the primary is skipped once its circuit is open"""
+        router, primary, secondary = make_router(primary_fails=True)
+
+        for _ in range(3):
+            asyncio.run(router.complete("prompt"))
+        assert router.stats()["providers"]["gemini"]["circuit"]["state"] == "open"
+
+        asyncio.run(router.complete("prompt"))
+        assert primary.calls == 3
+        assert secondary.calls == 4
+
+    def test_all_open_raises_unavailable(self):
+        """Test requests fail fast when every circuit is open"""
+        router, _, _ = make_router(primary_fails=True, secondary_fails=True)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                asyncio.run(router.complete("prompt"))
+
+        with pytest.raises(ProviderUnavailable):
+            asyncio.run(router.complete("prompt"))
+
+    def test_half_open_allows_one_trial(self, monkeypatch):
+        """Test one trial request after the cooldown closes or re-opens the circuit"""
+        now = [100.0]
+        monkeypatch.setattr(provider_router.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(failures=2, window_seconds=10, cooldown_seconds=30)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        now[0] += 31
+        assert breaker.allow()
+        assert not breaker.allow()  # Trial already running
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        now[0] += 31
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.trips == 2  # Opened, then re-opened by the failed trial
+
+    def test_half_open_trial_is_claimed_once_across_threads(self, monkeypatch):
+        """Test concurrent callers from several threads get a single trial slot"""
+        now = [100.0]
+        monkeypatch.setattr(provider_router.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(failures=1, window_seconds=10, cooldown_seconds=30)
+        breaker.record_failure()
+        now[0] += 31
+
+        barrier = threading.Barrier(16)
+        allowed = []
+
+        def claim():
+            barrier.wait()
+            allowed.append(breaker.allow())
+
+        threads = [threading.Thread(target=claim) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert allowed.count(True) == 1
+
+    def test_failures_outside_window_do_not_trip(self, monkeypatch):
+        """Test only failures within the window count as a burst"""
+        now = [100.0]
+        monkeypatch.setattr(provider_router.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(failures=2, window_seconds=10)
+
+        breaker.record_failure()
+        now[0] += 11
+        breaker.record_failure()
+
+        assert breaker.state == "closed"
+
+
+class TestStreamingFailover:
+    """Test streams fall over before their first chunk"""
+
+    def test_stream_fails_over(self):
+        """Test a provider failing before any chunk is replaced by the next one"""
+        router, _, _ = make_router(primary_fails=True)
+
+        async def run():
+            return [chunk async for chunk in router.stream("prompt")]
+
+        assert asyncio.run(run()) == ["answer from openai"]
+        assert router.stats()["providers"]["gemini"]["failures"] == 1
+
+
+class TestProviderSettingsEndpoint:
+    """Test per-provider stats on /settings/provider"""
+
+    def test_stats_are_exposed(self, monkeypatch):
+        """Test the router stats are part of the provider response"""
+        router, _, _ = make_router()
+        asyncio.run(router.complete("prompt"))
+        generator = reflection_generator.load()
+        monkeypatch.setattr(generator, "providers", dict(router.health))
+        monkeypatch.setattr(generator, "router", router)
+
+        data = TestClient(app).get("/settings/provider").json()
+
+        stats = data["provider_stats"]["reflection"]
+        assert stats["providers"]["gemini"]["successes"] == 1
+        assert stats["providers"]["openai"]["circuit"]["state"] == "closed"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, engine
+from app.models import JournalEntry, ReflectionJob
+from app.services.llm_providers import LLMProvider
+from app.services.micro_batcher import emotion_batcher
+from app.services.reflection_generator_v2 import ReflectionGeneratorV2, reflection_generator_v2
+from app.services.reflection_queue import ReflectionQueue, reflection_queue
+
+REPLY = "REFLECTION: That sounds like a lot to carry.\n\nTIPS:\n- Rest a little\n- Talk to someone"
+
+
+class FakeResult(dict):
+    """Stand-in for EmotionResult"""
+
+    def to_storage_dict(self):
+        return dict(self)
+
+
+EMOTION = FakeResult(emotion="nervousness", confidence=0.7, emotional_state="negative", significant_emotions=[])
+
+
+class FlakyProvider(LLMProvider):
+    """Provider that is down for its first `failures` calls, then answers REPLY"""
+
+    name = "fake"
+
+    def __init__(self, failures=0):
+        super().__init__("fake-model")
+        self.failures = failures
+        self.prompts = []
+
+    async def _complete(self, prompt, system, temperature, max_tokens):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        if len(self.prompts) <= self.failures:
+            raise ConnectionError("provider down")
+        return REPLY
+
+
+def make_generator(failures=0):
+    """The real v2 generator in front of a FlakyProvider"""
+    generator = ReflectionGeneratorV2()
+    generator.cache = None
+    generator.provider = FlakyProvider(failures)
+    return generator
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    db_engine = create_engine(
+        f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=db_engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+def add_entry(sessions, queue, content="I feel overwhelmed by work lately"):
+    db = sessions()
+    try:
+        entry = JournalEntry(
+            content=content,
+            emotion="nervousness",
+            emotion_scores=json.dumps({"emotional_state": "negative", "significant_emotions": []})
+        )
+        db.add(entry)
+        db.flush()
+        queue.enqueue(db, entry.id)
+        db.commit()
+        return entry.id
+    finally:
+        db.close()
+
+
+def make_queue(sessions, generator, **options):
+    options = {"workers": 2, "retry_seconds": 0.01, "lease_seconds": 5.0, "poll_seconds": 0.05, **options}
+    return ReflectionQueue(generator=generator, session_factory=sessions, **options)
+
+
+class TestReflectionQueue:
+    """Test the database-backed reflection job queue"""
+
+    def run_job(self, sessions, generator, **options):
+        queue = make_queue(sessions, generator, **options)
+        entry_id = add_entry(sessions, queue)
+        queue.notify()
+        try:
+            return queue, asyncio.run(queue.wait_for(entry_id, timeout=5))
+        finally:
+            queue.stop()
+
+    def test_job_writes_reflection_to_entry(self, sessions):
+        """Test a queued job generates the reflection and stores it with its metadata"""
+        generator = make_generator()
+        queue, state = self.run_job(sessions, generator)
+
+        assert state["status"] == "done"
+        assert state["reflection"] == "That sounds like a lot to carry."
+        assert state["reflection_metadata"]["suggestions"] == ["Rest a little", "Talk to someone"]
+        assert state["reflection_metadata"]["fallback"] is False
+        assert state["attempts"] == 1
+
+        # Emotion data is rebuilt from the stored row
+        assert "nervousness" in generator.provider.prompts[0]
+        assert queue.stats()["jobs"]["done"] == 1
+        assert queue.enqueued == 1
+
+    def test_provider_error_is_retried(self, sessions):
+        """Test a provider error is retried with backoff instead of storing the template"""
+        generator = make_generator(failures=1)
+        queue, state = self.run_job(sessions, generator)
+
+        assert state["status"] == "done"
+        assert state["reflection"] == "That sounds like a lot to carry."
+        assert state["attempts"] == 2
+        assert queue.retried == 1
+        assert len(generator.provider.prompts) == 2
+
+    def test_template_after_max_attempts(self, sessions):
+        """Test a provider that stays down ends the job with the template, recorded as a fallback"""
+        generator = make_generator(failures=10)
+        queue, state = self.run_job(sessions, generator, max_attempts=2)
+
+        assert state["status"] == "fallback"
+        assert state["attempts"] == 2
+        assert state["error"] == "provider down"
+        assert state["reflection"]  # Template reflection
+        assert state["reflection_metadata"]["fallback"] is True
+        assert len(generator.provider.prompts) == 2
+        assert (queue.fallbacks, queue.completed) == (1, 0)
+
+    def test_expired_lease_is_recovered_after_restart(self, sessions):
+        """Test a job claimed by a worker that died is picked up by a new queue"""
+        dead = make_queue(sessions, make_generator())
+        entry_id = add_entry(sessions, dead)
+        assert dead._claim() is not None
+
+        # The process died mid-job: the lease runs out
+        db = sessions()
+        db.query(ReflectionJob).update({"lease_until": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        queue = make_queue(sessions, make_generator())
+        assert queue.has_unfinished_jobs()
+        queue.start()
+        try:
+            state = asyncio.run(queue.wait_for(entry_id, timeout=5))
+        finally:
+            queue.stop()
+
+        assert state["status"] == "done"
+        assert state["attempts"] == 2
+        assert queue.recovered == 1
+        assert not queue.has_unfinished_jobs()
+
+    def test_stale_worker_cannot_overwrite_result(self, sessions):
+        """Test a worker whose lease expired drops its result once the job was claimed again"""
+        queue = make_queue(sessions, make_generator())
+        entry_id = add_entry(sessions, queue)
+        job_id, _, stale_lease = queue._claim()
+
+        db = sessions()
+        db.query(ReflectionJob).update({"lease_until": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+        queue._recover_expired()
+        _, _, lease = queue._claim()
+
+        queue._finish(job_id, entry_id, lease, {"reflection": "current"}, None)
+        queue._finish(job_id, entry_id, stale_lease, {"reflection": "stale"}, None)
+        # A late error from the stale worker does not requeue the job either
+        assert queue._retry(job_id, entry_id, stale_lease, ConnectionError("late"))
+
+        state = queue.status(entry_id)
+        assert (state["status"], state["reflection"]) == ("done", "current")
+        assert queue.completed == 1
+
+    def test_rolled_back_job_is_not_counted(self, sessions):
+        """Test enqueued jobs are counted on notify(), after the caller committed"""
+        queue = make_queue(sessions, make_generator())
+        db = sessions()
+        entry = JournalEntry(content="Never saved", emotion="neutral")
+        db.add(entry)
+        db.flush()
+        queue.enqueue(db, entry.id)
+        db.rollback()
+        db.close()
+
+        assert queue.enqueued == 0
+        assert queue.stats()["jobs"]["pending"] == 0
+
+    def test_job_is_claimed_once(self, sessions):
+        """Test concurrent claims of one pending job have a single winner"""
+        queue = make_queue(sessions, make_generator())
+        add_entry(sessions, queue)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            claims = list(pool.map(lambda _: queue._claim(), range(8)))
+
+        assert len([claim for claim in claims if claim is not None]) == 1
+
+    def test_wait_times_out_while_pending(self, sessions):
+        """Test the long poll answers with the pending status once its timeout passes"""
+        queue = make_queue(sessions, make_generator())
+        entry_id = add_entry(sessions, queue)
+
+        start = time.perf_counter()
+        state = asyncio.run(queue.wait_for(entry_id, timeout=0.2))
+
+        assert state["status"] == "pending"
+        assert 0.2 <= time.perf_counter() - start < 2
+        assert asyncio.run(queue.wait_for(entry_id + 1)) is None
+
+
+class TestDeferredJournalEndpoints:
+    """Test /journal/create with deferred reflections"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        async def analyze(text, threshold=0.10, sentences=False):
+            return EMOTION
+
+        monkeypatch.setattr(emotion_batcher, "analyze", analyze)
+        monkeypatch.setattr(reflection_generator_v2.load(), "provider", FlakyProvider())
+        monkeypatch.setattr(reflection_generator_v2.load(), "cache", None)
+        Base.metadata.create_all(bind=engine)
+        yield TestClient(app)
+        reflection_queue.stop()
+
+    def test_create_answers_before_reflection(self, client):
+        """Test a deferred entry is saved with 202 and its reflection arrives through the long poll"""
+        response = client.post(
+            "/journal/create",
+            json={"content": "I feel overwhelmed by work lately", "defer_reflection": True}
+        )
+
+        assert response.status_code == 202
+        entry = response.json()
+        assert entry["reflection"] is None
+        assert entry["reflection_status"] == "pending"
+        assert entry["emotion"] == "nervousness"
+
+        state = client.get(f"/journal/{entry['id']}/reflection", params={"wait": 10}).json()
+        assert state["status"] == "done"
+        assert state["reflection"] == "That sounds like a lot to carry."
+        assert client.get(f"/journal/{entry['id']}").json()["reflection"] == state["reflection"]
+
+    def test_reflection_status_of_unknown_entry(self, client):
+        """Test the status endpoint 404s for a missing entry"""
+        response = client.get("/journal/999999999/reflection")
+        assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
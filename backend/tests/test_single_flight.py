@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+from app.services.micro_batcher import MicroBatcher
+
+
+class TestAsyncCoalescing:
+    """Test SingleFlight.do() for coroutines"""
+
+    def test_identical_calls_share_one_computation(self):
+        """Test concurrent calls for one key run once and share the result"""
+        flight = SingleFlight("test")
+        runs = []
+
+        async def compute(value):
+            runs.append(value)
+            await asyncio.sleep(0.02)
+            return {"value": value}
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("a", compute, "a") for _ in range(5)),
+                flight.do("b", compute, "b")
+            )
+
+        results = asyncio.run(run())
+
+        assert sorted(runs) == ["a", "b"]
+        assert [r["value"] for r in results] == ["a"] * 5 + ["b"]
+        assert results[0] is results[4]
+
+        stats = flight.stats()
+        assert stats["calls"] == 6
+        assert stats["executed"] == 2
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+
+    def test_finished_computations_are_not_reused(self):
+        """Test sequential calls each run (no result caching)"""
+        flight = SingleFlight("test")
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            return len(runs)
+
+        async def run():
+            return [await flight.do("a", compute) for _ in range(3)]
+
+        assert asyncio.run(run()) == [1, 2, 3]
+        assert flight.stats()["coalesced"] == 0
+
+    def test_errors_reach_every_caller(self):
+        """Test a failed computation raises in all coalesced callers"""
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("a", fail) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.stats()["failed"] == 1
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test the first caller going away leaves the shared computation running"""
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flight.do("a", compute))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(flight.do("a", compute))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "done"
+
+    def test_disabled_runs_every_call(self):
+        """Test coalescing can be switched off"""
+        flight = SingleFlight("test", enabled=False)
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(flight.do("a", compute) for _ in range(3)))
+
+        asyncio.run(run())
+        assert len(runs) == 3
+
+
+class TestBatcherCoalescing:
+    """Test duplicate texts are coalesced before batching"""
+
+    def test_duplicates_are_analyzed_once(self):
+        """Test identical concurrent texts take one batch slot"""
+        calls = []
+
+        def analyze_batch(texts, threshold=0.10, sentences=False):
+            calls.append(list(texts))
+            return [{"emotion": text} for text in texts]
+
+        batcher = MicroBatcher(analyze_batch, max_batch_size=8, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(
+                *(batcher.analyze("same text") for _ in range(4)),
+                batcher.analyze("other text"),
+                batcher.analyze("same text", threshold=0.3)
+            )
+
+        results = asyncio.run(run())
+
+        assert [r["emotion"] for r in results] == ["same text"] * 4 + ["other text", "same text"]
+        assert sorted(sum(calls, [])) == ["other text", "same text", "same text"]
+
+        stats = batcher.stats()
+        assert stats["requests"] == 3
+        assert stats["coalescing"]["coalesced"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import Base, engine
+from app.services.llm_providers import LLMProvider, provider_loop
+from app.services.micro_batcher import emotion_batcher
+from app.services.reflection_generator_v2 import ReflectionGeneratorV2, reflection_generator_v2
+
+REPLY = "REFLECTION: It makes sense to feel stretched thin.\n\nTIPS:\n- Take a short walk outside\n- Write down one small win\n- Call a friend tonight"
+
+
+class StreamingProvider(LLMProvider):
+    """Provider that streams REPLY in small chunks"""
+
+    name = "fake"
+
+    def __init__(self, chunk_size=5, delay=0.01, fail_after=None):
+        super().__init__("fake-model")
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def _complete(self, prompt, system, temperature, max_tokens):
+        return REPLY
+
+    async def _stream(self, prompt, system, temperature, max_tokens):
+        try:
+            for i in range(0, len(REPLY), self.chunk_size):
+                if self.fail_after is not None and i >= self.fail_after:
+                    raise ConnectionError("stream dropped")
+                await asyncio.sleep(self.delay)
+                yield REPLY[i:i + self.chunk_size]
+        finally:
+            self.closed = True
+
+
+class FakeResult(dict):
+    """Stand-in for EmotionResult"""
+
+    def to_dict(self):
+        return dict(self)
+
+    def to_storage_dict(self):
+        return dict(self)
+
+
+EMOTION = FakeResult(
+    emotion="nervousness", confidence=0.7, emotional_state="negative",
+    significant_emotions=[{"label": "nervousness", "confidence": 0.7}]
+)
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class TestReflectionStream:
+    """Test ReflectionGeneratorV2.astream"""
+
+    def collect(self, generator, text="I have so much going on this week"):
+        async def run():
+            events = []
+            async for event in generator.astream(text, EMOTION):
+                events.append((time.perf_counter(), *event))
+            return events
+        return asyncio.run(run())
+
+    def test_tokens_then_parsed_reflection(self):
+        """Test token events rebuild the reflection and the stream ends with the parsed result"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = StreamingProvider()
+
+        events = self.collect(generator)
+        tokens = [data["text"] for _, event, data in events if event == "token"]
+        final = events[-1]
+
+        assert len(tokens) > 3
+        assert "REFLECTION:" not in "".join(tokens)
+        assert "TIPS" not in "".join(tokens)
+        assert "".join(tokens).strip() == "It makes sense to feel stretched thin."
+        assert final[1] == "reflection"
+        assert final[2]["suggestions"] == [
+            "Take a short walk outside", "Write down one small win", "Call a friend tonight"
+        ]
+        assert final[2]["tone"] == "empathetic"
+
+    def test_first_token_arrives_before_completion(self):
+        """Test time to first token is well below the full generation time"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = StreamingProvider(chunk_size=5, delay=0.01)
+
+        start = time.perf_counter()
+        events = self.collect(generator)
+        first_token = next(at for at, event, _ in events if event == "token")
+
+        assert first_token - start < (events[-1][0] - start) / 3
+
+    def test_provider_failure_ends_with_fallback(self):
+        """Test a dropped stream still ends with a usable reflection"""
+        generator = ReflectionGeneratorV2()
+        generator.cache = None
+        generator.provider = StreamingProvider(fail_after=30)
+
+        events = self.collect(generator)
+
+        assert events[-1][1] == "reflection"
+        assert events[-1][2]["focus"] == "validation"
+
+    def test_closing_early_cancels_provider_stream(self):
+        """Test a disconnecting client stops the provider-side stream"""
+        provider = StreamingProvider(chunk_size=1, delay=0.01)
+
+        async def run():
+            stream = provider.stream("prompt")
+            async for _ in stream:
+                break
+            await stream.aclose()
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        assert provider.closed
+        assert provider_loop.stats()["in_flight"] == 0
+
+
+class TestStreamingEndpoints:
+    """Test the SSE endpoints"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        async def analyze(text, threshold=0.10, sentences=False):
+            return EMOTION
+
+        monkeypatch.setattr(emotion_batcher, "analyze", analyze)
+        monkeypatch.setattr(reflection_generator_v2.load(), "provider", StreamingProvider())
+        monkeypatch.setattr(reflection_generator_v2.load(), "cache", None)
+        Base.metadata.create_all(bind=engine)
+        return TestClient(app)
+
+    def test_reflect_v2_stream(self, client):
+        """Test emotion first, tokens, then the parsed reflection"""
+        response = client.post("/analysis/reflect-v2/stream", json={"text": "I have so much going on"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_events(response.text)
+        assert events[0] == ("emotion", EMOTION.to_dict())
+        assert {name for name, _ in events[1:-1]} == {"token"}
+        assert events[-1][0] == "reflection"
+
+    def test_reflect_v2_stream_validates_input(self, client):
+        """Test short texts are rejected before the stream starts"""
+        response = client.post("/analysis/reflect-v2/stream", json={"text": "short"})
+        assert response.status_code == 400
+
+    def test_journal_create_stream_saves_entry(self, client):
+        """Test the streamed journal entry is saved with its reflection"""
+        response = client.post(
+            "/journal/create/stream", json={"content": "I have so much going on this week"}
+        )
+        events = parse_events(response.text)
+
+        assert events[0][0] == "emotion"
+        assert [name for name, _ in events[-2:]] == ["reflection", "entry"]
+
+        entry = events[-1][1]
+        assert entry["reflection"] == "It makes sense to feel stretched thin."
+        assert client.get(f"/journal/{entry['id']}").json()["reflection"] == entry["reflection"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+import pytest
+from app.services.warmup import Warmup
+
+
+class FakeTokenizer:
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": list(range(10, 10 + len(text.split())))}
+
+
+class FakeAnalyzer:
+    """Stand-in analyzer whose rounds get faster, then flatten out"""
+
+    MAX_TOKENS = 512
+    BATCH_SIZE = 16
+
+    def __init__(self, loaded=True):
+        self.model = object() if loaded else None
+        self.tokenizer = FakeTokenizer()
+        self.backend = object()
+        self._special_prefix, self._special_suffix = [0], [2]
+        self.rounds = 0
+        self.shapes = set()
+
+    def _forward_sequences(self, sequences, batch_size):
+        self.shapes.add((len(sequences), len(sequences[0])))
+
+    def _score_batch(self, texts, batch_size):
+        self.rounds += 1
+        time.sleep(0.002 * max(1, 6 - self.rounds))  # Cold rounds are slow
+        return np.zeros((len(texts), 2)), np.ones(len(texts), dtype=int)
+
+    def _build_results(self, texts, scores, threshold, windows):
+        return []
+
+
+class TestWarmup:
+    """Test startup warmup and readiness"""
+
+    def test_runs_every_shape_until_stable(self):
+        """Test each (length, batch) is exercised and warmup ends once latency is flat"""
+        analyzer = FakeAnalyzer()
+        warmup = Warmup([16, 600], [1, 4], window=2, tolerance=0.25, max_rounds=20)
+
+        assert warmup.run(analyzer)
+
+        assert warmup.ready and warmup.stabilized
+        assert analyzer.shapes == {(1, 16), (4, 16), (1, 512), (4, 512)}
+        assert 4 <= warmup.stats()["rounds"] < 20
+
+    def test_round_budget_still_ends_ready(self):
+        """Test warmup gives up on stability after max_rounds without blocking readiness"""
+        warmup = Warmup([16], [1], window=2, tolerance=0.0, max_rounds=4)
+
+        assert warmup.run(FakeAnalyzer())
+        assert warmup.stats()["rounds"] == 4
+
+    def test_not_ready_without_a_model(self):
+        """Test a worker whose model failed to load never reports ready"""
+        warmup = Warmup([16], [1])
+
+        assert not warmup.run(FakeAnalyzer(loaded=False))
+        assert warmup.status == "failed"
+        assert warmup.wait(0)
+
+    def test_sequence_has_exact_length(self):
+        """Test warmup inputs have the requested token count, special tokens included"""
+        sequence = Warmup._sequence(FakeAnalyzer(), 64)
+
+        assert len(sequence) == 64
+        assert sequence[0] == 0 and sequence[-1] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])